@@ -17,6 +17,24 @@ def create_app():
 
     db.init_app(app)
 
+    # Jinja bytecode cache (flask templates compile bij de build)
+    from .templating import init_templates, templates_cli
+    init_templates(app)
+    app.cli.add_command(templates_cli)
+
+    # gefingerprinte static assets (flask assets build bij de build)
+    from .assets import assets_cli, init_assets
+    init_assets(app)
+    app.cli.add_command(assets_cli)
+
+    # br/gzip voor HTML/JSON; als eerste geregistreerd → loopt als laatste after_request
+    from .compression import init_compression
+    init_compression(app)
+
+    # token buckets op unlock- en zoekendpoints (429 + Retry-After)
+    from .ratelimit import init_rate_limits
+    init_rate_limits(app)
+
     # now() in templates
     @app.context_processor
     def inject_now():
@@ -25,4 +43,48 @@ def create_app():
     from .routes import main
     app.register_blueprint(main)
 
+    from .api import api
+    app.register_blueprint(api)
+
+    # admin-only request profiler (?_profile=1)
+    from .profiler import init_profiler
+    from .supabase_client import engine
+    init_profiler(app, engine)
+
+    # cache invalidation bus: listener per worker-process
+    from .invalidation import init_invalidation
+    init_invalidation(app)
+
+    # dashboard-cache vervalt na eigen schrijfacties
+    from .dashboard import init_dashboard_cache
+    init_dashboard_cache(app)
+
+    # flask schema create (tabellen toegevoegd na de oorspronkelijke DDL)
+    from .schema import schema_cli
+    app.cli.add_command(schema_cli)
+
+    # flask recommendations compute (nachtelijke batch)
+    from .recommendations import recommendations_cli
+    app.cli.add_command(recommendations_cli)
+
+    # flask storage gc (uploads zonder referenties)
+    from .storage import storage_cli
+    app.cli.add_command(storage_cli)
+
+    # flask skills similarity (co-occurrence batch)
+    from .skill_similarity import skills_cli
+    app.cli.add_command(skills_cli)
+
+    # flask saved-searches refresh (volledige herberekening)
+    from .saved_searches import saved_searches_cli
+    app.cli.add_command(saved_searches_cli)
+
+    # flask cards create/refresh (card tabellen voor de lijsten)
+    from .cards import cards_cli
+    app.cli.add_command(cards_cli)
+
+    # flask archive run (koude rijen naar de *_archive tabellen)
+    from .archive import archive_cli
+    app.cli.add_command(archive_cli)
+
     return app
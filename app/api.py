@@ -0,0 +1,342 @@
+import base64
+import binascii
+import json
+import os
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+
+from flask import Blueprint, Response, request
+
+try:
+    import orjson
+except ImportError:  # valt terug op de standaard json module
+    orjson = None
+
+from .supabase_client import get_session
+from .cache import TTLCache
+from .models import ConsultantProfile, UserRole
+from .matching import (
+    parse_consultant_filters,
+    parse_job_filters,
+    search_consultants,
+    search_jobs,
+)
+from .async_search import (
+    ASYNC_SEARCH,
+    search_consultants_concurrently,
+    search_jobs_concurrently,
+)
+from .routes import get_current_user
+from .storage import UploadRejected, complete_direct_upload, replace_reference, sign_direct_upload
+
+# ------------------ JSON SEARCH API (v1) ------------------
+# Compacte, kolom-geprojecteerde varianten van /jobs en /consultants.
+# Zelfde filters en relevance scoring als de HTML-lijsten (matching.py),
+# met cursor-paginatie en optionele veldselectie (?fields=id,title,score).
+#
+# Cursor = (tijdstip van de eerste pagina, sort key van de laatste rij). Het
+# tijdstip wordt als filters["now"] hergebruikt, zodat recency-scores (en dus
+# de volgorde) niet verschuiven tussen pagina's. De gerangschikte lijst van de
+# eerste pagina blijft API_CURSOR_TTL seconden bewaard (per worker-process);
+# volgende pagina's knippen daaruit zonder opnieuw te zoeken en te scoren. Bij
+# een cache miss (andere worker, verlopen) wordt opnieuw gezocht met hetzelfde
+# tijdstip, met dezelfde volgorde als resultaat.
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+API_DEFAULT_LIMIT = 20
+API_MAX_LIMIT = 100
+API_SORT_OPTIONS = ("relevance", "title")
+API_CURSOR_TTL = int(os.getenv("API_CURSOR_TTL", "300"))  # seconden
+
+# (endpoint, user_id, tijdstip, filters) -> (keys, rijen met alle velden)
+search_snapshots = TTLCache(ttl=API_CURSOR_TTL, maxsize=256)
+
+
+def _score(item):
+    return round(item.score, 4) if hasattr(item, "score") else None
+
+
+def _breakdown(item):
+    data = getattr(item, "score_breakdown", None)
+    if not data:
+        return None
+    return {k: round(v, 4) for k, v in data.items() if k.endswith("_factor")}
+
+
+JOB_FIELDS = {
+    "id": lambda job: job.id,
+    "title": lambda job: job.title,
+    "company": lambda job: job.company.company_name_masked if job.company else None,
+    "city": lambda job: job.location_city,
+    "country": lambda job: job.country,
+    "contract_type": lambda job: job.contract_type,
+    "created_at": lambda job: job.created_at.isoformat() if job.created_at else None,
+    "skills": lambda job: [s.name for s in job.skills],
+    "is_unlocked": lambda job: job.is_unlocked_for_me,
+    "score": _score,
+    "breakdown": _breakdown,
+}
+JOB_DEFAULT_FIELDS = (
+    "id", "title", "company", "city", "country", "contract_type", "skills", "score",
+)
+
+CONSULTANT_FIELDS = {
+    "id": lambda c: c.id,
+    # naam enkel zichtbaar na unlock, net als in consultant_list.html
+    "name": lambda c: (c.display_name_masked or c.user.username) if c.is_unlocked_for_me else c.initials,
+    "headline": lambda c: c.headline,
+    "city": lambda c: c.location_city,
+    "country": lambda c: c.country,
+    "years_experience": lambda c: c.years_experience,
+    "skills": lambda c: [s.name for s in c.skills],
+    "is_unlocked": lambda c: c.is_unlocked_for_me,
+    "distance_km": lambda c: round(c.distance_km, 1) if getattr(c, "distance_km", None) is not None else None,
+    "score": _score,
+    "breakdown": _breakdown,
+}
+CONSULTANT_DEFAULT_FIELDS = (
+    "id", "name", "headline", "city", "country", "years_experience", "skills", "score",
+)
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def json_response(payload, status=200):
+    """JSON via orjson als die geïnstalleerd is, anders compacte json.dumps."""
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    return Response(body, status=status, mimetype="application/json")
+
+
+@api.errorhandler(ApiError)
+def handle_api_error(err):
+    return json_response({"error": err.message}, status=err.status)
+
+
+def require_api_user(db, role):
+    user = get_current_user(db)
+    if not user:
+        raise ApiError(401, "Login required.")
+    if user.role != role:
+        raise ApiError(403, f"Only {role.value} accounts can use this endpoint.")
+    return user
+
+
+def parse_fields(allowed, default):
+    raw = request.args.get("fields")
+    if not raw:
+        return default
+    fields = tuple(f.strip() for f in raw.split(",") if f.strip())
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ApiError(400, f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def parse_limit():
+    limit = request.args.get("limit", API_DEFAULT_LIMIT, type=int)
+    return min(max(limit or API_DEFAULT_LIMIT, 1), API_MAX_LIMIT)
+
+
+def sort_key(item, sort_by):
+    """Totale ordening (met id als tiebreaker), nodig voor stabiele cursors."""
+    if sort_by == "relevance":
+        return (-getattr(item, "score", 0.0), item.id)
+    return (getattr(item, "title", None) or getattr(item, "display_name_masked", None) or "", item.id)
+
+
+def encode_cursor(searched_at, key):
+    raw = json.dumps([searched_at, *key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Retourneert (tijdstip, sort key)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        searched_at, *key = json.loads(base64.urlsafe_b64decode(padded))
+        return float(searched_at), tuple(key)
+    except (binascii.Error, ValueError, TypeError):
+        raise ApiError(400, "Invalid cursor.")
+
+
+def parse_search(parse_filters):
+    """
+    Filters + cursor van een zoekrequest.
+    Retourneert (filters, tijdstip, sort key na de cursor of None).
+    """
+    try:
+        filters = parse_filters(request.args)
+    except ValueError:
+        raise ApiError(400, "skills must be a list of skill ids.")
+    filters["sort_by"] = parse_sort_by()
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        searched_at, after = decode_cursor(cursor)
+    else:
+        searched_at, after = round(time.time(), 3), None
+    filters["now"] = datetime.fromtimestamp(searched_at, timezone.utc)
+    return filters, searched_at, after
+
+
+def snapshot_key(endpoint, user_id, searched_at):
+    args = sorted(
+        (key, value)
+        for key, value in request.args.items(multi=True)
+        if key not in ("cursor", "limit", "fields")
+    )
+    return (endpoint, user_id, searched_at, tuple(args))
+
+
+def build_snapshot(items, sort_by, field_map):
+    """Gesorteerde keys + rijen met alle velden (los van de DB-sessie)."""
+    items = sorted(items, key=lambda item: sort_key(item, sort_by))
+    keys = [sort_key(item, sort_by) for item in items]
+    rows = [{f: get(item) for f, get in field_map.items()} for item in items]
+    return keys, rows
+
+
+def paginate(snapshot, searched_at, after, fields):
+    """Knip een pagina na de cursor en geef enkel de gevraagde velden terug."""
+    keys, rows = snapshot
+
+    start = 0
+    if after is not None:
+        try:
+            start = bisect_right(keys, after)
+        except TypeError:
+            raise ApiError(400, "Invalid cursor.")
+
+    limit = parse_limit()
+    page = rows[start:start + limit]
+
+    next_cursor = None
+    if start + limit < len(rows):
+        next_cursor = encode_cursor(searched_at, keys[start + limit - 1])
+
+    return {
+        "count": len(rows),
+        "results": [{f: row[f] for f in fields} for row in page],
+        "next_cursor": next_cursor,
+    }
+
+
+def parse_sort_by():
+    sort_by = request.args.get("sort_by", "relevance")
+    if sort_by not in API_SORT_OPTIONS:
+        raise ApiError(400, f"sort_by must be one of: {', '.join(API_SORT_OPTIONS)}")
+    return sort_by
+
+
+@api.route("/jobs/search", methods=["GET"])
+def jobs_search():
+    """
+    Jobs voor de ingelogde consultant (zelfde filters als /jobs).
+    """
+    fields = parse_fields(JOB_FIELDS, JOB_DEFAULT_FIELDS)
+    filters, searched_at, after = parse_search(parse_job_filters)
+
+    with get_session() as db:
+        user = require_api_user(db, UserRole.consultant)
+
+        key = snapshot_key("jobs", user.id, searched_at)
+        snapshot = search_snapshots.get(key)
+        if snapshot is None:
+            if ASYNC_SEARCH:
+                result = search_jobs_concurrently(user, filters, projection=True)
+            else:
+                result = search_jobs(db, user, filters, projection=True)
+            snapshot = build_snapshot(result["jobs"], filters["sort_by"], JOB_FIELDS)
+            search_snapshots.set(key, snapshot)
+
+    return json_response(paginate(snapshot, searched_at, after, fields))
+
+
+@api.route("/consultants/search", methods=["GET"])
+def consultants_search():
+    """
+    Consultants voor de ingelogde company (zelfde filters als /consultants).
+    - Relevance wordt berekend t.o.v. job_id (default: nieuwste actieve job).
+    """
+    fields = parse_fields(CONSULTANT_FIELDS, CONSULTANT_DEFAULT_FIELDS)
+    filters, searched_at, after = parse_search(parse_consultant_filters)
+
+    with get_session() as db:
+        user = require_api_user(db, UserRole.company)
+
+        key = snapshot_key("consultants", user.id, searched_at)
+        cached = search_snapshots.get(key)
+        if cached is None:
+            if ASYNC_SEARCH:
+                result = search_consultants_concurrently(user, filters, projection=True)
+            else:
+                result = search_consultants(db, user, filters, projection=True)
+            snapshot = build_snapshot(result["consultants"], filters["sort_by"], CONSULTANT_FIELDS)
+            cached = (snapshot, result["selected_job_id"])
+            search_snapshots.set(key, cached)
+
+    snapshot, selected_job_id = cached
+    payload = paginate(snapshot, searched_at, after, fields)
+    payload["job_id"] = selected_job_id
+    return json_response(payload)
+
+
+@api.route("/uploads/sign", methods=["POST"])
+def sign_upload():
+    """
+    Direct upload, stap 1 (consultant): body {field, filename, size, sha256}.
+    - field: "profile_image" of "cv_document"
+    - Retourneert {token, upload}; upload = {method, url, headers} waar de browser
+      het bestand naartoe stuurt, of null als een identiek bestand al bewaard is.
+    """
+    body = request.get_json(silent=True) or {}
+    with get_session() as db:
+        user = require_api_user(db, UserRole.consultant)
+        try:
+            signed = sign_direct_upload(
+                db,
+                user.id,
+                body.get("field"),
+                body.get("filename"),
+                body.get("size"),
+                body.get("sha256"),
+            )
+        except UploadRejected as rejected:
+            raise ApiError(400, str(rejected))
+
+    return json_response(signed)
+
+
+@api.route("/uploads/complete", methods=["POST"])
+def complete_upload():
+    """
+    Direct upload, stap 3 (consultant): body {token}.
+    Controleert het object in storage en koppelt het aan het profiel; retourneert {field, url}.
+    """
+    body = request.get_json(silent=True) or {}
+    with get_session() as db:
+        user = require_api_user(db, UserRole.consultant)
+        profile = db.query(ConsultantProfile).filter_by(user_id=user.id).first()
+        if not profile:
+            raise ApiError(404, "Consultant profile not found.")
+
+        try:
+            field, url = complete_direct_upload(db, user.id, body.get("token") or "")
+        except UploadRejected as rejected:
+            raise ApiError(400, str(rejected))
+
+        replace_reference(db, getattr(profile, field), url)
+        setattr(profile, field, url)
+        db.commit()
+
+    return json_response({"field": field, "url": url})
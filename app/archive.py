@@ -0,0 +1,239 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, exists, func, insert, select
+
+from .supabase_client import get_session
+from .invalidation import publish
+from .models import (
+    ArchivedCollaboration,
+    ArchivedJobPost,
+    ArchivedJobSkill,
+    ArchivedUnlock,
+    Collaboration,
+    CollaborationStatus,
+    ConsultantProfile,
+    JobPost,
+    JobSkill,
+    Unlock,
+    UnlockTarget,
+)
+
+# ------------------ HOT/COLD ARCHIVE ------------------
+# job_posts, collaborations en unlocks groeien enkel. Koude rijen verhuizen
+# (zelfde id, zelfde kolommen + archived_at) naar *_archive tabellen, zodat de
+# lijstqueries en hun indexen enkel levende rijen zien:
+#
+# - inactieve jobs ouder dan ARCHIVE_JOB_DAYS (created_at; er is geen
+#   deactivated_at) waar geen collaboration in de hot tabel naar verwijst,
+#   samen met hun skills (job_skills_archive)
+# - beëindigde collaborations met ended_at ouder dan ARCHIVE_COLLABORATION_DAYS
+# - unlocks waarvan het target niet meer bestaat (ook niet in het archief)
+#
+# `flask archive run` (bv. nachtelijk) verplaatst per batch van
+# ARCHIVE_BATCH_SIZE rijen: INSERT ... SELECT + DELETE in één korte
+# transactie, zodat er nooit lange locks op de hot tabellen staan.
+#
+# Lezen blijft transparant: find_job() en has_collaborated() kijken eerst in
+# de hot tabel en daarna in het archief (owner-views, admin). Een
+# gearchiveerde job die bewerkt wordt, gaat eerst terug naar job_posts
+# (restore_job).
+
+ARCHIVE_JOB_DAYS = int(os.getenv("ARCHIVE_JOB_DAYS", "180"))
+ARCHIVE_COLLABORATION_DAYS = int(os.getenv("ARCHIVE_COLLABORATION_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+
+def _copy(db, source, target, names, condition):
+    """INSERT INTO target (names) SELECT names FROM source WHERE condition."""
+    columns = [source.__table__.c[name] for name in names]
+    db.execute(insert(target).from_select(names, select(*columns).where(condition)))
+
+
+def _names(model):
+    return [column.name for column in model.__table__.columns]
+
+
+# ------------------ MOVE (HOT → COLD) ------------------
+
+def cold_job_ids_statement(cutoff, limit):
+    return (
+        select(JobPost.id)
+        .where(
+            JobPost.is_active == False,
+            JobPost.created_at < cutoff,
+            ~exists().where(Collaboration.job_post_id == JobPost.id),
+        )
+        .order_by(JobPost.id)
+        .limit(limit)
+    )
+
+
+def cold_collaboration_ids_statement(cutoff, limit):
+    return (
+        select(Collaboration.id)
+        .where(
+            Collaboration.status == CollaborationStatus.ended,
+            Collaboration.ended_at < cutoff,
+        )
+        .order_by(Collaboration.id)
+        .limit(limit)
+    )
+
+
+def orphan_unlock_ids_statement(limit):
+    """Unlocks op verwijderde targets (niet in de hot tabel en niet in het archief)."""
+    job_exists = exists().where(JobPost.id == Unlock.target_id)
+    archived_job_exists = exists().where(ArchivedJobPost.id == Unlock.target_id)
+    profile_exists = exists().where(ConsultantProfile.id == Unlock.target_id)
+    return (
+        select(Unlock.id)
+        .where(
+            ((Unlock.target_type == UnlockTarget.job) & ~job_exists & ~archived_job_exists)
+            | ((Unlock.target_type == UnlockTarget.consultant) & ~profile_exists)
+        )
+        .order_by(Unlock.id)
+        .limit(limit)
+    )
+
+
+def archive_jobs(db, ids):
+    """Jobs + hun skills naar het archief. Commit niet."""
+    _copy(db, JobPost, ArchivedJobPost, _names(JobPost), JobPost.id.in_(ids))
+    _copy(db, JobSkill, ArchivedJobSkill, _names(JobSkill), JobSkill.job_id.in_(ids))
+    # job_skills expliciet (ook zonder ON DELETE CASCADE, bv. SQLite)
+    db.execute(delete(JobSkill).where(JobSkill.job_id.in_(ids)))
+    db.execute(delete(JobPost).where(JobPost.id.in_(ids)))
+    for job_id in ids:
+        publish(db, "job_post", job_id)
+
+
+def archive_collaborations(db, ids):
+    """Commit niet. Events zoals invalidation._events_for(Collaboration) (dashboards)."""
+    parties = db.execute(
+        select(Collaboration.consultant_id, Collaboration.company_id).where(Collaboration.id.in_(ids))
+    ).all()
+    _copy(db, Collaboration, ArchivedCollaboration, _names(Collaboration), Collaboration.id.in_(ids))
+    db.execute(delete(Collaboration).where(Collaboration.id.in_(ids)))
+    for consultant_id in {consultant_id for consultant_id, _ in parties}:
+        publish(db, "consultant_profile", consultant_id)
+    for company_id in {company_id for _, company_id in parties}:
+        publish(db, "company", company_id)
+
+
+def archive_unlocks(db, ids):
+    _copy(db, Unlock, ArchivedUnlock, _names(Unlock), Unlock.id.in_(ids))
+    db.execute(delete(Unlock).where(Unlock.id.in_(ids)))
+
+
+def _archive_in_batches(ids_statement, move, batch_size, dry_run):
+    """Batch na batch tot er niets meer te verplaatsen is. Retourneert het aantal rijen."""
+    if dry_run:
+        with get_session() as db:
+            candidates = ids_statement(None).subquery()
+            return db.execute(select(func.count()).select_from(candidates)).scalar()
+
+    moved = 0
+    while True:
+        with get_session() as db:
+            ids = db.execute(ids_statement(batch_size)).scalars().all()
+            if not ids:
+                return moved
+            move(db, ids)
+            db.commit()
+        moved += len(ids)
+        if len(ids) < batch_size:
+            return moved
+
+
+def run_archive(job_days=ARCHIVE_JOB_DAYS, collaboration_days=ARCHIVE_COLLABORATION_DAYS,
+                batch_size=ARCHIVE_BATCH_SIZE, dry_run=False):
+    """
+    Alle koude rijen archiveren. Collaborations eerst, zodat jobs waarvan
+    enkel nog beëindigde collaborations bestonden in dezelfde run meekunnen.
+    Retourneert {"collaborations": n, "jobs": n, "unlocks": n}.
+    """
+    now = datetime.now(timezone.utc)
+    collaboration_cutoff = now - timedelta(days=collaboration_days)
+    job_cutoff = now - timedelta(days=job_days)
+
+    return {
+        "collaborations": _archive_in_batches(
+            lambda limit: cold_collaboration_ids_statement(collaboration_cutoff, limit),
+            archive_collaborations, batch_size, dry_run,
+        ),
+        "jobs": _archive_in_batches(
+            lambda limit: cold_job_ids_statement(job_cutoff, limit),
+            archive_jobs, batch_size, dry_run,
+        ),
+        "unlocks": _archive_in_batches(
+            orphan_unlock_ids_statement, archive_unlocks, batch_size, dry_run,
+        ),
+    }
+
+
+# ------------------ READ (HOT + COLD) ------------------
+
+def find_job(db, job_id, company_id=None):
+    """JobPost, of ArchivedJobPost als de job gearchiveerd is (of None)."""
+    for model in (JobPost, ArchivedJobPost):
+        stmt = select(model).where(model.id == job_id)
+        if company_id is not None:
+            stmt = stmt.where(model.company_id == company_id)
+        job = db.execute(stmt).scalars().first()
+        if job is not None:
+            return job
+    return None
+
+
+def archived_jobs_statement(company_id):
+    return select(ArchivedJobPost).where(ArchivedJobPost.company_id == company_id)
+
+
+def has_collaborated(db, company_id, consultant_id):
+    """Ooit samengewerkt (lopend, beëindigd of gearchiveerd)?"""
+    for model in (Collaboration, ArchivedCollaboration):
+        found = db.execute(
+            select(model.id)
+            .where(model.company_id == company_id, model.consultant_id == consultant_id)
+            .limit(1)
+        ).first()
+        if found is not None:
+            return True
+    return False
+
+
+def restore_job(db, archived):
+    """Gearchiveerde job terug naar job_posts (zelfde id). Commit niet; retourneert de JobPost."""
+    job_id = archived.id
+    _copy(db, ArchivedJobPost, JobPost, _names(JobPost), ArchivedJobPost.id == job_id)
+    _copy(db, ArchivedJobSkill, JobSkill, _names(JobSkill), ArchivedJobSkill.job_id == job_id)
+    delete_archived_job(db, archived)
+    publish(db, "job_post", job_id)
+    return db.get(JobPost, job_id)
+
+
+def delete_archived_job(db, archived):
+    """Commit niet."""
+    db.execute(delete(ArchivedJobSkill).where(ArchivedJobSkill.job_id == archived.id))
+    db.execute(delete(ArchivedJobPost).where(ArchivedJobPost.id == archived.id))
+    db.expunge(archived)
+
+
+# ------------------ CLI ------------------
+archive_cli = AppGroup("archive", help="Koude jobs, collaborations en unlocks archiveren.")
+
+
+@archive_cli.command("run")
+@click.option("--job-days", type=int, default=ARCHIVE_JOB_DAYS, show_default=True)
+@click.option("--collaboration-days", type=int, default=ARCHIVE_COLLABORATION_DAYS, show_default=True)
+@click.option("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, show_default=True)
+@click.option("--dry-run", is_flag=True, help="Enkel tellen wat gearchiveerd zou worden.")
+def run_command(job_days, collaboration_days, batch_size, dry_run):
+    """Verplaats koude rijen per batch naar de *_archive tabellen."""
+    counts = run_archive(job_days, collaboration_days, batch_size, dry_run)
+    verb = "would be archived" if dry_run else "archived"
+    for table, count in counts.items():
+        click.echo(f"{count} {table} {verb}.")
@@ -0,0 +1,296 @@
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+import shutil
+import time
+
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # zonder brotli enkel .gz varianten
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # zonder Pillow geen WebP varianten
+    Image = None
+
+# ------------------ STATIC ASSET PIPELINE ------------------
+# `flask assets build` (build-stap) schrijft naar static/dist/:
+#
+# - elk bestand met een content-hash in de naam (style.3f2a9c1b7d0e.css),
+# - .gz en .br varianten van tekstbestanden (css, js, svg, ...),
+# - WebP varianten in meerdere breedtes van grote afbeeldingen; in de CSS
+#   wordt een achtergrondafbeelding vervangen door image-set() met WebP per
+#   schermbreedte (JPEG/PNG blijft de fallback),
+# - manifest.json: origineel → gefingerprinte naam + WebP-breedtes.
+#
+# Runtime: url_for('static', filename=...) geeft de gefingerprinte naam
+# (url_defaults), dist/ wordt geserveerd met "immutable" caching en, als de
+# browser het aanvaardt, de voorgecomprimeerde .br/.gz variant.
+# Zonder build (development) blijft alles zoals vroeger.
+
+ASSETS_DIST = "dist"
+ASSETS_MAX_AGE = 365 * 24 * 3600  # seconden; bestandsnaam verandert bij elke wijziging
+HASH_LENGTH = 12
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+LARGE_IMAGE_BYTES = 64 * 1024
+RESPONSIVE_WIDTHS = (320, 640, 1280, 1920, 2560)
+WEBP_QUALITY = 80
+
+CSS_STATIC_URL_RE = re.compile(r"""url\(\s*(["']?)/static/([^"')]+)\1\s*\)""")
+CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+CSS_RULE_RE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+CSS_BACKGROUND_RE = re.compile(r"""background-image:\s*url\(\s*["']?/static/([^"')]+)["']?\s*\)\s*;""")
+
+_manifest = {"files": {}, "webp": {}}
+
+
+# ------------------ BUILD ------------------
+
+def _fingerprint(relative_path, content):
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    stem, extension = os.path.splitext(relative_path)
+    return f"{ASSETS_DIST}/{stem}.{digest}{extension}"
+
+
+def _write(static_folder, relative_path, content):
+    path = os.path.join(static_folder, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as handle:
+        handle.write(content)
+    return path
+
+
+def _write_compressed(path, content):
+    """.gz en .br naast het bestand, enkel als ze kleiner zijn."""
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(content, quality=11)
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(content):
+            with open(path + suffix, "wb") as handle:
+                handle.write(compressed)
+
+
+def _webp_variants(static_folder, relative_path):
+    """WebP per breedte (nooit groter dan het origineel). Retourneert {breedte: naam}."""
+    with Image.open(os.path.join(static_folder, relative_path)) as image:
+        original_width = image.width
+        widths = [w for w in RESPONSIVE_WIDTHS if w < original_width]
+        if original_width <= RESPONSIVE_WIDTHS[-1]:
+            widths.append(original_width)
+
+        variants = {}
+        stem = os.path.splitext(relative_path)[0]
+        for width in widths:
+            height = round(image.height * width / original_width)
+            buffer = io.BytesIO()
+            image.resize((width, height), Image.LANCZOS).save(
+                buffer, "WEBP", quality=WEBP_QUALITY, method=6
+            )
+            content = buffer.getvalue()
+
+            name = _fingerprint(f"{stem}-{width}w.webp", content)
+            _write(static_folder, name, content)
+            variants[width] = name
+    return variants
+
+
+def _image_set(webp, fallback, width, widths):
+    """image-set met WebP (1x + 2x) en de originele afbeelding als fallback."""
+    double = next((w for w in widths if w >= 2 * width), widths[-1])
+    return (
+        f'image-set(url("/static/{webp[width]}") type("image/webp") 1x, '
+        f'url("/static/{webp[double]}") type("image/webp") 2x, '
+        f'url("/static/{fallback}") type("{mimetypes.guess_type(fallback)[0]}"))'
+    )
+
+
+def _rewrite_css(css, files, webp):
+    """Verwijzingen naar /static/... fingerprinten; grote achtergronden → WebP per breedte."""
+    media_rules = []
+
+    def responsive_background(match):
+        selector, body = CSS_COMMENT_RE.sub("", match.group(1)), match.group(2)
+        background = CSS_BACKGROUND_RE.search(body)
+        if not background or background.group(1) not in webp:
+            return match.group(0)
+
+        original = background.group(1)
+        widths = sorted(webp[original])
+        fallback = files.get(original, original)
+        declaration = (
+            background.group(0)
+            + f"\n  background-image: {_image_set(webp[original], fallback, widths[-1], widths)};"
+        )
+        for width in reversed(widths[:-1]):
+            media_rules.append(
+                f"@media (max-width: {width}px) {{\n"
+                f"  {selector.strip()} {{ background-image: "
+                f"{_image_set(webp[original], fallback, width, widths)}; }}\n}}"
+            )
+        return f"{match.group(1)}{{{body.replace(background.group(0), declaration)}}}"
+
+    css = CSS_RULE_RE.sub(responsive_background, css)
+    if media_rules:
+        css += "\n\n/* responsive WebP achtergronden (flask assets build) */\n" + "\n".join(media_rules) + "\n"
+
+    def fingerprinted(match):
+        quote, path = match.group(1), match.group(2)
+        return f"url({quote}/static/{files.get(path, path)}{quote})"
+
+    return CSS_STATIC_URL_RE.sub(fingerprinted, css)
+
+
+def build_assets(static_folder):
+    """
+    Bouwt static/dist/ + manifest.json opnieuw op.
+    Retourneert het manifest.
+    """
+    dist = os.path.join(static_folder, ASSETS_DIST)
+    shutil.rmtree(dist, ignore_errors=True)
+
+    sources = sorted(
+        os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, "/")
+        for root, dirs, names in os.walk(static_folder)
+        if not os.path.relpath(root, static_folder).replace(os.sep, "/").startswith(ASSETS_DIST)
+        for name in names
+    )
+
+    files, webp = {}, {}
+    # eerst alles behalve CSS: de CSS verwijst naar de gefingerprinte namen
+    ordered = [p for p in sources if not p.endswith(".css")] + [p for p in sources if p.endswith(".css")]
+    for relative_path in ordered:
+        extension = os.path.splitext(relative_path)[1].lower()
+        with open(os.path.join(static_folder, relative_path), "rb") as handle:
+            content = handle.read()
+
+        if extension == ".css":
+            content = _rewrite_css(content.decode("utf-8"), files, webp).encode("utf-8")
+        elif (
+            Image is not None
+            and extension in {".jpg", ".jpeg", ".png"}
+            and len(content) >= LARGE_IMAGE_BYTES
+        ):
+            webp[relative_path] = _webp_variants(static_folder, relative_path)
+
+        name = _fingerprint(relative_path, content)
+        path = _write(static_folder, name, content)
+        if extension in COMPRESSIBLE_EXTENSIONS:
+            _write_compressed(path, content)
+        files[relative_path] = name
+
+    manifest = {"files": files, "webp": webp}
+    with open(os.path.join(dist, "manifest.json"), "w") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    return manifest
+
+
+assets_cli = AppGroup("assets", help="Static assets.")
+
+
+@assets_cli.command("build")
+def build_command():
+    """Fingerprint, comprimeer en maak WebP varianten van app/static (build-stap)."""
+    static_folder = current_app.static_folder
+    started = time.perf_counter()
+    manifest = build_assets(static_folder)
+    click.echo(
+        f"{len(manifest['files'])} assets, {sum(len(v) for v in manifest['webp'].values())} "
+        f"WebP variants written to {os.path.join(static_folder, ASSETS_DIST)} "
+        f"in {time.perf_counter() - started:.1f}s."
+    )
+    if brotli is None:
+        click.echo("brotli not installed: only .gz variants.")
+    if Image is None:
+        click.echo("Pillow not installed: no WebP variants.")
+
+
+# ------------------ SERVING ------------------
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, ASSETS_DIST, "manifest.json")
+    try:
+        with open(path) as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        manifest = {"files": {}, "webp": {}}
+    _manifest["files"] = manifest.get("files", {})
+    _manifest["webp"] = {
+        original: {int(width): name for width, name in variants.items()}
+        for original, variants in manifest.get("webp", {}).items()
+    }
+
+
+def static_srcset(filename):
+    """srcset met de WebP varianten van een afbeelding ("" zonder build)."""
+    variants = _manifest["webp"].get(filename)
+    if not variants:
+        return ""
+    return ", ".join(
+        f"/static/{name} {width}w" for width, name in sorted(variants.items())
+    )
+
+
+def _precompressed_variants():
+    """
+    (suffix, encoding) die de client aanvaardt, hoogste q-waarde eerst en br
+    bij gelijke waarde (zoals compression.choose_encoding); q=0 valt weg.
+    """
+    accepted = request.accept_encodings
+    variants = [(".br", "br"), (".gz", "gzip")]
+    variants.sort(key=lambda variant: -accepted.quality(variant[1]))
+    return [variant for variant in variants if accepted.quality(variant[1]) > 0]
+
+
+def serve_static(filename):
+    """
+    Flask static view met voorgecomprimeerde varianten en immutable caching
+    voor dist/; andere bestanden zoals voorheen.
+    """
+    static_folder = current_app.static_folder
+    if not filename.startswith(ASSETS_DIST + "/"):
+        return send_from_directory(static_folder, filename)
+
+    served, encoding = filename, None
+    for suffix, name in _precompressed_variants():
+        if os.path.isfile(os.path.join(static_folder, filename + suffix)):
+            served, encoding = filename + suffix, name
+            break
+
+    response = send_from_directory(
+        static_folder,
+        served,
+        mimetype=mimetypes.guess_type(filename)[0],
+        max_age=ASSETS_MAX_AGE,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if os.path.splitext(filename)[1] in COMPRESSIBLE_EXTENSIONS:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def init_assets(app):
+    """Manifest laden, url_for('static') fingerprinten en de static view vervangen."""
+    load_manifest(app.static_folder)
+    app.add_template_global(static_srcset)
+    app.view_functions["static"] = serve_static
+
+    @app.url_defaults
+    def fingerprinted_static(endpoint, values):
+        if endpoint == "static":
+            filename = values.get("filename")
+            if filename in _manifest["files"]:
+                values["filename"] = _manifest["files"][filename]
@@ -0,0 +1,330 @@
+import asyncio
+import os
+import threading
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import selectinload
+
+from .supabase_client import DATABASE_URL
+from .models import Company, ConsultantProfile, JobPost, Skill, UnlockTarget
+from .cards import (
+    ConsultantCard,
+    JobCard,
+    consultant_cards,
+    consultant_cards_statement,
+    job_cards,
+    job_cards_statement,
+)
+from .facets import CONSULTANT_FACETS, JOB_FACETS, count_facets, disjunctive_counts
+from .matching import (
+    company_jobs_statement,
+    consultant_candidates_statement,
+    consultant_country_reference,
+    consultant_facet_statements,
+    consultant_location,
+    filter_consultants_by_distance,
+    filter_jobs_by_distance,
+    job_candidates_statement,
+    job_distance_limit,
+    job_facet_statements,
+    pick_required_job,
+    rank_consultants,
+    rank_jobs,
+    unlock_counts_statement,
+    unlocked_ids_statement,
+    use_cards,
+    within_distance,
+)
+
+# ------------------ ASYNC SEARCH MODE ------------------
+# Optionele serving mode (ASYNC_SEARCH=1) voor de read-heavy zoekpaden.
+#
+# Elke worker-process draait één asyncio event loop in een achtergrondthread
+# met een async SQLAlchemy engine (asyncpg voor Postgres, aiosqlite voor SQLite).
+# Request-threads geven hun zoekopdracht aan die loop en wachten op het
+# resultaat; binnen één request lopen unlock-sets, unlock counts, de skills
+# catalogus en de kandidatenquery gelijktijdig. Met een threaded worker
+# (gunicorn -k gthread) worden de DB-wachttijden van veel trage requests
+# zo gemultiplexed op één loop en één connection pool.
+#
+# Filters en scoring zijn dezelfde functies als in matching.py.
+
+ASYNC_SEARCH = os.getenv("ASYNC_SEARCH", "0") == "1"
+ASYNC_SEARCH_TIMEOUT = float(os.getenv("ASYNC_SEARCH_TIMEOUT", "30"))
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "10"))
+
+_state = {"pid": None, "loop": None, "sessionmaker": None}
+_state_lock = threading.Lock()
+
+
+def async_database_url(url):
+    """
+    Zet DATABASE_URL om naar een async driver.
+    Retourneert (url, connect_args).
+
+    asyncpg kent geen sslmode-parameter, die wordt omgezet naar connect_args["ssl"].
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    connect_args = {}
+
+    if backend in ("postgres", "postgresql"):
+        sslmode = url.query.get("sslmode")
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = sslmode
+        url = url.difference_update_query(["sslmode"]).set(drivername="postgresql+asyncpg")
+    elif backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+
+    return url, connect_args
+
+
+def _ensure_loop():
+    """
+    Start (per process) de event loop + async engine.
+    Na een fork (gunicorn) wordt alles opnieuw opgebouwd in het child process.
+    """
+    # pas hier importeren: sqlalchemy.ext.asyncio vereist greenlet,
+    # wat niet nodig is zolang ASYNC_SEARCH uit staat
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    with _state_lock:
+        if _state["pid"] != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, daemon=True, name="async-search"
+            ).start()
+
+            url, connect_args = async_database_url(DATABASE_URL)
+            engine_kwargs = {"connect_args": connect_args, "pool_pre_ping": True}
+            if url.get_backend_name() == "postgresql":
+                engine_kwargs["pool_size"] = ASYNC_DB_POOL_SIZE
+
+            engine = create_async_engine(url, **engine_kwargs)
+
+            _state["pid"] = os.getpid()
+            _state["loop"] = loop
+            _state["sessionmaker"] = async_sessionmaker(engine, expire_on_commit=False)
+
+        return _state["loop"]
+
+
+def run_async(coro):
+    """Voer een coroutine uit op de gedeelde loop en wacht op het resultaat."""
+    loop = _ensure_loop()
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(ASYNC_SEARCH_TIMEOUT)
+
+
+# Elke query krijgt een eigen AsyncSession: één sessie mag geen
+# gelijktijdige queries uitvoeren.
+
+async def _scalars(stmt, unique=False):
+    async with _state["sessionmaker"]() as session:
+        result = await session.execute(stmt)
+        if unique:
+            result = result.unique()
+        return result.scalars().all()
+
+
+async def _rows(stmt):
+    async with _state["sessionmaker"]() as session:
+        return (await session.execute(stmt)).all()
+
+
+async def _nothing():
+    return []
+
+
+async def _facet_rows(statements):
+    """{facet: rijen} van matching.*_facet_statements, gelijktijdig."""
+    rows = await asyncio.gather(*(_rows(stmt) for stmt in statements.values()))
+    return dict(zip(statements, rows))
+
+
+def _skills_catalog_statement():
+    return select(Skill).order_by(Skill.name)
+
+
+def _candidate_ids(stmt, id_column):
+    """Subquery met enkel de ids van een kandidatenquery (voor unlock counts)."""
+    return stmt.with_only_columns(id_column).options().subquery().select()
+
+
+async def search_jobs_async(user_id, filters, projection=False, with_skills=False, facets=False):
+    """
+    Async variant van matching.search_jobs.
+
+    Profiel, kandidaten, unlock-set, unlock counts en (optioneel) de skills
+    catalogus worden gelijktijdig opgehaald. Het land van de consultant gaat
+    als scalar subquery mee in de kandidatenquery, zodat die niet op het
+    profiel hoeft te wachten.
+    """
+    relevance = filters["sort_by"] == "relevance"
+
+    profile_stmt = (
+        select(ConsultantProfile)
+        .options(selectinload(ConsultantProfile.skills))
+        .where(ConsultantProfile.user_id == user_id)
+        .limit(1)
+    )
+    country_subquery = (
+        select(func.nullif(func.lower(func.trim(ConsultantProfile.country)), ""))
+        .where(ConsultantProfile.user_id == user_id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    cards = use_cards(filters, jobs=True)
+    if cards:
+        candidates_stmt = job_cards_statement(filters, country_subquery)
+        candidates = _rows(candidates_stmt)
+        candidate_id = job_cards.c.id
+    else:
+        candidates_stmt = job_candidates_statement(filters, country_subquery, projection)
+        candidates = _scalars(candidates_stmt, unique=True)
+        candidate_id = JobPost.id
+
+    # de afstand hangt af van het profiel (zelfde gather): bij een actieve
+    # afstandsfilter ongegroepeerd ophalen en in Python tellen
+    grouped = job_distance_limit(filters) is None
+    facet_statements = job_facet_statements(filters, country_subquery, grouped, cards) if facets else {}
+
+    profiles, jobs, unlocked_rows, count_rows, skills, facet_rows = await asyncio.gather(
+        _scalars(profile_stmt),
+        candidates,
+        _rows(unlocked_ids_statement(user_id, UnlockTarget.job)),
+        _rows(unlock_counts_statement(
+            UnlockTarget.job, _candidate_ids(candidates_stmt, candidate_id)
+        )) if relevance else _nothing(),
+        _scalars(_skills_catalog_statement()) if with_skills else _nothing(),
+        _facet_rows(facet_statements),
+    )
+    if cards:
+        jobs = [JobCard(row) for row in jobs]
+
+    consultant_profile = profiles[0] if profiles else None
+    consultant_lat, consultant_lon, _ = consultant_location(consultant_profile)
+
+    jobs = filter_jobs_by_distance(jobs, filters, consultant_lat, consultant_lon)
+    facet_counts = None
+    if facets:
+        within = None
+        if not grouped:
+            within = within_distance(job_distance_limit(filters), consultant_lat, consultant_lon)
+            within = within or (lambda lat, lon: True)
+        facet_counts = count_facets(jobs, JOB_FACETS)
+        for facet, rows in facet_rows.items():
+            facet_counts[facet] = disjunctive_counts(facet, rows, within)
+
+    return {
+        "jobs": rank_jobs(
+            jobs,
+            filters,
+            consultant_profile,
+            {row[0] for row in unlocked_rows},
+            dict(count_rows),
+        ),
+        "consultant_profile": consultant_profile,
+        "skills": skills,
+        "facets": facet_counts,
+    }
+
+
+async def search_consultants_async(user_id, filters, projection=False, with_skills=False, facets=False):
+    """
+    Async variant van matching.search_consultants.
+
+    Fase 1 (gelijktijdig): company, actieve jobs, unlock-set, skills catalogus.
+    Fase 2 (gelijktijdig): kandidaten + unlock counts, want die hangen af van
+    de gekozen job (land en afstand).
+    """
+    relevance = filters["sort_by"] == "relevance"
+    max_distance_km = filters["max_distance_km"]
+
+    company_id_subquery = (
+        select(Company.id).where(Company.user_id == user_id).limit(1).scalar_subquery()
+    )
+
+    companies, company_jobs, unlocked_rows, skills = await asyncio.gather(
+        _scalars(select(Company).where(Company.user_id == user_id).limit(1)),
+        _scalars(company_jobs_statement(company_id_subquery)),
+        _rows(unlocked_ids_statement(user_id, UnlockTarget.consultant)),
+        _scalars(_skills_catalog_statement()) if with_skills else _nothing(),
+    )
+
+    company_profile = companies[0] if companies else None
+    if not company_profile:
+        company_jobs = []
+
+    required_job, selected_job_id = pick_required_job(company_jobs, filters["job_id"])
+
+    result = {
+        "consultants": [],
+        "company_jobs": company_jobs,
+        "required_job": required_job,
+        "selected_job_id": selected_job_id,
+        "skills": skills,
+        "facets": None,
+    }
+
+    origin_lat = origin_lon = None
+    if max_distance_km is not None and required_job:
+        origin_lat = required_job.latitude
+        origin_lon = required_job.longitude
+
+        # ✅ STRICT: afstandsfilter zonder job-coördinaten → geen consultants
+        if origin_lat is None or origin_lon is None:
+            return result
+
+    company_country = consultant_country_reference(company_profile, required_job)
+    cards = use_cards(filters)
+    if cards:
+        candidates_stmt = consultant_cards_statement(filters, company_country)
+        candidates = _rows(candidates_stmt)
+        candidate_id = consultant_cards.c.id
+    else:
+        candidates_stmt = consultant_candidates_statement(filters, company_country, projection)
+        candidates = _scalars(candidates_stmt, unique=True)
+        candidate_id = ConsultantProfile.id
+
+    within = within_distance(max_distance_km, origin_lat, origin_lon)
+    facet_statements = (
+        consultant_facet_statements(filters, company_country, within is None, cards) if facets else {}
+    )
+
+    consultants, count_rows, facet_rows = await asyncio.gather(
+        candidates,
+        _rows(unlock_counts_statement(
+            UnlockTarget.consultant, _candidate_ids(candidates_stmt, candidate_id)
+        )) if relevance else _nothing(),
+        _facet_rows(facet_statements),
+    )
+    if cards:
+        consultants = [ConsultantCard(row) for row in consultants]
+
+    consultants = filter_consultants_by_distance(
+        consultants, max_distance_km, origin_lat, origin_lon
+    )
+    if facets:
+        result["facets"] = count_facets(consultants, CONSULTANT_FACETS)
+        for facet, rows in facet_rows.items():
+            result["facets"][facet] = disjunctive_counts(facet, rows, within)
+
+    result["consultants"] = rank_consultants(
+        consultants,
+        filters,
+        required_job,
+        {row[0] for row in unlocked_rows},
+        dict(count_rows),
+    )
+    return result
+
+
+def search_jobs_concurrently(user, filters, projection=False, with_skills=False, facets=False):
+    """Sync ingang voor de views: zelfde resultaat als matching.search_jobs (+ 'skills')."""
+    return run_async(search_jobs_async(user.id, filters, projection, with_skills, facets))
+
+
+def search_consultants_concurrently(user, filters, projection=False, with_skills=False, facets=False):
+    """Sync ingang voor de views: zelfde resultaat als matching.search_consultants (+ 'skills')."""
+    return run_async(search_consultants_async(user.id, filters, projection, with_skills, facets))
@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+
+# ------------------ IN-PROCESS CACHE ------------------
+# Kleine TTL + LRU cache per worker-process (bv. dashboard-samenvattingen).
+# Waarden moeten losstaan van een DB-sessie (dicts/tuples, geen ORM-objecten).
+
+
+class TTLCache:
+    """
+    Thread-safe cache met een vaste TTL en een maximum aantal keys (LRU).
+    """
+
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_matching(self, predicate):
+        """Verwijder alle keys waarvoor predicate(key) True is. Retourneert het aantal."""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
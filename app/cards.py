@@ -0,0 +1,432 @@
+import os
+from types import SimpleNamespace
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import Boolean, Column, Float, Integer, MetaData, String, Table, TIMESTAMP, func, or_, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from .supabase_client import engine
+from .models import Company, ConsultantProfile
+
+# ------------------ LISTING CARDS ------------------
+# Gedenormaliseerde leesmodellen voor /jobs, /consultants en de zoek-API:
+# tabellen consultant_cards en job_cards met alle velden van een kaart +
+# skill ids/namen als arrays. Een lijstpagina is zo één query op één tabel,
+# zonder join naar users/companies, selectinload van skills of één
+# EXISTS-subquery per gekozen skill:
+#
+#     WHERE skill_ids @> ARRAY[3, 7]      -- GIN index op skill_ids
+#
+# - Enkel Postgres; aanmaken met `flask cards create`. Zolang de tabellen niet
+#   bestaan (of op SQLite) zoekt matching.py zoals voorheen via de ORM.
+# - Enkel beschikbare profielen en actieve jobs (de lijsten tonen niets anders).
+# - Bijgehouden door triggers op de brontabellen (profielen, users, jobs,
+#   companies, skills en de koppeltabellen): elke gewijzigde rij ververst
+#   enkel de kaarten die ze toont (refresh_consultant_cards/refresh_job_cards,
+#   UPSERT + DELETE op id), in dezelfde transactie als de wijziging. Geen
+#   vertraging, geen volledige refresh per commit, ongeacht welk process of
+#   welke tool schrijft. `flask cards refresh` bouwt alles opnieuw op (drift).
+# - Tekst-zoeken op jobs heeft de description nodig en blijft via de ORM lopen.
+
+LISTING_CARDS = os.getenv("LISTING_CARDS", "1") == "1"
+
+# Eigen MetaData: de card tabellen horen niet bij create_all (triggers, enkel Postgres).
+card_metadata = MetaData()
+
+consultant_cards = Table(
+    "consultant_cards",
+    card_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer),
+    Column("username", String),
+    Column("display_name_masked", String),
+    Column("headline", String),
+    Column("location_city", String),
+    Column("country", String),
+    Column("availability", Boolean),
+    Column("years_experience", Integer),
+    Column("created_at", TIMESTAMP),
+    Column("latitude", Float),
+    Column("longitude", Float),
+    Column("skill_ids", ARRAY(Integer)),
+    Column("skill_names", ARRAY(String)),
+)
+
+job_cards = Table(
+    "job_cards",
+    card_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("company_id", Integer),
+    Column("company_name_masked", String),
+    Column("company_country", String),
+    Column("title", String),
+    Column("location_city", String),
+    Column("country", String),
+    Column("contract_type", String),
+    Column("is_active", Boolean),
+    Column("created_at", TIMESTAMP),
+    Column("latitude", Float),
+    Column("longitude", Float),
+    Column("hired_consultant_id", Integer),
+    Column("hired_consultant_name", String),
+    Column("skill_ids", ARRAY(Integer)),
+    Column("skill_names", ARRAY(String)),
+)
+
+# Kolommen in dezelfde volgorde als de Table-definities hierboven.
+CARD_SELECT = {
+    "consultant_cards": """
+        SELECT p.id, p.user_id, u.username, p.display_name_masked, p.headline,
+               p.location_city, p.country, p.availability, p.years_experience,
+               p.created_at, p.latitude, p.longitude,
+               COALESCE(s.skill_ids, '{}') AS skill_ids,
+               COALESCE(s.skill_names, '{}') AS skill_names
+        FROM consultant_profiles p
+        JOIN users u ON u.id = p.user_id
+        LEFT JOIN LATERAL (
+            SELECT array_agg(sk.id ORDER BY sk.name) AS skill_ids,
+                   array_agg(sk.name ORDER BY sk.name)::varchar[] AS skill_names
+            FROM profile_skills ps JOIN skills sk ON sk.id = ps.skill_id
+            WHERE ps.profile_id = p.id
+        ) s ON true
+        WHERE p.availability""",
+    "job_cards": """
+        SELECT j.id, j.company_id, c.company_name_masked, c.country AS company_country,
+               j.title, j.location_city, j.country, j.contract_type, j.is_active,
+               j.created_at, j.latitude, j.longitude,
+               j.hired_consultant_id, h.display_name_masked AS hired_consultant_name,
+               COALESCE(s.skill_ids, '{}') AS skill_ids,
+               COALESCE(s.skill_names, '{}') AS skill_names
+        FROM job_posts j
+        JOIN companies c ON c.id = j.company_id
+        LEFT JOIN consultant_profiles h ON h.id = j.hired_consultant_id
+        LEFT JOIN LATERAL (
+            SELECT array_agg(sk.id ORDER BY sk.name) AS skill_ids,
+                   array_agg(sk.name ORDER BY sk.name)::varchar[] AS skill_names
+            FROM job_skills js JOIN skills sk ON sk.id = js.skill_id
+            WHERE js.job_id = j.id
+        ) s ON true
+        WHERE j.is_active""",
+}
+
+# card tabel -> (brontabel, alias in CARD_SELECT, voorwaarde om getoond te worden)
+CARD_SOURCES = {
+    "consultant_cards": ("consultant_profiles", "p", "availability"),
+    "job_cards": ("job_posts", "j", "is_active"),
+}
+CARD_TABLES = {"consultant_cards": consultant_cards, "job_cards": job_cards}
+
+INDEX_DDL = [
+    # unique index: vereist voor ON CONFLICT (id) in refresh_*
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_consultant_cards_id ON consultant_cards (id)",
+    "CREATE INDEX IF NOT EXISTS idx_consultant_cards_skill_ids ON consultant_cards USING gin (skill_ids)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_job_cards_id ON job_cards (id)",
+    "CREATE INDEX IF NOT EXISTS idx_job_cards_skill_ids ON job_cards USING gin (skill_ids)",
+]
+
+
+def _columns(name):
+    return [column.name for column in CARD_TABLES[name].columns]
+
+
+def _refresh_function_ddl(name):
+    """
+    refresh_<name>(ids): kaarten van die bron-ids opnieuw opbouwen. UPSERT (ook
+    veilig als twee transacties dezelfde kaart verversen) + DELETE van ids die
+    niet (meer) getoond worden.
+    """
+    source, alias, condition = CARD_SOURCES[name]
+    columns = _columns(name)
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column != "id")
+    return f"""
+        CREATE OR REPLACE FUNCTION refresh_{name}(ids integer[]) RETURNS void AS $$
+        BEGIN
+            INSERT INTO {name} ({", ".join(columns)})
+            {CARD_SELECT[name]} AND {alias}.id = ANY(ids)
+            ON CONFLICT (id) DO UPDATE SET {updates};
+
+            DELETE FROM {name} card
+            WHERE card.id = ANY(ids)
+              AND NOT EXISTS (
+                  SELECT 1 FROM {source} src WHERE src.id = card.id AND src.{condition}
+              );
+        END
+        $$ LANGUAGE plpgsql
+    """
+
+
+# brontabel -> (trigger events, body van de trigger functie)
+TRIGGERS = {
+    "consultant_profiles": ("INSERT OR UPDATE OR DELETE", """
+        IF TG_OP = 'DELETE' THEN
+            PERFORM refresh_consultant_cards(ARRAY[OLD.id]);
+            RETURN NULL;
+        END IF;
+        PERFORM refresh_consultant_cards(ARRAY[NEW.id]);
+        IF TG_OP = 'UPDATE' THEN
+            IF NEW.display_name_masked IS DISTINCT FROM OLD.display_name_masked THEN
+                -- job_cards.hired_consultant_name
+                PERFORM refresh_job_cards(ARRAY(
+                    SELECT id FROM job_posts WHERE hired_consultant_id = NEW.id
+                ));
+            END IF;
+        END IF;
+        RETURN NULL;
+    """),
+    "users": ("UPDATE OF username", """
+        PERFORM refresh_consultant_cards(ARRAY(
+            SELECT id FROM consultant_profiles WHERE user_id = NEW.id
+        ));
+        RETURN NULL;
+    """),
+    "profile_skills": ("INSERT OR UPDATE OR DELETE", """
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM refresh_consultant_cards(ARRAY[OLD.profile_id]);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM refresh_consultant_cards(ARRAY[NEW.profile_id]);
+        END IF;
+        RETURN NULL;
+    """),
+    "job_posts": ("INSERT OR UPDATE OR DELETE", """
+        IF TG_OP = 'DELETE' THEN
+            PERFORM refresh_job_cards(ARRAY[OLD.id]);
+        ELSE
+            PERFORM refresh_job_cards(ARRAY[NEW.id]);
+        END IF;
+        RETURN NULL;
+    """),
+    "job_skills": ("INSERT OR UPDATE OR DELETE", """
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM refresh_job_cards(ARRAY[OLD.job_id]);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM refresh_job_cards(ARRAY[NEW.job_id]);
+        END IF;
+        RETURN NULL;
+    """),
+    "companies": ("UPDATE OF company_name_masked, country", """
+        PERFORM refresh_job_cards(ARRAY(SELECT id FROM job_posts WHERE company_id = NEW.id));
+        RETURN NULL;
+    """),
+    # hernoemde skill: skill_names van elke kaart met die skill
+    "skills": ("UPDATE OF name", """
+        PERFORM refresh_consultant_cards(ARRAY(
+            SELECT profile_id FROM profile_skills WHERE skill_id = NEW.id
+        ));
+        PERFORM refresh_job_cards(ARRAY(SELECT job_id FROM job_skills WHERE skill_id = NEW.id));
+        RETURN NULL;
+    """),
+}
+
+
+def _trigger_ddl(table):
+    events, body = TRIGGERS[table]
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION cards_{table}() RETURNS trigger AS $$
+        BEGIN
+            {body.strip()}
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS cards_{table} ON {table}",
+        f"""
+        CREATE TRIGGER cards_{table} AFTER {events} ON {table}
+        FOR EACH ROW EXECUTE FUNCTION cards_{table}()
+        """,
+    ]
+
+
+_state = {"pid": None, "available": None}
+
+
+# ------------------ CARD OBJECTS ------------------
+# Zelfde attributen als ConsultantProfile/JobPost voor alles wat een kaart
+# gebruikt (templates, filters, facets, scoring, API), maar zonder ORM-state:
+# is_unlocked_for_me, score, ... worden er gewoon op gezet.
+
+def _skills(row):
+    return [SimpleNamespace(id=i, name=n) for i, n in zip(row.skill_ids, row.skill_names)]
+
+
+class ConsultantCard:
+    initials = ConsultantProfile.initials
+
+    def __init__(self, row):
+        self.__dict__.update(row._mapping)
+        self.skills = _skills(row)
+        self.user = SimpleNamespace(id=row.user_id, username=row.username)
+
+
+class CompanyCard(SimpleNamespace):
+    initials = Company.initials
+
+
+class JobCard:
+    def __init__(self, row):
+        self.__dict__.update(row._mapping)
+        self.skills = _skills(row)
+        self.company = CompanyCard(
+            id=row.company_id,
+            company_name_masked=row.company_name_masked,
+            country=row.company_country,
+        )
+        self.hired_consultant = (
+            SimpleNamespace(id=row.hired_consultant_id, display_name_masked=row.hired_consultant_name)
+            if row.hired_consultant_id
+            else None
+        )
+
+
+# ------------------ STATEMENTS ------------------
+
+def cards_available():
+    """
+    True als de card tabellen gebruikt kunnen worden: Postgres, LISTING_CARDS
+    aan en tabellen aangemaakt (één keer per worker-process opgezocht, dus
+    workers herstarten na `flask cards create/drop`).
+    """
+    if not LISTING_CARDS or engine.dialect.name != "postgresql":
+        return False
+    if _state["pid"] != os.getpid():
+        with engine.connect() as conn:
+            found = conn.execute(
+                text("SELECT count(*) FROM pg_tables WHERE tablename IN ('consultant_cards', 'job_cards')")
+            ).scalar()
+        _state["available"] = found == len(CARD_SELECT)
+        _state["pid"] = os.getpid()
+    return _state["available"]
+
+
+def consultant_cards_statement(filters, company_country, without=()):
+    """Zelfde filters als matching.consultant_candidates_statement, op consultant_cards."""
+    cards = consultant_cards.c
+    stmt = select(consultant_cards)
+
+    if filters["min_experience"] is not None:
+        stmt = stmt.where(cards.years_experience >= filters["min_experience"])
+
+    if filters["same_country_only"] and company_country:
+        stmt = stmt.where(func.lower(cards.country) == company_country)
+
+    if filters["sort_by"] != "relevance":
+        if filters["city"] and "city" not in without:
+            stmt = stmt.where(cards.location_city.ilike(f"%{filters['city']}%"))
+        if filters["country"] and "country" not in without:
+            stmt = stmt.where(cards.country.ilike(f"%{filters['country']}%"))
+        if filters["skills"]:
+            stmt = stmt.where(cards.skill_ids.contains(filters["skills"]))
+
+    return stmt
+
+
+def job_cards_statement(filters, consultant_country, without=()):
+    """Zelfde filters als matching.job_candidates_statement, op job_cards."""
+    cards = job_cards.c
+    stmt = select(job_cards)
+
+    if filters["contract_type"] and "contract_type" not in without:
+        stmt = stmt.where(cards.contract_type == filters["contract_type"])
+
+    if filters["same_country_only"] and consultant_country is not None:
+        job_country = func.lower(func.coalesce(cards.country, cards.company_country))
+        if isinstance(consultant_country, str):
+            stmt = stmt.where(job_country == consultant_country)
+        else:
+            stmt = stmt.where(or_(consultant_country.is_(None), job_country == consultant_country))
+
+    if filters["sort_by"] != "relevance":
+        if filters["city"] and "city" not in without:
+            stmt = stmt.where(cards.location_city.ilike(f"%{filters['city']}%"))
+        if filters["country"] and "country" not in without:
+            stmt = stmt.where(cards.country.ilike(f"%{filters['country']}%"))
+        if filters["skills"]:
+            stmt = stmt.where(cards.skill_ids.contains(filters["skills"]))
+
+    return stmt
+
+
+# ------------------ AANMAKEN / HEROPBOUWEN ------------------
+
+def _rebuild(conn):
+    """Alle kaarten opnieuw opbouwen; lezers zien tot de commit de oude rijen."""
+    for name, select_sql in CARD_SELECT.items():
+        conn.execute(text(f"DELETE FROM {name}"))
+        conn.execute(text(f"INSERT INTO {name} ({', '.join(_columns(name))}) {select_sql}"))
+
+
+def create_cards():
+    """
+    Tabellen, indexen, functies en triggers aanmaken en vullen (idempotent),
+    in één transactie: CREATE TRIGGER blokkeert schrijvers op de brontabellen
+    tot de commit, dus er gaat geen wijziging verloren tussen vullen en triggers.
+    """
+    with engine.begin() as conn:
+        # vroegere versie: materialized views met dezelfde namen
+        matviews = conn.execute(
+            text("SELECT matviewname FROM pg_matviews WHERE matviewname IN ('consultant_cards', 'job_cards')")
+        ).scalars().all()
+        for view in matviews:
+            conn.execute(text(f"DROP MATERIALIZED VIEW {view}"))
+
+        for name, select_sql in CARD_SELECT.items():
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} AS {select_sql} WITH NO DATA"))
+        for ddl in INDEX_DDL:
+            conn.execute(text(ddl))
+        for name in CARD_SELECT:
+            conn.execute(text(_refresh_function_ddl(name)))
+        for table in TRIGGERS:
+            for ddl in _trigger_ddl(table):
+                conn.execute(text(ddl))
+        _rebuild(conn)
+    _state["pid"] = None
+
+
+def rebuild_cards():
+    with engine.begin() as conn:
+        _rebuild(conn)
+
+
+def drop_cards():
+    with engine.begin() as conn:
+        for table in TRIGGERS:
+            conn.execute(text(f"DROP FUNCTION IF EXISTS cards_{table}() CASCADE"))  # + trigger
+        for name in CARD_SELECT:
+            conn.execute(text(f"DROP FUNCTION IF EXISTS refresh_{name}(integer[])"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    _state["pid"] = None
+
+
+# ------------------ CLI ------------------
+cards_cli = AppGroup("cards", help="Card tabellen voor de job- en consultantlijsten.")
+
+
+def _require_postgresql():
+    if engine.dialect.name != "postgresql":
+        raise click.ClickException("Listing cards require PostgreSQL.")
+
+
+@cards_cli.command("create")
+def create_cards_command():
+    """Tabellen, indexen en triggers aanmaken en vullen (idempotent)."""
+    _require_postgresql()
+    create_cards()
+    click.echo("Created consultant_cards and job_cards.")
+
+
+@cards_cli.command("refresh")
+def refresh_cards_command():
+    """Beide tabellen volledig opnieuw opbouwen (herstelt drift)."""
+    _require_postgresql()
+    rebuild_cards()
+    click.echo("Rebuilt consultant_cards and job_cards.")
+
+
+@cards_cli.command("drop")
+def drop_cards_command():
+    """Tabellen en triggers verwijderen; na een herstart van de workers zoeken de lijsten weer via de ORM."""
+    _require_postgresql()
+    drop_cards()
+    click.echo("Dropped consultant_cards and job_cards.")
@@ -0,0 +1,161 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import exists, insert, literal, select, update
+
+from .invalidation import publish
+from .models import (
+    Collaboration,
+    CollaborationStatus,
+    Company,
+    ConsultantProfile,
+    JobPost,
+    Unlock,
+    UnlockTarget,
+)
+
+# ------------------ COLLABORATION TRANSITIES ------------------
+# Start en einde van een samenwerking als set-based statements in één transactie.
+#
+# - De consultant wordt geclaimd met een conditionele
+#       UPDATE consultant_profiles SET availability = false ...
+#       WHERE id = :id AND availability = true RETURNING id
+#   Bij twee gelijktijdige aanvragen wacht de tweede op de row lock van de
+#   eerste en vindt daarna geen beschikbare rij meer → CollaborationConflict.
+# - De job wordt op dezelfde manier gesloten (WHERE is_active = true), zodat
+#   één job nooit twee keer ingevuld wordt.
+# - De automatische unlock is een INSERT … SELECT … WHERE NOT EXISTS
+#   (geen aparte lookup van company-user of bestaande unlock).
+# - Beëindigen is één UPDATE over alle actieve collaborations van de consultant.
+
+CONSULTANT_UNAVAILABLE = "consultant_unavailable"
+JOB_UNAVAILABLE = "job_unavailable"
+
+
+class CollaborationConflict(Exception):
+    """De consultant of job werd intussen door iemand anders geclaimd."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _claim_consultant(db, consultant_id, company_id):
+    return db.execute(
+        update(ConsultantProfile)
+        .where(
+            ConsultantProfile.id == consultant_id,
+            ConsultantProfile.availability == True,
+        )
+        .values(availability=False, current_company_id=company_id)
+        .returning(ConsultantProfile.id)
+    ).scalar_one_or_none()
+
+
+def _close_job(db, job_id, company_id, consultant_id):
+    return db.execute(
+        update(JobPost)
+        .where(
+            JobPost.id == job_id,
+            JobPost.company_id == company_id,
+            JobPost.is_active == True,
+        )
+        .values(is_active=False, hired_consultant_id=consultant_id)
+        .returning(JobPost.id)
+    ).scalar_one_or_none()
+
+
+def _auto_unlock_statement(company_id, consultant_id):
+    """Company-user krijgt een unlock op de consultant, tenzij die al bestaat."""
+    already_unlocked = exists().where(
+        Unlock.user_id == Company.user_id,
+        Unlock.target_type == UnlockTarget.consultant,
+        Unlock.target_id == consultant_id,
+    )
+    source = select(
+        Company.user_id,
+        literal(UnlockTarget.consultant, Unlock.target_type.type),
+        literal(consultant_id),
+    ).where(
+        Company.id == company_id,
+        Company.user_id.is_not(None),
+        ~already_unlocked,
+    )
+    return insert(Unlock).from_select(["user_id", "target_type", "target_id"], source)
+
+
+def start_collaboration(db, company_id, consultant_id, job_id=None, auto_unlock=False):
+    """
+    Start een samenwerking en commit.
+
+    In één transactie:
+        - consultant unavailable + current_company (enkel als die nog beschikbaar was)
+        - optioneel de job sluiten (enkel als die nog actief is en van de company is)
+        - Collaboration aanmaken
+        - optioneel automatische unlock voor de company
+
+    Retourneert de id van de nieuwe collaboration.
+    Raises CollaborationConflict (na rollback) als consultant of job niet meer vrij is.
+    """
+    try:
+        if _claim_consultant(db, consultant_id, company_id) is None:
+            raise CollaborationConflict(CONSULTANT_UNAVAILABLE)
+
+        if job_id is not None and _close_job(db, job_id, company_id, consultant_id) is None:
+            raise CollaborationConflict(JOB_UNAVAILABLE)
+
+        collaboration_id = db.execute(
+            insert(Collaboration)
+            .values(
+                company_id=company_id,
+                consultant_id=consultant_id,
+                job_post_id=job_id,
+                status=CollaborationStatus.active,
+            )
+            .returning(Collaboration.id)
+        ).scalar_one()
+
+        if auto_unlock:
+            db.execute(_auto_unlock_statement(company_id, consultant_id))
+
+        # bulk statements lopen niet via de ORM flush
+        publish(db, "consultant_profile", consultant_id)
+        publish(db, "company", company_id)
+        if job_id is not None:
+            publish(db, "job_post", job_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return collaboration_id
+
+
+def end_collaborations(db, consultant_id, now=None):
+    """
+    Beëindig alle actieve collaborations van een consultant en zet de consultant
+    weer op beschikbaar (current_company losgekoppeld). Commit niet: hoort bij
+    de transactie van de aanroeper.
+
+    Retourneert de company ids van de beëindigde collaborations.
+    """
+    now = now or datetime.now(timezone.utc)
+    company_ids = db.execute(
+        update(Collaboration)
+        .where(
+            Collaboration.consultant_id == consultant_id,
+            Collaboration.status == CollaborationStatus.active,
+        )
+        .values(status=CollaborationStatus.ended, ended_at=now)
+        .returning(Collaboration.company_id)
+    ).scalars().all()
+
+    db.execute(
+        update(ConsultantProfile)
+        .where(ConsultantProfile.id == consultant_id)
+        .values(availability=True, current_company_id=None)
+    )
+
+    publish(db, "consultant_profile", consultant_id)
+    for company_id in company_ids:
+        publish(db, "company", company_id)
+    return company_ids
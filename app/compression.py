@@ -0,0 +1,140 @@
+import gzip
+import json
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # zonder brotli enkel gzip
+    brotli = None
+
+# ------------------ RESPONSE COMPRESSION ------------------
+# HTML (job_list, consultant_list: één kaart per job/consultant, sterk
+# repetitief) en JSON worden gecomprimeerd volgens Accept-Encoding:
+#
+# - brotli als de client het aanvaardt (en het geïnstalleerd is), anders gzip,
+# - enkel vanaf COMPRESSION_MIN_SIZE bytes (kleine responses worden groter/trager),
+# - niveau per content type (COMPRESSION_LEVELS, overschrijfbaar via env als JSON),
+# - streaming responses (exports) worden per chunk gecomprimeerd en geflusht,
+#   zodat de client de data blijft binnenkrijgen terwijl de export loopt.
+#
+# Responses die al een Content-Encoding hebben (voorgecomprimeerde static
+# assets) of bestanden via send_file (direct_passthrough) blijven ongemoeid.
+# Zie benchmarks/bench_compression.py voor bytes-on-wire en CPU-kost.
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes
+
+# content type -> {"br": quality 0-11, "gzip": level 1-9}
+COMPRESSION_LEVELS = {
+    "text/html": {"br": 5, "gzip": 6},
+    "application/json": {"br": 5, "gzip": 6},
+    "text/css": {"br": 5, "gzip": 6},
+    "application/javascript": {"br": 5, "gzip": 6},
+    "image/svg+xml": {"br": 5, "gzip": 6},
+    "text/plain": {"br": 4, "gzip": 6},
+    # streaming exports: lage niveaus, CPU per chunk telt zwaarder
+    "text/csv": {"br": 3, "gzip": 4},
+    "application/x-ndjson": {"br": 3, "gzip": 4},
+}
+COMPRESSION_LEVELS.update(json.loads(os.getenv("COMPRESSION_LEVELS", "{}")))
+
+
+def choose_encoding(accept_encodings):
+    """"br", "gzip" of None volgens de q-waarden van Accept-Encoding."""
+    br = accept_encodings.quality("br") if brotli is not None else 0
+    gz = accept_encodings.quality("gzip")
+    if br > 0 and br >= gz:
+        return "br"
+    if gz > 0:
+        return "gzip"
+    return None
+
+
+def compress_body(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _compressor(encoding, level):
+    """(compress(chunk), flush(), finish()) voor streaming."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip header
+    return (
+        compressor.compress,
+        lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def compress_stream(chunks, encoding, level, charset="utf-8"):
+    """Gecomprimeerde chunks; na elke bron-chunk geflusht (geen buffering tot het einde)."""
+    compress, flush, finish = _compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(charset)
+            if not chunk:
+                continue
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _levels(mimetype):
+    return COMPRESSION_LEVELS.get(mimetype)
+
+
+def compress_response(response):
+    """after_request: comprimeer de response als dat zinvol is en de client het aanvaardt."""
+    levels = _levels(response.mimetype)
+    if (
+        levels is None
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None or request.method == "HEAD":
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(
+            response.response,
+            encoding,
+            levels[encoding],
+            response.mimetype_params.get("charset", "utf-8"),
+        )
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESSION_MIN_SIZE:
+            return response
+        response.set_data(compress_body(data, encoding, levels[encoding]))
+
+    response.headers["Content-Encoding"] = encoding
+    # representatie verschilt per encoding: sterke ETag afzwakken
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    if not COMPRESSION_ENABLED:
+        return
+    app.after_request(compress_response)
@@ -1,3 +1,9 @@
+import os
+
+
 class Config:
-    UPLOAD_FOLDER = "app/static/profile_pics"
+    # lokale opslag (STORAGE_BACKEND=local); buiten static/, uploads gaan via /uploads/
+    UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "instance/uploads")
     ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
+    CV_ALLOWED_EXTENSIONS = {"pdf", "doc", "docx"}
+    MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
@@ -0,0 +1,224 @@
+import os
+
+from flask import request, session
+from sqlalchemy import func, select
+
+from .cache import TTLCache
+from .invalidation import subscribe
+from .models import (
+    Collaboration,
+    CollaborationStatus,
+    Company,
+    ConsultantProfile,
+    ProfileSkill,
+    Skill,
+)
+
+# ------------------ DASHBOARD ------------------
+# Per rol één query die exact de getoonde velden teruggeeft, incl. wat
+# nodig is voor de profiel-volledigheid (geen lazy loads, geen ORM-objecten).
+# Het resultaat (plain dicts) wordt gecachet per user en vervalt meteen na
+# een eigen schrijfactie (POST/PUT/PATCH/DELETE) van die user, of na een
+# wijziging van het profiel/de company of een collaboration ervan, ook vanuit
+# een ander worker-process (invalidation bus).
+
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "300"))  # seconden
+
+dashboard_cache = TTLCache(ttl=DASHBOARD_CACHE_TTL, maxsize=4096)
+# ("consultant_profile" | "company", id) -> user_id van het gecachete dashboard
+dashboard_subjects = TTLCache(ttl=DASHBOARD_CACHE_TTL, maxsize=4096)
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def consultant_dashboard_statement(user_id):
+    """
+    Profiel + skill-namen (string_agg / group_concat) + actieve
+    collaborations (één rij per collaboration, nieuwste eerst).
+    """
+    skill_names = (
+        select(func.aggregate_strings(Skill.name, ", "))
+        .join(ProfileSkill, ProfileSkill.skill_id == Skill.id)
+        .where(ProfileSkill.profile_id == ConsultantProfile.id)
+        .correlate(ConsultantProfile)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            ConsultantProfile.id.label("profile_id"),
+            ConsultantProfile.display_name_masked,
+            ConsultantProfile.headline,
+            ConsultantProfile.location_city,
+            ConsultantProfile.country,
+            ConsultantProfile.years_experience,
+            ConsultantProfile.profile_image,
+            ConsultantProfile.cv_document,
+            ConsultantProfile.contact_email,
+            ConsultantProfile.phone_number,
+            ConsultantProfile.availability,
+            skill_names.label("skill_names"),
+            Company.company_name_masked.label("company_name"),
+        )
+        .outerjoin(
+            Collaboration,
+            (Collaboration.consultant_id == ConsultantProfile.id)
+            & (Collaboration.status == CollaborationStatus.active),
+        )
+        .outerjoin(Company, Company.id == Collaboration.company_id)
+        .where(ConsultantProfile.user_id == user_id)
+        .order_by(Collaboration.started_at.desc())
+    )
+
+
+def company_dashboard_statement(user_id):
+    """
+    Company + actieve collaborations (één rij per collaboration).
+    Collaboration.company_id is altijd de company van de job, dus één
+    geïndexeerde gelijkheid volstaat (geen OR over job_post).
+    """
+    return (
+        select(
+            Company.id.label("company_id"),
+            Company.company_name_masked,
+            Company.industries,
+            Company.location_city,
+            Company.country,
+            Company.contact_email,
+            Company.phone_number,
+            ConsultantProfile.id.label("consultant_id"),
+            ConsultantProfile.display_name_masked.label("consultant_name"),
+        )
+        .outerjoin(
+            Collaboration,
+            (Collaboration.company_id == Company.id)
+            & (Collaboration.status == CollaborationStatus.active),
+        )
+        .outerjoin(ConsultantProfile, ConsultantProfile.id == Collaboration.consultant_id)
+        .where(Company.user_id == user_id)
+        .order_by(Collaboration.started_at.desc())
+    )
+
+
+def _blank(value):
+    return not value or not value.strip()
+
+
+def profile_completion(role, profile):
+    """
+    Ontbrekende velden voor de volledigheidsmelding.
+    Retourneert (missing_fields, edit_target) of None als het profiel volledig is.
+    """
+    missing_fields = []
+    edit_target = "profile"
+
+    if role == "consultant":
+        # 1. Essentiële Matching Velden
+        if _blank(profile["headline"]):
+            missing_fields.append("Headline")
+        if profile["years_experience"] is None:
+            missing_fields.append("Years of experience")
+        if _blank(profile["location_city"]):
+            missing_fields.append("City")
+        if _blank(profile["country"]):
+            missing_fields.append("Country")
+
+        # 2. Skills
+        if not profile["skill_names"]:
+            missing_fields.append("Skills")
+            edit_target = "skills"
+
+        # 3. Profielkwaliteit
+        if not profile["profile_image"]:
+            missing_fields.append("Profile Picture")
+        if not profile["cv_document"]:
+            missing_fields.append("CV Document")
+
+        # 4. Volledige naam
+        if _blank(profile["display_name_masked"]):
+            missing_fields.append("Full Name")
+    else:
+        if _blank(profile["company_name_masked"]):
+            missing_fields.append("Company Name")
+        if _blank(profile["location_city"]):
+            missing_fields.append("City")
+        if _blank(profile["country"]):
+            missing_fields.append("Country")
+
+    if not missing_fields:
+        return None
+    return missing_fields, edit_target
+
+
+def load_dashboard(db, user_id, role):
+    """
+    Dashboard-samenvatting voor een consultant of company (uit cache indien mogelijk).
+
+    Retourneert dict met:
+        - profile: dict met de getoonde velden (of None)
+        - collaborations: consultant → company-namen, company → [{id, name}]
+        - completion: zie profile_completion
+    """
+    key = ("dashboard", user_id)
+    summary = dashboard_cache.get(key)
+    if summary is not None:
+        return summary
+
+    summary = {"profile": None, "collaborations": [], "completion": None}
+
+    if role == "consultant":
+        rows = db.execute(consultant_dashboard_statement(user_id)).mappings().all()
+        if rows:
+            summary["profile"] = {k: v for k, v in rows[0].items() if k != "company_name"}
+            dashboard_subjects.set(("consultant_profile", rows[0]["profile_id"]), user_id)
+            summary["collaborations"] = [
+                row["company_name"] for row in rows if row["company_name"] is not None
+            ]
+    elif role == "company":
+        rows = db.execute(company_dashboard_statement(user_id)).mappings().all()
+        if rows:
+            summary["profile"] = {
+                k: v for k, v in rows[0].items() if k not in ("consultant_id", "consultant_name")
+            }
+            dashboard_subjects.set(("company", rows[0]["company_id"]), user_id)
+            summary["collaborations"] = [
+                {"id": row["consultant_id"], "name": row["consultant_name"]}
+                for row in rows
+                if row["consultant_id"] is not None
+            ]
+
+    if summary["profile"] is not None:
+        summary["completion"] = profile_completion(role, summary["profile"])
+
+    dashboard_cache.set(key, summary)
+    return summary
+
+
+def invalidate_dashboard(user_id):
+    dashboard_cache.delete(("dashboard", user_id))
+
+
+def reset_dashboards():
+    dashboard_cache.clear()
+    dashboard_subjects.clear()
+
+
+def _invalidate_subject(entity):
+    def evict(entity_id, version):
+        user_id = dashboard_subjects.get((entity, entity_id))
+        if user_id is not None:
+            invalidate_dashboard(user_id)
+    return evict
+
+
+subscribe("consultant_profile", _invalidate_subject("consultant_profile"), reset=reset_dashboards)
+subscribe("company", _invalidate_subject("company"), reset=reset_dashboards)
+
+
+def init_dashboard_cache(app):
+    """Eigen schrijfacties van een user maken zijn dashboard-cache meteen ongeldig."""
+
+    @app.after_request
+    def invalidate_own_dashboard(response):
+        if request.method in _WRITE_METHODS and session.get("user_id"):
+            invalidate_dashboard(session["user_id"])
+        return response
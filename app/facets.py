@@ -0,0 +1,138 @@
+from collections import Counter
+
+from sqlalchemy import func, select
+
+# ------------------ FACET COUNTS ------------------
+# Aantal resultaten per skill, contracttype, land en stad voor de huidige
+# filterstatus van /jobs en /consultants, zonder één query per facetwaarde.
+# Het resultaat zelf wordt volledig in SQL gefilterd (+ afstand in Python).
+#
+# - skills (AND-filter) en facets zonder actieve filter: telling binnen het
+#   huidige resultaat (count_facets, één pass over de resultaten die toch al
+#   in het geheugen zitten) = aantal resultaten na het aanvinken van die waarde.
+# - contract_type, country, city met een actieve filter: disjunctief. Per
+#   zo'n facet f één extra query: de kandidatenquery zonder de filter van f
+#   (facet_values_statement), zodat elke andere waarde toont wat je krijgt als
+#   je ze kiest. Zonder afstandsfilter is dat een GROUP BY op f; met
+#   afstandsfilter (Python) komen enkel (waarde, lat, lon) terug.
+# - Zonder kandidaten in het geheugen (recommendations) telt
+#   grouped_facet_counts alles met GROUP BY in SQL.
+
+JOB_FACETS = ("skills", "contract_type", "country", "city")
+CONSULTANT_FACETS = ("skills", "country", "city")
+
+FACET_ATTRIBUTES = {
+    "contract_type": "contract_type",
+    "country": "country",
+    "city": "location_city",
+}
+FACET_LIMIT = 12  # landen/steden in de sidebar
+
+
+def equals(expected):
+    return lambda value: value == expected
+
+
+def contains(needle):
+    """Zelfde betekenis als de ilike '%needle%' filter in SQL."""
+    needle = needle.lower()
+    return lambda value: value is not None and needle in value.lower()
+
+
+def count_facets(items, facets):
+    """
+    items: resultaten (alle filters toegepast).
+
+    Retourneert {"skills": {skill_id: n}, "contract_type": {waarde: n},
+    "country"/"city": [(waarde, n), ...] (meeste resultaten eerst)}.
+    """
+    counters = {facet: Counter() for facet in facets}
+
+    for item in items:
+        for facet in facets:
+            if facet == "skills":
+                counters[facet].update({skill.id for skill in item.skills})
+                continue
+            value = _clean(getattr(item, FACET_ATTRIBUTES[facet], None))
+            if value is not None:
+                counters[facet][value] += 1
+
+    return {facet: _format_counts(facet, counter) for facet, counter in counters.items()}
+
+
+def _format_counts(facet, counter):
+    if facet in ("skills", "contract_type"):
+        return dict(counter)
+    return sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))[:FACET_LIMIT]
+
+
+def facet_values_statement(candidates, source, facet, grouped):
+    """
+    Waarden van één disjunctieve facet. candidates: kandidatenquery met alle
+    filters behalve die van de facet zelf; source: model of tabelkolommen
+    (JobPost, job_cards.c, ...).
+
+    grouped=True: rijen (waarde, n) met GROUP BY in SQL; anders één rij
+    (waarde, lat, lon) per kandidaat, voor de afstandsfilter in Python.
+    """
+    column = getattr(source, FACET_ATTRIBUTES[facet])
+    if grouped:
+        value = func.trim(column)
+        return (
+            candidates.with_only_columns(value, func.count())
+            .options()
+            .where(value != "")
+            .group_by(value)
+        )
+    return candidates.with_only_columns(column, source.latitude, source.longitude).options()
+
+
+def disjunctive_counts(facet, rows, within=None):
+    """
+    Counts van één facet uit de rijen van facet_values_statement.
+    within(lat, lon): afstandsfilter (None → rijen zijn al gegroepeerd).
+    """
+    counter = Counter()
+    if within is None:
+        for value, count in rows:
+            value = _clean(value)
+            if value is not None:
+                counter[value] += count
+    else:
+        for value, lat, lon in rows:
+            value = _clean(value)
+            if value is not None and within(lat, lon):
+                counter[value] += 1
+    return _format_counts(facet, counter)
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+    return value or None
+
+
+def grouped_facet_counts(db, candidates, facets, skill_owner, skill_id):
+    """
+    Zelfde counts als count_facets zonder predicates, maar als GROUP BY in SQL
+    (geen kandidaten in het geheugen). Enkel bruikbaar zonder afstandsfilter.
+
+    candidates: subquery met id + de kolommen uit FACET_ATTRIBUTES.
+    skill_owner, skill_id: kolommen van de koppeltabel (bv. JobSkill.job_id,
+    JobSkill.skill_id).
+    """
+    counts = {}
+    for facet in facets:
+        if facet == "skills":
+            rows = db.execute(
+                select(skill_id, func.count(func.distinct(skill_owner)))
+                .where(skill_owner.in_(select(candidates.c.id)))
+                .group_by(skill_id)
+            ).all()
+            counts[facet] = dict(rows)
+            continue
+
+        value = func.trim(candidates.c[FACET_ATTRIBUTES[facet]])
+        rows = db.execute(select(value, func.count()).where(value != "").group_by(value)).all()
+        counts[facet] = disjunctive_counts(facet, rows)
+    return counts
@@ -0,0 +1,390 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import queue
+import select
+import socket
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from .supabase_client import DATABASE_URL, engine
+from .models import Collaboration, Company, ConsultantProfile, JobPost
+
+# ------------------ CACHE INVALIDATION BUS ------------------
+# In-process caches (dashboard, TF-IDF index, skill matrix, ...) blijven
+# coherent over alle gunicorn workers en nodes zonder korte TTLs.
+#
+# - Schrijvers: gewijzigde entiteiten worden per sessie verzameld (ORM flush
+#   + expliciete publish() voor bulk statements) als events
+#   (entity, id, version).
+# - Postgres: NOTIFY in dezelfde transactie (pg_notify vóór de commit), zodat
+#   enkel gecommitte wijzigingen verstuurd worden.
+#   SQLite (lokaal): datagrammen naar een UNIX socket per worker-process.
+# - Per worker-process: een listener thread (LISTEN / socket) met reconnect,
+#   een begrensde queue en een dispatcher thread die de cache keys van de
+#   geabonneerde caches verwijdert. Bij overflow of na een reconnect (events
+#   gemist) worden de caches volledig geleegd.
+# - Het eigen process verwerkt zijn events meteen na de commit; de echo via
+#   NOTIFY wordt herkend aan de version en overgeslagen.
+# - on_commit(hook): werk dat exact één keer per wijziging moet gebeuren
+#   (geen cache, bv. saved searches bijwerken) draait enkel in het schrijvende
+#   process, na de commit.
+
+INVALIDATION_BUS = os.getenv("INVALIDATION_BUS", "1") == "1"
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "cache_invalidation")
+INVALIDATION_QUEUE_SIZE = int(os.getenv("INVALIDATION_QUEUE_SIZE", "10000"))
+INVALIDATION_SOCKET_DIR = os.getenv("INVALIDATION_SOCKET_DIR") or os.path.join(
+    tempfile.gettempdir(),
+    "iconsult-invalidation-" + hashlib.sha1(DATABASE_URL.encode()).hexdigest()[:12],
+)
+
+RECONNECT_MAX_DELAY = 30  # seconden
+POLL_INTERVAL = 5  # seconden; ook de keepalive van de LISTEN-verbinding
+PAYLOAD_LIMIT = 7000  # NOTIFY payload moet onder 8000 bytes blijven
+SEEN_VERSIONS = 4096  # eigen events, om de echo te herkennen
+
+RESET = object()  # queue-marker: alle caches leegmaken
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}  # entity -> [evict(entity_id, version)]
+_resets = []  # reset() per cache, bij gemiste events
+_commit_hooks = []  # hook(events), enkel in het schrijvende process
+_seen = OrderedDict()  # (entity, id, version) -> None
+_seen_lock = threading.Lock()
+
+_state = {"pid": None, "stop": None}
+_state_lock = threading.Lock()
+
+
+# ------------------ ABONNEREN ------------------
+
+def subscribe(entity, evict, reset=None):
+    """
+    evict(entity_id, version) wordt opgeroepen voor elk event van deze entity;
+    reset() als events gemist kunnen zijn (de hele cache leegmaken).
+    """
+    _handlers.setdefault(entity, []).append(evict)
+    if reset is not None and reset not in _resets:
+        _resets.append(reset)
+
+
+def on_commit(hook):
+    """
+    hook(events) na elke commit met events, enkel in het process dat commit
+    (niet via de bus). events: [(entity, id, version), ...].
+    """
+    if hook not in _commit_hooks:
+        _commit_hooks.append(hook)
+
+
+def _dispatch(events):
+    for entity, entity_id, version in events:
+        key = (entity, entity_id, version)
+        with _seen_lock:
+            if key in _seen:
+                continue
+            _seen[key] = None
+            while len(_seen) > SEEN_VERSIONS:
+                _seen.popitem(last=False)
+
+        for evict in _handlers.get(entity, ()):
+            try:
+                evict(entity_id, version)
+            except Exception:
+                logger.exception("Cache invalidation failed for %s %s", entity, entity_id)
+
+
+def _reset_all():
+    for reset in _resets:
+        try:
+            reset()
+        except Exception:
+            logger.exception("Cache reset failed")
+
+
+# ------------------ PUBLICEREN ------------------
+
+def publish(db, entity, entity_id):
+    """Event voor een wijziging die niet via de ORM flush loopt (bulk UPDATE/INSERT)."""
+    db.info.setdefault("invalidations", set()).add((entity, entity_id))
+
+
+def _events_for(obj):
+    if isinstance(obj, ConsultantProfile):
+        return [("consultant_profile", obj.id)]
+    if isinstance(obj, Company):
+        return [("company", obj.id)]
+    if isinstance(obj, JobPost):
+        return [("job_post", obj.id)]
+    if isinstance(obj, Collaboration):
+        return [
+            ("consultant_profile", obj.consultant_id),
+            ("company", obj.company_id),
+        ]
+    return []
+
+
+def _payloads(batch):
+    """JSON payloads van maximaal PAYLOAD_LIMIT bytes."""
+    chunk = []
+    size = 2
+    for item in batch:
+        item_size = len(json.dumps(item)) + 1
+        if chunk and size + item_size > PAYLOAD_LIMIT:
+            yield json.dumps(chunk)
+            chunk, size = [], 2
+        chunk.append(item)
+        size += item_size
+    if chunk:
+        yield json.dumps(chunk)
+
+
+def _transport():
+    if not INVALIDATION_BUS:
+        return None
+    if engine.dialect.name == "postgresql":
+        return "postgres"
+    if engine.dialect.name == "sqlite" and hasattr(socket, "AF_UNIX"):
+        return "socket"
+    return None
+
+
+def _socket_path(pid):
+    return os.path.join(INVALIDATION_SOCKET_DIR, f"{pid}.sock")
+
+
+def _send_to_sockets(batch):
+    """Stand-in voor NOTIFY: elk ander worker-process op deze machine."""
+    own = _socket_path(os.getpid())
+    sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        for path in glob.glob(os.path.join(INVALIDATION_SOCKET_DIR, "*.sock")):
+            if path == own:
+                continue
+            try:
+                for payload in _payloads(batch):
+                    sender.sendto(payload.encode(), path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # process bestaat niet meer
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError:
+                logger.warning("Invalidation socket %s not writable", path)
+    finally:
+        sender.close()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    pending = session.info.setdefault("invalidations", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        for entity, entity_id in _events_for(obj):
+            if entity_id is not None:
+                pending.add((entity, entity_id))
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_invalidations(session):
+    # laatste flush nu al, zodat alle events vóór de NOTIFY gekend zijn
+    session.flush()
+    pending = session.info.pop("invalidations", None)
+    if not pending:
+        return
+
+    version = time.time_ns()
+    batch = [[entity, entity_id, version] for entity, entity_id in sorted(pending, key=repr)]
+    session.info["invalidation_batch"] = batch
+
+    if _transport() == "postgres":
+        session.connection().execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            [{"channel": INVALIDATION_CHANNEL, "payload": p} for p in _payloads(batch)],
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    batch = session.info.pop("invalidation_batch", None)
+    if not batch:
+        return
+
+    # eigen process meteen, andere processen via de bus
+    _dispatch(batch)
+    if _transport() == "socket":
+        try:
+            _send_to_sockets(batch)
+        except OSError:
+            logger.exception("Publishing cache invalidations failed")
+
+    events = [tuple(item) for item in batch]
+    for hook in _commit_hooks:
+        try:
+            hook(events)
+        except Exception:
+            logger.exception("Commit hook %s failed", getattr(hook, "__name__", hook))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("invalidations", None)
+    session.info.pop("invalidation_batch", None)
+
+
+# ------------------ LUISTEREN ------------------
+
+def _postgres_payloads(stop):
+    """Payloads van LISTEN op een eigen verbinding (buiten de pool)."""
+    args, kwargs = engine.dialect.create_connect_args(engine.url)
+    connection = engine.dialect.connect(*args, **kwargs)
+    try:
+        connection.autocommit = True
+        cursor = connection.cursor()
+        cursor.execute(f'LISTEN "{INVALIDATION_CHANNEL}"')
+        yield None  # verbonden
+
+        while not stop.is_set():
+            readable, _, _ = select.select([connection], [], [], POLL_INTERVAL)
+            if not readable:
+                cursor.execute("SELECT 1")  # dode verbinding detecteren
+                continue
+            connection.poll()
+            while connection.notifies:
+                yield connection.notifies.pop(0).payload
+    finally:
+        connection.close()
+
+
+def _socket_payloads(stop):
+    os.makedirs(INVALIDATION_SOCKET_DIR, exist_ok=True)
+    path = _socket_path(os.getpid())
+    if os.path.exists(path):
+        os.unlink(path)
+
+    receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        receiver.bind(path)
+        receiver.settimeout(POLL_INTERVAL)
+        yield None  # verbonden
+
+        while not stop.is_set():
+            try:
+                yield receiver.recv(65536).decode()
+            except socket.timeout:
+                continue
+    finally:
+        receiver.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def _listen(stop, events, overflow, resync=False):
+    """
+    Ontvangen + in de queue zetten, met exponentiële backoff bij fouten.
+    resync: ook bij de eerste verbinding alle caches leegmaken (geërfd van
+    de master, events vóór de verbinding gemist).
+    """
+    payloads = _postgres_payloads if _transport() == "postgres" else _socket_payloads
+    delay = 1
+    connected_before = resync
+
+    while not stop.is_set():
+        try:
+            for payload in payloads(stop):
+                if payload is None:
+                    # na een reconnect kunnen events gemist zijn
+                    if connected_before:
+                        payload = RESET
+                    connected_before = True
+                    delay = 1
+                    if payload is None:
+                        continue
+                try:
+                    events.put_nowait(payload)
+                except queue.Full:
+                    overflow.set()
+        except Exception:
+            logger.warning("Invalidation listener disconnected, retrying in %ss", delay)
+            stop.wait(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+
+def _dispatch_loop(stop, events, overflow):
+    while not stop.is_set():
+        try:
+            payload = events.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            continue
+
+        if overflow.is_set():
+            # events weggegooid: queue leegmaken en alles resetten
+            overflow.clear()
+            while True:
+                try:
+                    events.get_nowait()
+                except queue.Empty:
+                    break
+            _reset_all()
+        elif payload is RESET:
+            _reset_all()
+        else:
+            try:
+                _dispatch(tuple(item) for item in json.loads(payload))
+            except ValueError:
+                logger.warning("Malformed invalidation payload ignored")
+
+
+def ensure_listener(resync=False):
+    """
+    Start listener + dispatcher voor dit worker-process (opnieuw na een fork).
+    resync=True na een fork: caches uit de master worden na de eerste
+    verbinding gereset, zodat wijzigingen sinds de warm-up niet verloren gaan.
+    """
+    if _state["pid"] == os.getpid() or _transport() is None:
+        return
+    with _state_lock:
+        if _state["pid"] == os.getpid():
+            return
+        stop = threading.Event()
+        events = queue.Queue(maxsize=INVALIDATION_QUEUE_SIZE)
+        overflow = threading.Event()
+        threading.Thread(
+            target=_listen, args=(stop, events, overflow, resync),
+            name="invalidation-listener", daemon=True,
+        ).start()
+        threading.Thread(
+            target=_dispatch_loop, args=(stop, events, overflow),
+            name="invalidation-dispatch", daemon=True,
+        ).start()
+        _state["pid"] = os.getpid()
+        _state["stop"] = stop
+
+
+def stop_listener():
+    with _state_lock:
+        if _state["stop"] is not None:
+            _state["stop"].set()
+        _state["pid"] = None
+        _state["stop"] = None
+
+
+def init_invalidation(app):
+    """
+    Listener lazy starten bij de eerste request van elk worker-process
+    (onder gunicorn start post_fork hem al, zie warmup.reset_after_fork).
+    """
+
+    @app.before_request
+    def start_invalidation_listener():
+        ensure_listener()
@@ -0,0 +1,1011 @@
+from datetime import datetime, timezone
+from math import radians, sin, cos, sqrt, atan2
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import joinedload, selectinload, load_only
+
+from .cards import (
+    ConsultantCard,
+    JobCard,
+    cards_available,
+    consultant_cards,
+    consultant_cards_statement,
+    job_cards,
+    job_cards_statement,
+)
+from .facets import (
+    CONSULTANT_FACETS,
+    JOB_FACETS,
+    contains,
+    count_facets,
+    disjunctive_counts,
+    equals,
+    facet_values_statement,
+)
+from .models import (
+    User,
+    ConsultantProfile,
+    Company,
+    JobPost,
+    Skill,
+    Unlock,
+    UnlockTarget,
+)
+from .parallel_scoring import parallel_scoring_enabled, score_consultants_parallel
+from .relevance import (
+    CONSULTANT_MAX_UNLOCKS,
+    CONSULTANT_POPULARITY_WEIGHT,
+    CONSULTANT_RECENCY_WEIGHT,
+    CONSULTANT_SEMANTIC_WEIGHT,
+    CONSULTANT_SKILL_WEIGHT,
+    CONSULTANT_TEXT_WEIGHT,
+    JOB_MAX_UNLOCKS,
+    JOB_POPULARITY_WEIGHT,
+    JOB_RECENCY_WEIGHT,
+    JOB_SEMANTIC_WEIGHT,
+    JOB_SKILL_WEIGHT,
+    JOB_TEXT_WEIGHT,
+    consultant_search_text,
+    job_search_text,
+)
+from .skill_similarity import skill_overlap_scores
+from .text_similarity import CONSULTANT_DOCUMENT, JOB_DOCUMENT, semantic_scores
+
+# ------------------ MATCHING ------------------
+# Filters + relevance scoring voor de job- en consultantlijsten.
+# Wordt gedeeld door de HTML-views (routes.py) en de JSON API (api.py).
+# Gewichten en zoektekst staan in relevance.py (gedeeld met parallel_scoring).
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Bereken afstand in km tussen twee (lat, lon) punten met de Haversine-formule.
+
+    Wordt gebruikt om consultants en jobs binnen een bepaalde radius te filteren.
+    """
+    try:
+        lat1 = float(lat1)
+        lon1 = float(lon1)
+        lat2 = float(lat2)
+        lon2 = float(lon2)
+    except (TypeError, ValueError):
+        return None
+
+    R = 6371.0  # straal aarde in km
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+
+    return R * c  # km
+
+
+def unlock_counts_statement(target_type, target_ids):
+    """
+    GROUP BY-query voor unlock counts. target_ids mag een lijst of een subquery zijn.
+    """
+    return (
+        select(Unlock.target_id, func.count(Unlock.id))
+        .where(
+            Unlock.target_type == target_type,
+            Unlock.target_id.in_(target_ids),
+        )
+        .group_by(Unlock.target_id)
+    )
+
+
+def get_unlock_counts(db, target_type, target_ids):
+    """
+    Centraliseer unlock-count aggregatie (popularity) voor relevance.
+    Geeft dict terug: {target_id: count}
+    """
+    if not target_ids:
+        return {}
+
+    unlock_rows = db.execute(unlock_counts_statement(target_type, target_ids)).all()
+    return {target_id: count for target_id, count in unlock_rows}
+
+
+def apply_relevance_scoring(items, scoring_fn):
+    """
+    Centraliseer: score berekenen + score velden zetten + sorteren.
+    scoring_fn(item) moet score_data dict returnen met key 'total'.
+    """
+    scored_items = []
+    for item in items:
+        score_data = scoring_fn(item)
+        item.score = score_data["total"]
+        item.score_breakdown = score_data
+        scored_items.append(item)
+
+    return sorted(scored_items, key=lambda x: x.score, reverse=True)
+
+
+# ------------------ RELEVANCE SCORE HELPERS ------------------
+# Deze helpers maken de matching beter uitbreidbaar/scalable:
+# als je later de scoring wilt aanpassen, kan dat centraal hier.
+
+def compute_consultant_relevance(
+    profile,
+    required_job,
+    required_skill_ids,
+    text_query,
+    unlock_counts,
+    now,
+    semantic_similarities=None,
+    skill_factors=None,
+):
+    """
+    Bereken relevance-score voor een consultant vanuit een geselecteerde JobPost.
+
+    semantic_similarities: {profile_id: cosine similarity} t.o.v. de job
+    (zie text_similarity.semantic_scores).
+    skill_factors: {profile_id: soft skill-overlap} incl. gedeeltelijke
+    krediet voor verwante skills (zie skill_similarity.skill_overlap_scores);
+    None → exacte overlap.
+
+    Oorspronkelijk enkel de oude inline code in een helper; sinds de
+    semantische component zijn de gewichten herverdeeld (zie boven).
+    """
+    if not required_job:
+        # Geen job → geen relevance mogelijk
+        return {
+            "total": 0.0,
+            "skill": 0.0,
+            "text": 0.0,
+            "semantic": 0.0,
+            "recency": 0.0,
+            "popularity": 0.0,
+            "skill_factor": 0.0,
+            "text_factor": 0.0,
+            "semantic_factor": 0.0,
+            "recency_factor": 0.0,
+            "popularity_factor": 0.0,
+            "unlock_count": 0,
+        }
+
+    # A. Skills
+    if skill_factors is not None:
+        skill_similarity = skill_factors.get(profile.id, 0.0)
+    else:
+        consultant_skill_ids = {s.id for s in profile.skills}
+        matched = len(consultant_skill_ids & required_skill_ids)
+        max_skills = max(len(required_skill_ids), 1)
+        skill_similarity = matched / max_skills
+    skill_weighted_score = skill_similarity * CONSULTANT_SKILL_WEIGHT
+
+    # B. Text match (eenvoudig: substring zoekterm in combinatie van velden)
+    text_match = 0
+    if text_query:
+        if text_query.lower() in consultant_search_text(profile):
+            text_match = 1
+    text_weighted_score = text_match * CONSULTANT_TEXT_WEIGHT
+
+    # B2. Semantische gelijkenis (TF-IDF cosine) job ↔ headline
+    semantic_similarity = (semantic_similarities or {}).get(profile.id, 0.0)
+    semantic_weighted_score = semantic_similarity * CONSULTANT_SEMANTIC_WEIGHT
+
+    # C. Recency (nieuwere profielen scoren hoger)
+    days_old = (now - profile.created_at).days
+    recency_factor = max(0, 1 - days_old / 30)  # binnen 30 dagen → tot 1.0
+    recency_weighted_score = recency_factor * CONSULTANT_RECENCY_WEIGHT
+
+    # D. Populariteit (aantal unlocks, genormaliseerd met CONSULTANT_MAX_UNLOCKS)
+    unlock_count = unlock_counts.get(profile.id, 0)
+    popularity_factor = min(unlock_count / CONSULTANT_MAX_UNLOCKS, 1.0)
+    popularity_weighted_score = popularity_factor * CONSULTANT_POPULARITY_WEIGHT
+
+    final_score = (
+        skill_weighted_score
+        + text_weighted_score
+        + semantic_weighted_score
+        + recency_weighted_score
+        + popularity_weighted_score
+    )
+
+    return {
+        "total": final_score,
+        "skill": skill_weighted_score,
+        "text": text_weighted_score,
+        "semantic": semantic_weighted_score,
+        "recency": recency_weighted_score,
+        "popularity": popularity_weighted_score,
+        "skill_factor": skill_similarity,
+        "text_factor": text_match,
+        "semantic_factor": semantic_similarity,
+        "recency_factor": recency_factor,
+        "popularity_factor": popularity_factor,
+        "unlock_count": unlock_count,
+    }
+
+
+def compute_job_relevance(
+    job,
+    consultant_profile,
+    consultant_skill_ids,
+    text_query,
+    unlock_counts,
+    now,
+    semantic_similarities=None,
+    skill_factors=None,
+):
+    """
+    Bereken relevance-score voor een JobPost vanuit een consultant-profiel.
+
+    Houdt rekening met:
+    - Skill overlap
+    - Tekst-match
+    - Semantische gelijkenis
+    - Recency
+    - Populariteit (unlocks)
+
+    semantic_similarities: {job_id: cosine similarity} t.o.v. de headline
+    (zie text_similarity.semantic_scores).
+    skill_factors: {job_id: soft skill-overlap} incl. gedeeltelijke krediet
+    voor verwante skills (zie skill_similarity.skill_overlap_scores);
+    None → exacte overlap.
+    """
+    if not consultant_profile:
+        return {
+            "total": 0.0,
+            "skill": 0.0,
+            "text": 0.0,
+            "semantic": 0.0,
+            "recency": 0.0,
+            "popularity": 0.0,
+            "skill_factor": 0.0,
+            "text_factor": 0.0,
+            "semantic_factor": 0.0,
+            "recency_factor": 0.0,
+            "popularity_factor": 0.0,
+            "unlock_count": 0,
+        }
+
+    # A. Skills
+    if skill_factors is not None:
+        skill_similarity = skill_factors.get(job.id, 0.0)
+    else:
+        job_skill_ids = {s.id for s in job.skills}
+        matched = len(job_skill_ids & consultant_skill_ids)
+        max_skills = max(len(consultant_skill_ids), 1)
+        skill_similarity = matched / max_skills
+    skill_weighted_score = skill_similarity * JOB_SKILL_WEIGHT
+
+    # B. Text match
+    text_match = 0
+    if text_query:
+        if text_query.lower() in job_search_text(job):
+            text_match = 1
+    text_weighted_score = text_match * JOB_TEXT_WEIGHT
+
+    # B2. Semantische gelijkenis (TF-IDF cosine)
+    semantic_similarity = (semantic_similarities or {}).get(job.id, 0.0)
+    semantic_weighted_score = semantic_similarity * JOB_SEMANTIC_WEIGHT
+
+    # C. Recency
+    days_old = (now - job.created_at).days
+    recency_factor = max(0, 1 - days_old / 30)
+    recency_weighted_score = recency_factor * JOB_RECENCY_WEIGHT
+
+    # D. Populariteit (unlocks)
+    unlock_count = unlock_counts.get(job.id, 0)
+    popularity_factor = min(unlock_count / JOB_MAX_UNLOCKS, 1.0)
+    popularity_weighted_score = popularity_factor * JOB_POPULARITY_WEIGHT
+
+    total = (
+        skill_weighted_score
+        + text_weighted_score
+        + semantic_weighted_score
+        + recency_weighted_score
+        + popularity_weighted_score
+    )
+
+    return {
+        "total": total,
+        "skill": skill_weighted_score,
+        "text": text_weighted_score,
+        "semantic": semantic_weighted_score,
+        "recency": recency_weighted_score,
+        "popularity": popularity_weighted_score,
+        "skill_factor": skill_similarity,
+        "text_factor": text_match,
+        "semantic_factor": semantic_similarity,
+        "recency_factor": recency_factor,
+        "popularity_factor": popularity_factor,
+        "unlock_count": unlock_count,
+    }
+
+
+
+
+# ------------------ SEARCH (FILTERS + RANKING) ------------------
+# Volledige zoekflow van /consultants en /jobs, los van de HTML-rendering.
+# projection=True laadt enkel de kolommen die een kaart/API-payload nodig
+# heeft (geen descriptions, contactgegevens, ...).
+# facets=True: facet counts over het resultaat (facets.count_facets) + per
+# actieve contract_type/city/country filter één query zonder die filter
+# (facets.facet_values_statement).
+# Met de card tabellen (cards.py) komen de kandidaten als ConsultantCard/JobCard
+# uit één query op consultant_cards/job_cards i.p.v. via de ORM.
+
+CONSULTANT_CARD_COLUMNS = (
+    ConsultantProfile.id,
+    ConsultantProfile.user_id,
+    ConsultantProfile.display_name_masked,
+    ConsultantProfile.headline,
+    ConsultantProfile.location_city,
+    ConsultantProfile.country,
+    ConsultantProfile.availability,
+    ConsultantProfile.years_experience,
+    ConsultantProfile.created_at,
+    ConsultantProfile.latitude,
+    ConsultantProfile.longitude,
+)
+
+JOB_CARD_COLUMNS = (
+    JobPost.id,
+    JobPost.company_id,
+    JobPost.title,
+    JobPost.location_city,
+    JobPost.country,
+    JobPost.contract_type,
+    JobPost.is_active,
+    JobPost.created_at,
+    JobPost.latitude,
+    JobPost.longitude,
+)
+
+
+def _parse_int(raw):
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        return None
+
+
+def _parse_distance(raw):
+    """max_distance_km: enkel een positieve waarde telt als filter."""
+    raw = (raw or "").strip()
+    if raw == "":
+        return None
+    try:
+        val = float(raw)
+    except ValueError:
+        return None
+    return val if val > 0 else None
+
+
+def parse_consultant_filters(args):
+    """
+    Lees de filters van /consultants uit request.args.
+    """
+    query_skills = args.getlist("skills")
+    if query_skills:
+        query_skills = list(map(int, query_skills))
+
+    return {
+        "sort_by": args.get("sort_by", "relevance"),
+        "skills": query_skills,
+        "city": args.get("city"),
+        "country": args.get("country"),
+        "text_query": args.get("q", None),
+        "min_experience": _parse_int(args.get("min_experience")),
+        "max_distance_km": _parse_distance(args.get("max_distance_km")),
+        "same_country_only": args.get("same_country_only") == "1",
+        "job_id": args.get("job_id", type=int),
+    }
+
+
+def parse_job_filters(args):
+    """
+    Lees de filters van /jobs uit request.args.
+    """
+    query_skills = args.getlist("skills")
+    if query_skills:
+        query_skills = list(map(int, query_skills))
+
+    return {
+        "sort_by": args.get("sort_by", "relevance"),
+        "skills": query_skills,
+        "city": args.get("city"),
+        "country": args.get("country"),
+        "contract_type": args.get("contract_type"),
+        "text_query": args.get("q", None),
+        "max_distance_km": _parse_distance(args.get("max_distance_km")),
+        "ignore_distance": args.get("ignore_distance") == "1",
+        "same_country_only": args.get("same_country_only") == "1",
+    }
+
+
+def unlocked_ids_statement(user_id, target_type):
+    return select(Unlock.target_id).where(
+        Unlock.user_id == user_id,
+        Unlock.target_type == target_type,
+    )
+
+
+def get_unlocked_target_ids(db, user_id, target_type):
+    """Set van target_ids die deze user al unlocked heeft."""
+    rows = db.execute(unlocked_ids_statement(user_id, target_type)).all()
+    return {row[0] for row in rows}
+
+
+def pick_required_job(company_jobs, selected_job_id):
+    """
+    Job waarop gematcht wordt: de gekozen job_id, anders de nieuwste actieve job.
+    Retourneert (required_job, selected_job_id).
+    """
+    required_job = None
+
+    # Probeer eerst job_id uit query
+    if selected_job_id:
+        required_job = next(
+            (job for job in company_jobs if job.id == selected_job_id),
+            None,
+        )
+
+    # Geen geldige gekozen job → fallback naar nieuwste job (ook actief)
+    if not required_job and company_jobs:
+        required_job = company_jobs[0]
+
+    if required_job and not selected_job_id:
+        selected_job_id = required_job.id
+
+    return required_job, selected_job_id
+
+
+def company_jobs_statement(company_id):
+    """Actieve jobs van een company (nieuwste eerst), met skills."""
+    return (
+        select(JobPost)
+        .options(selectinload(JobPost.skills))
+        .where(
+            JobPost.company_id == company_id,
+            JobPost.is_active == True
+        )
+        .order_by(JobPost.created_at.desc())
+    )
+
+
+def consultant_country_reference(company_profile, required_job):
+    """same_country_only werkt op basis van de job-locatie (zelfde referentie als distance)."""
+    country_source = None
+    if required_job and required_job.country:
+        country_source = required_job.country
+    elif company_profile and company_profile.country:
+        country_source = company_profile.country
+
+    return (country_source or "").strip().lower() if country_source else None
+
+
+def use_cards(filters, jobs=False):
+    """Card tabellen gebruiken? Niet voor tekst-zoeken op jobs (description staat niet in job_cards)."""
+    return cards_available() and not (jobs and filters["text_query"])
+
+
+def consultant_candidates_statement(filters, company_country, projection=False, without=()):
+    """
+    select(ConsultantProfile) met alle SQL-filters van /consultants.
+    without: facets ("city", "country") waarvan de filter wegvalt (facet counts).
+    """
+    if projection:
+        stmt = select(ConsultantProfile).options(
+            load_only(*CONSULTANT_CARD_COLUMNS),
+            joinedload(ConsultantProfile.user).load_only(User.id, User.username),
+            selectinload(ConsultantProfile.skills).load_only(Skill.id, Skill.name),
+        )
+    else:
+        stmt = select(ConsultantProfile).options(
+            joinedload(ConsultantProfile.user),
+            selectinload(ConsultantProfile.skills),
+        )
+    stmt = stmt.where(ConsultantProfile.availability == True)
+
+    if filters["min_experience"] is not None:
+        stmt = stmt.where(ConsultantProfile.years_experience >= filters["min_experience"])
+
+    # ✅ Backend filtering voor same_country_only (niet aan distance/geocode komen)
+    if filters["same_country_only"] and company_country:
+        stmt = stmt.where(func.lower(ConsultantProfile.country) == company_country)
+
+    # Handmatige filters gelden alleen als niet 'relevance'
+    if filters["sort_by"] != "relevance":
+        if filters["city"] and "city" not in without:
+            stmt = stmt.where(ConsultantProfile.location_city.ilike(f"%{filters['city']}%"))
+        if filters["country"] and "country" not in without:
+            stmt = stmt.where(ConsultantProfile.country.ilike(f"%{filters['country']}%"))
+        for skill_id in filters["skills"]:
+            stmt = stmt.where(
+                ConsultantProfile.skills.any(Skill.id == skill_id)
+            )
+
+    return stmt
+
+
+def location_facet_predicates(filters):
+    """city/country als facet-predicates (enkel in manuele modus, zoals in SQL)."""
+    predicates = {}
+    if filters["sort_by"] != "relevance":
+        if filters["city"]:
+            predicates["city"] = contains(filters["city"])
+        if filters["country"]:
+            predicates["country"] = contains(filters["country"])
+    return predicates
+
+
+def job_facet_predicates(filters):
+    predicates = location_facet_predicates(filters)
+    if filters["contract_type"]:
+        predicates["contract_type"] = equals(filters["contract_type"])
+    return predicates
+
+
+def consultant_facet_statements(filters, company_country, grouped, cards=False):
+    """
+    {facet: query} per actieve city/country filter: de kandidatenquery zonder
+    die filter, als facets.facet_values_statement.
+    """
+    statements = {}
+    for facet in location_facet_predicates(filters):
+        if cards:
+            stmt = consultant_cards_statement(filters, company_country, {facet})
+        else:
+            stmt = consultant_candidates_statement(filters, company_country, without={facet})
+        source = consultant_cards.c if cards else ConsultantProfile
+        statements[facet] = facet_values_statement(stmt, source, facet, grouped)
+    return statements
+
+
+def within_distance(max_distance_km, origin_lat, origin_lon):
+    """
+    Afstandsfilter als predicate(lat, lon) voor facet counts, zelfde regels als
+    filter_consultants_by_distance/filter_jobs_by_distance (None → geen filter).
+    """
+    if max_distance_km is None or origin_lat is None or origin_lon is None:
+        return None
+
+    def within(lat, lon):
+        if lat is None or lon is None:
+            return False
+        distance = haversine_km(origin_lat, origin_lon, lat, lon)
+        return distance is not None and distance <= max_distance_km
+
+    return within
+
+
+def filter_consultants_by_distance(consultants, max_distance_km, origin_lat, origin_lon):
+    """
+    Locatie-filter (afstand tot job) — bewust Python-level laten (distance/geocode met rust laten)
+    """
+    if max_distance_km is None or origin_lat is None or origin_lon is None:
+        return list(consultants)
+
+    filtered_consultants = []
+    for profile in consultants:
+        prof_lat = getattr(profile, "latitude", None)
+        prof_lon = getattr(profile, "longitude", None)
+
+        if prof_lat is None or prof_lon is None:
+            continue
+
+        distance = haversine_km(origin_lat, origin_lon, prof_lat, prof_lon)
+        profile.distance_km = distance
+
+        if distance is None or distance > max_distance_km:
+            continue
+
+        filtered_consultants.append(profile)
+
+    return filtered_consultants
+
+
+def consultant_matches(profile, filters, company_country, origin_lat=None, origin_lon=None):
+    """
+    Python-variant van consultant_candidates_statement + afstandsfilter voor
+    één profiel (saved searches testen enkel gewijzigde profielen).
+    """
+    if not profile.availability:
+        return False
+    if filters["min_experience"] is not None and (
+        profile.years_experience is None or profile.years_experience < filters["min_experience"]
+    ):
+        return False
+    if filters["same_country_only"] and company_country:
+        if (profile.country or "").lower() != company_country:
+            return False
+
+    for facet, predicate in location_facet_predicates(filters).items():
+        value = profile.location_city if facet == "city" else profile.country
+        if not predicate(value):
+            return False
+    if filters["sort_by"] != "relevance":
+        skill_ids = {s.id for s in profile.skills}
+        if any(skill_id not in skill_ids for skill_id in filters["skills"]):
+            return False
+
+    return bool(filter_consultants_by_distance(
+        [profile], filters["max_distance_km"], origin_lat, origin_lon
+    ))
+
+
+def rank_consultants(consultants, filters, required_job, unlocked_profile_ids, unlock_counts):
+    """
+    Unlock-status zetten en sorteren (relevance of naam).
+    """
+    for consultant in consultants:
+        consultant.is_unlocked_for_me = consultant.id in unlocked_profile_ids
+
+    sort_by = filters["sort_by"]
+
+    # Relevance sorting
+    if sort_by == "relevance":
+        now = filters.get("now") or datetime.now(timezone.utc)
+
+        # TF-IDF gelijkenis job ↔ headlines: één sparse product voor alle kandidaten
+        semantic_similarities = semantic_scores(
+            JOB_DOCUMENT,
+            required_job.id if required_job else None,
+            CONSULTANT_DOCUMENT,
+            [c.id for c in consultants],
+        )
+
+        # Grote kandidatensets: vectorieel + over meerdere cores
+        if required_job and parallel_scoring_enabled(len(consultants)):
+            return score_consultants_parallel(
+                consultants,
+                required_job,
+                filters["text_query"],
+                unlock_counts,
+                now,
+                semantic_similarities=semantic_similarities,
+            )
+
+        required_skill_ids = {s.id for s in required_job.skills} if required_job else set()
+
+        # Soft skill-overlap (verwante skills) voor alle kandidaten tegelijk
+        skill_factors = skill_overlap_scores(required_skill_ids, consultants) if required_job else None
+
+        return apply_relevance_scoring(
+            consultants,
+            lambda consultant: compute_consultant_relevance(
+                profile=consultant,
+                required_job=required_job,
+                required_skill_ids=required_skill_ids,
+                text_query=filters["text_query"],
+                unlock_counts=unlock_counts,
+                now=now,
+                semantic_similarities=semantic_similarities,
+                skill_factors=skill_factors,
+            )
+        )
+
+    if sort_by == "title":
+        return sorted(
+            consultants,
+            key=lambda c: c.display_name_masked
+            if c.display_name_masked
+            else c.user.username,
+        )
+
+    return consultants
+
+
+def search_consultants(db, user, filters, projection=False, facets=False):
+    """
+    Filter + rangschik consultants voor een company-user.
+
+    Retourneert dict:
+        - consultants: gefilterde (en bij relevance gesorteerde) profielen
+        - company_jobs: actieve jobs van de company (job-selector)
+        - required_job: job waarop gematcht wordt (of None)
+        - selected_job_id
+        - facets: facet counts (enkel als facets=True, anders None)
+    """
+    max_distance_km = filters["max_distance_km"]
+
+    # Company-profiel ophalen (o.a. voor jobs & land)
+    company_profile = db.query(Company).filter_by(user_id=user.id).first()
+
+    company_jobs = []
+    if company_profile:
+        company_jobs = db.execute(company_jobs_statement(company_profile.id)).scalars().all()
+
+    required_job, selected_job_id = pick_required_job(company_jobs, filters["job_id"])
+
+    result = {
+        "consultants": [],
+        "company_jobs": company_jobs,
+        "required_job": required_job,
+        "selected_job_id": selected_job_id,
+        "facets": None,
+    }
+
+    # Origin-coördinaten voor afstandsfilter: job-locatie
+    origin_lat = origin_lon = None
+    if max_distance_km is not None and required_job:
+        origin_lat = required_job.latitude
+        origin_lon = required_job.longitude
+
+        # ✅ STRICT: als afstandsfilter actief is maar job heeft geen coords → geen consultants tonen
+        if origin_lat is None or origin_lon is None:
+            return result
+
+    company_country = consultant_country_reference(company_profile, required_job)
+    cards = use_cards(filters)
+    if cards:
+        stmt = consultant_cards_statement(filters, company_country)
+        consultants = [ConsultantCard(row) for row in db.execute(stmt)]
+    else:
+        stmt = consultant_candidates_statement(filters, company_country, projection)
+        consultants = db.execute(stmt).unique().scalars().all()
+
+    consultants = filter_consultants_by_distance(
+        consultants, max_distance_km, origin_lat, origin_lon
+    )
+    if facets:
+        within = within_distance(max_distance_km, origin_lat, origin_lon)
+        result["facets"] = count_facets(consultants, CONSULTANT_FACETS)
+        statements = consultant_facet_statements(filters, company_country, within is None, cards)
+        for facet, facet_stmt in statements.items():
+            result["facets"][facet] = disjunctive_counts(facet, db.execute(facet_stmt).all(), within)
+
+    # Unlock-status voor huidige company + populariteit
+    unlocked_profile_ids = get_unlocked_target_ids(db, user.id, UnlockTarget.consultant)
+    unlock_counts = {}
+    if filters["sort_by"] == "relevance":
+        unlock_counts = get_unlock_counts(
+            db, UnlockTarget.consultant, [c.id for c in consultants]
+        )
+
+    result["consultants"] = rank_consultants(
+        consultants, filters, required_job, unlocked_profile_ids, unlock_counts
+    )
+    return result
+
+
+def consultant_location(consultant_profile):
+    """(lat, lon, land in lowercase) van een consultant-profiel."""
+    if not consultant_profile:
+        return None, None, None
+
+    consultant_country = (
+        (consultant_profile.country or "").strip().lower()
+        if consultant_profile.country
+        else None
+    )
+    return (
+        getattr(consultant_profile, "latitude", None),
+        getattr(consultant_profile, "longitude", None),
+        consultant_country,
+    )
+
+
+def job_candidates_statement(filters, consultant_country, projection=False, without=()):
+    """
+    select(JobPost) met alle SQL-filters van /jobs.
+    without: facets ("contract_type", "city", "country") waarvan de filter
+    wegvalt (facet counts).
+
+    consultant_country mag een string zijn of een SQL-expressie
+    (scalar subquery), zodat de query niet op het profiel hoeft te wachten.
+    """
+    if projection:
+        # description enkel laden als de tekst-match ze nodig heeft
+        columns = JOB_CARD_COLUMNS + ((JobPost.description,) if filters["text_query"] else ())
+        stmt = select(JobPost).options(
+            load_only(*columns),
+            joinedload(JobPost.company).load_only(
+                Company.id, Company.company_name_masked, Company.country
+            ),
+            selectinload(JobPost.skills).load_only(Skill.id, Skill.name),
+        )
+    else:
+        stmt = select(JobPost).options(
+            joinedload(JobPost.company),
+            selectinload(JobPost.skills),
+        )
+    stmt = stmt.where(JobPost.is_active == True)
+
+    # Contracttype filter ALTIJD toepassen
+    if filters["contract_type"] and "contract_type" not in without:
+        stmt = stmt.where(JobPost.contract_type == filters["contract_type"])
+
+    # ✅ Backend filtering voor same_country_only
+    if filters["same_country_only"] and consultant_country is not None:
+        job_country = func.lower(func.coalesce(JobPost.country, Company.country))
+        if isinstance(consultant_country, str):
+            stmt = stmt.join(JobPost.company).where(job_country == consultant_country)
+        else:
+            # geen land op het profiel → filter niet toepassen (zoals bij de string-variant)
+            stmt = stmt.join(JobPost.company).where(
+                or_(consultant_country.is_(None), job_country == consultant_country)
+            )
+
+    # Overige manual filters niet in relevance-modus
+    if filters["sort_by"] != "relevance":
+        if filters["city"] and "city" not in without:
+            stmt = stmt.where(JobPost.location_city.ilike(f"%{filters['city']}%"))
+        if filters["country"] and "country" not in without:
+            stmt = stmt.where(JobPost.country.ilike(f"%{filters['country']}%"))
+        for skill_id in filters["skills"]:
+            stmt = stmt.where(JobPost.skills.any(Skill.id == skill_id))
+
+    return stmt
+
+
+def job_facet_statements(filters, consultant_country, grouped, cards=False):
+    """
+    {facet: query} per actieve contract_type/city/country filter: de
+    kandidatenquery zonder die filter, als facets.facet_values_statement.
+    """
+    statements = {}
+    for facet in job_facet_predicates(filters):
+        if cards:
+            stmt = job_cards_statement(filters, consultant_country, {facet})
+        else:
+            stmt = job_candidates_statement(filters, consultant_country, without={facet})
+        source = job_cards.c if cards else JobPost
+        statements[facet] = facet_values_statement(stmt, source, facet, grouped)
+    return statements
+
+
+def job_distance_limit(filters):
+    """max_distance_km zoals filter_jobs_by_distance het toepast (None → geen filter)."""
+    return None if filters["ignore_distance"] else filters["max_distance_km"]
+
+
+def filter_jobs_by_distance(jobs, filters, consultant_lat, consultant_lon):
+    """Locatie-filter: afstand tot consultant."""
+    if (
+        filters["ignore_distance"]
+        or filters["max_distance_km"] is None
+        or consultant_lat is None
+        or consultant_lon is None
+    ):
+        return list(jobs)
+
+    filtered_jobs = []
+    for job in jobs:
+        # Afstand via job-coördinaten
+        job_lat = getattr(job, "latitude", None)
+        job_lon = getattr(job, "longitude", None)
+
+        if job_lat is None or job_lon is None:
+            continue
+
+        distance = haversine_km(
+            consultant_lat, consultant_lon, job_lat, job_lon
+        )
+        if distance is None or distance > filters["max_distance_km"]:
+            continue
+
+        filtered_jobs.append(job)
+
+    return filtered_jobs
+
+
+def job_matches(job, filters, consultant_country, consultant_lat=None, consultant_lon=None):
+    """
+    Python-variant van job_candidates_statement + afstandsfilter voor één job
+    (saved searches testen enkel gewijzigde jobs).
+    """
+    if not job.is_active:
+        return False
+    if filters["contract_type"] and job.contract_type != filters["contract_type"]:
+        return False
+    if filters["same_country_only"] and consultant_country is not None:
+        job_country = job.country if job.country is not None else (
+            job.company.country if job.company else None
+        )
+        if (job_country or "").lower() != consultant_country:
+            return False
+
+    for facet, predicate in location_facet_predicates(filters).items():
+        value = job.location_city if facet == "city" else job.country
+        if not predicate(value):
+            return False
+    if filters["sort_by"] != "relevance":
+        skill_ids = {s.id for s in job.skills}
+        if any(skill_id not in skill_ids for skill_id in filters["skills"]):
+            return False
+
+    return bool(filter_jobs_by_distance([job], filters, consultant_lat, consultant_lon))
+
+
+def rank_jobs(jobs, filters, consultant_profile, unlocked_job_ids, unlock_counts):
+    """
+    Unlock-status zetten en sorteren (relevance of titel).
+    """
+    for job in jobs:
+        job.is_unlocked_for_me = job.id in unlocked_job_ids
+
+    sort_by = filters["sort_by"]
+
+    # Relevance sorting (via helper)
+    if sort_by == "relevance":
+        now = filters.get("now") or datetime.now(timezone.utc)
+        consultant_skill_ids = (
+            {s.id for s in consultant_profile.skills} if consultant_profile else set()
+        )
+
+        # TF-IDF gelijkenis headline ↔ jobs: één sparse product voor alle kandidaten
+        semantic_similarities = semantic_scores(
+            CONSULTANT_DOCUMENT,
+            consultant_profile.id if consultant_profile else None,
+            JOB_DOCUMENT,
+            [j.id for j in jobs],
+        )
+
+        # Soft skill-overlap (verwante skills) voor alle jobs tegelijk
+        skill_factors = skill_overlap_scores(consultant_skill_ids, jobs) if consultant_profile else None
+
+        return apply_relevance_scoring(
+            jobs,
+            lambda job: compute_job_relevance(
+                job=job,
+                consultant_profile=consultant_profile,
+                consultant_skill_ids=consultant_skill_ids,
+                text_query=filters["text_query"],
+                unlock_counts=unlock_counts,
+                now=now,
+                semantic_similarities=semantic_similarities,
+                skill_factors=skill_factors,
+            )
+        )
+
+    if sort_by == "title":
+        return sorted(jobs, key=lambda j: j.title or "")
+
+    return jobs
+
+
+def search_jobs(db, user, filters, projection=False, facets=False):
+    """
+    Filter + rangschik actieve jobs voor een consultant-user.
+
+    Retourneert dict:
+        - jobs: gefilterde (en bij relevance gesorteerde) jobs
+        - consultant_profile: profiel van de user (skills + locatie)
+        - facets: facet counts (enkel als facets=True, anders None)
+    """
+    # Consultant-profiel voor skills + locatie
+    consultant_profile = (
+        db.query(ConsultantProfile)
+        .options(selectinload(ConsultantProfile.skills))
+        .filter(ConsultantProfile.user_id == user.id)
+        .first()
+    )
+    consultant_lat, consultant_lon, consultant_country = consultant_location(consultant_profile)
+
+    cards = use_cards(filters, jobs=True)
+    if cards:
+        stmt = job_cards_statement(filters, consultant_country)
+        jobs = [JobCard(row) for row in db.execute(stmt)]
+    else:
+        stmt = job_candidates_statement(filters, consultant_country, projection)
+        jobs = db.execute(stmt).unique().scalars().all()
+
+    jobs = filter_jobs_by_distance(jobs, filters, consultant_lat, consultant_lon)
+    facet_counts = None
+    if facets:
+        within = within_distance(job_distance_limit(filters), consultant_lat, consultant_lon)
+        facet_counts = count_facets(jobs, JOB_FACETS)
+        statements = job_facet_statements(filters, consultant_country, within is None, cards)
+        for facet, facet_stmt in statements.items():
+            facet_counts[facet] = disjunctive_counts(facet, db.execute(facet_stmt).all(), within)
+
+    # Unlock status ophalen (welke jobs heeft deze consultant al unlocked?) + populariteit
+    unlocked_job_ids = get_unlocked_target_ids(db, user.id, UnlockTarget.job)
+    unlock_counts = {}
+    if filters["sort_by"] == "relevance":
+        unlock_counts = get_unlock_counts(db, UnlockTarget.job, [j.id for j in jobs])
+
+    return {
+        "jobs": rank_jobs(jobs, filters, consultant_profile, unlocked_job_ids, unlock_counts),
+        "consultant_profile": consultant_profile,
+        "facets": facet_counts,
+    }
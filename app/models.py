@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Text, DECIMAL, Boolean,
-    ForeignKey, Enum, TIMESTAMP, Index, func, Float
+    ForeignKey, Enum, TIMESTAMP, Index, func, Float, JSON
 )
 from sqlalchemy.orm import declarative_base, relationship
 import enum
@@ -34,6 +34,16 @@ class CollaborationStatus(enum.Enum):
     ended = "ended"
 
 
+class RecommendationSubject(enum.Enum):
+    consultant = "consultant"  # top-N jobs voor een consultant
+    job = "job"                # top-N consultants voor een job
+
+
+class SavedSearchKind(enum.Enum):
+    jobs = "jobs"                # consultant op /jobs
+    consultants = "consultants"  # company op /consultants
+
+
 # ---- TABLES ----
 class User(Base):
     __tablename__ = "users"
@@ -293,6 +303,28 @@ Index("idx_job_skills_job_id", JobSkill.job_id)
 Index("idx_job_skills_skill_id", JobSkill.skill_id)
 
 
+class SkillSimilarity(Base):
+    """
+    Gelijkenis tussen twee skills o.b.v. co-occurrence in profielen en jobs
+    (cosine, 0..1). Wordt herberekend met `flask skills similarity`.
+    Beide richtingen worden bewaard; de diagonaal (zelfde skill = 1) niet.
+    """
+    __tablename__ = "skill_similarities"
+
+    skill_id = Column(
+        Integer,
+        ForeignKey("skills.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    similar_skill_id = Column(
+        Integer,
+        ForeignKey("skills.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    similarity = Column(Float, nullable=False)
+    computed_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+
 class Collaboration(Base):
     __tablename__ = "collaborations"
 
@@ -324,3 +356,267 @@ class Collaboration(Base):
     company = relationship("Company", back_populates="collaborations")
     consultant = relationship("ConsultantProfile", back_populates="collaborations")
     job_post = relationship("JobPost", back_populates="collaborations")
+
+
+# admin-overzicht: filter op status + keyset-paginatie op started_at
+Index(
+    "idx_collaborations_status_started_at",
+    Collaboration.status,
+    Collaboration.started_at,
+)
+Index("idx_collaborations_started_at", Collaboration.started_at)
+Index("idx_collaborations_company_status", Collaboration.company_id, Collaboration.status)
+Index("idx_collaborations_consultant_status", Collaboration.consultant_id, Collaboration.status)
+
+
+class RecommendationRun(Base):
+    """
+    Eén batch-run van de recommendations.
+    Enkel generaties met finished_at worden geserveerd.
+    """
+    __tablename__ = "recommendation_runs"
+
+    generation = Column(Integer, primary_key=True, autoincrement=True)
+    started_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    finished_at = Column(TIMESTAMP, nullable=True)
+
+
+class Recommendation(Base):
+    """
+    Voorberekende top-N match (zelfde scoring als de live relevance).
+    """
+    __tablename__ = "recommendations"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    generation = Column(
+        Integer,
+        ForeignKey("recommendation_runs.generation", ondelete="CASCADE"),
+        nullable=False
+    )
+    subject_type = Column(
+        Enum(RecommendationSubject, name="recommendation_subject"),
+        nullable=False
+    )
+    subject_id = Column(Integer, nullable=False)  # consultant_profiles.id of job_posts.id
+    target_id = Column(Integer, nullable=False)   # job_posts.id of consultant_profiles.id
+    rank = Column(Integer, nullable=False)
+
+    score = Column(Float, nullable=False)
+    skill_factor = Column(Float, nullable=False)
+    semantic_factor = Column(Float, nullable=False, default=0)
+    recency_factor = Column(Float, nullable=False)
+    popularity_factor = Column(Float, nullable=False)
+    unlock_count = Column(Integer, nullable=False, default=0)
+
+
+Index(
+    "idx_recommendations_subject",
+    Recommendation.generation,
+    Recommendation.subject_type,
+    Recommendation.subject_id,
+    Recommendation.rank,
+)
+
+
+class RecommendationChange(Base):
+    """
+    Job of profiel gewijzigd (incl. skills, nieuw, gesloten) sinds een run.
+    Wordt bij het serveren live bijgescoord; opgeruimd na de volgende run.
+    """
+    __tablename__ = "recommendation_changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(40), nullable=False)  # job_post | consultant_profile
+    entity_id = Column(Integer, nullable=False)
+    changed_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+
+Index("idx_recommendation_changes_changed_at", RecommendationChange.changed_at)
+
+
+class StoredFile(Base):
+    """
+    Content-addressed upload (key = folder/sha256.ext). Identieke uploads
+    delen één object; ref_count telt de profielvelden die naar url verwijzen.
+    Objecten zonder referenties worden opgeruimd met `flask storage gc`.
+    """
+    __tablename__ = "stored_files"
+
+    key = Column(String(255), primary_key=True)
+    url = Column(Text, nullable=False, unique=True)
+    sha256 = Column(String(64), nullable=False)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String(120), nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    last_referenced_at = Column(TIMESTAMP, nullable=True)
+
+
+Index("idx_stored_files_ref_count", StoredFile.ref_count)
+
+
+class SavedSearch(Base):
+    """
+    Bewaarde filtercombinatie van /jobs of /consultants (query = querystring).
+    Het resultaat staat in saved_search_results en wordt incrementeel bijgehouden.
+    """
+    __tablename__ = "saved_searches"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(Enum(SavedSearchKind, name="saved_search_kind"), nullable=False)
+    name = Column(String(120), nullable=False)
+    query = Column(Text, nullable=False, default="")
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    last_viewed_at = Column(TIMESTAMP, nullable=True)
+    refreshed_at = Column(TIMESTAMP, nullable=True)
+
+
+Index("idx_saved_searches_kind", SavedSearch.kind)
+Index("idx_saved_searches_user", SavedSearch.user_id)
+
+
+class SavedSearchResult(Base):
+    """
+    Eén resultaat van een saved search. matched_at = eerste keer in het
+    resultaat ("nieuw sinds vorig bezoek"); score enkel in relevance-modus.
+    """
+    __tablename__ = "saved_search_results"
+
+    saved_search_id = Column(
+        Integer,
+        ForeignKey("saved_searches.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    target_id = Column(Integer, primary_key=True)  # job_posts.id of consultant_profiles.id
+    score = Column(Float, nullable=True)
+    score_breakdown = Column(JSON, nullable=True)
+    matched_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+
+class SavedSearchChange(Base):
+    """
+    Wachtrij van gewijzigde jobs/profielen voor de saved searches. Gevuld na
+    elke commit, verwerkt (en verwijderd) door `flask saved-searches apply`.
+    """
+    __tablename__ = "saved_search_changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(40), nullable=False)  # job_post | consultant_profile
+    entity_id = Column(Integer, nullable=False)
+    changed_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+
+class RateLimitBucket(Base):
+    """
+    Token bucket van de rate limiter (RATE_LIMIT_STORE=database/local).
+    tokens/updated_at worden atomair bijgewerkt met één UPSERT ... RETURNING.
+    """
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(255), primary_key=True)  # endpoint:user:<id> of endpoint:ip:<adres>
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # unix tijd (seconden)
+    allowed = Column(Boolean, nullable=False, default=True)  # resultaat van de laatste take
+
+
+Index("idx_rate_limit_buckets_updated_at", RateLimitBucket.updated_at)
+
+
+# ---- ARCHIVE (koude rijen, zie app/archive.py) ----
+# Zelfde kolommen (en ids) als de hot tabellen + archived_at.
+
+class ArchivedJobPost(Base):
+    __tablename__ = "job_posts_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    company_id = Column(
+        Integer,
+        ForeignKey("companies.id", ondelete="CASCADE"),
+        nullable=False
+    )
+
+    title = Column(String(200), nullable=False)
+    description = Column(Text)
+    location_city = Column(String(120))
+    country = Column(String(120))
+    contract_type = Column(String(80))
+    created_at = Column(TIMESTAMP, nullable=False)
+    is_active = Column(Boolean, nullable=False, server_default="0")
+    hired_consultant_id = Column(
+        Integer,
+        ForeignKey("consultant_profiles.id", ondelete="SET NULL"),
+        nullable=True
+    )
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+
+    archived_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+    company = relationship("Company")
+    skills = relationship("Skill", secondary="job_skills_archive", viewonly=True)
+    hired_consultant = relationship("ConsultantProfile", foreign_keys=[hired_consultant_id])
+
+
+Index("idx_job_posts_archive_company_id", ArchivedJobPost.company_id)
+
+
+class ArchivedJobSkill(Base):
+    __tablename__ = "job_skills_archive"
+
+    job_id = Column(
+        Integer,
+        ForeignKey("job_posts_archive.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    skill_id = Column(
+        Integer,
+        ForeignKey("skills.id", ondelete="RESTRICT"),
+        primary_key=True
+    )
+    created_at = Column(TIMESTAMP, nullable=False)
+
+
+class ArchivedCollaboration(Base):
+    __tablename__ = "collaborations_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    company_id = Column(
+        Integer,
+        ForeignKey("companies.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    consultant_id = Column(
+        Integer,
+        ForeignKey("consultant_profiles.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    job_post_id = Column(Integer, nullable=True)  # job_posts of job_posts_archive
+
+    status = Column(
+        Enum(CollaborationStatus, name="collaboration_status"),
+        nullable=False
+    )
+    started_at = Column(TIMESTAMP, nullable=False)
+    ended_at = Column(TIMESTAMP, nullable=True)
+
+    archived_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+
+Index("idx_collaborations_archive_company_consultant", ArchivedCollaboration.company_id, ArchivedCollaboration.consultant_id)
+
+
+class ArchivedUnlock(Base):
+    __tablename__ = "unlocks_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    target_type = Column(Enum(UnlockTarget), nullable=False)
+    target_id = Column(Integer, nullable=False)
+    created_at = Column(TIMESTAMP, nullable=False)
+
+    archived_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
@@ -0,0 +1,213 @@
+import heapq
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+
+try:
+    import numpy as np
+except ImportError:  # zonder numpy blijft de sequentiële scoring actief
+    np = None
+
+from .relevance import (
+    CONSULTANT_MAX_UNLOCKS,
+    CONSULTANT_POPULARITY_WEIGHT,
+    CONSULTANT_RECENCY_WEIGHT,
+    CONSULTANT_SEMANTIC_WEIGHT,
+    CONSULTANT_SKILL_WEIGHT,
+    CONSULTANT_TEXT_WEIGHT,
+    consultant_search_text,
+)
+from .skill_similarity import soft_skill_overlap
+
+# ------------------ PARALLEL SCORING ------------------
+# Voor brede jobs (weinig skills, geen afstandsfilter) moet /consultants de
+# volledige beschikbare pool scoren. Boven PARALLEL_SCORING_THRESHOLD
+# kandidaten wordt de pool in partities opgesplitst:
+#
+# - per partitie worden de kolommen (skill ids, created_at, unlock counts)
+#   in NumPy arrays gezet en in één keer gescoord (numpy geeft de GIL vrij),
+# - partities lopen op een persistente thread pool (één per process),
+# - de gesorteerde partities worden samengevoegd (heapq.merge).
+#
+# Alle callers (pagina, API-snapshot, saved searches) hebben de volledige
+# rangschikking nodig, dus er wordt niet afgekapt tot een top-K.
+#
+# Scores, score_breakdown en volgorde zijn identiek aan
+# matching.compute_consultant_relevance + apply_relevance_scoring.
+#
+# Enkel de array-bewerkingen geven de GIL vrij; attributen uit de profielen
+# halen (fromiter, soft_skill_overlap) en score_breakdown zetten is Python.
+# De winst komt dus vooral van de vectorisatie, extra threads leveren weinig
+# of niets op. Zie benchmarks/bench_parallel_scoring.py (mediaan, met
+# vectorisatie en threads apart) voor het omslagpunt.
+
+PARALLEL_SCORING_THRESHOLD = int(os.getenv("PARALLEL_SCORING_THRESHOLD", "20000"))
+PARALLEL_SCORING_WORKERS = int(os.getenv("PARALLEL_SCORING_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_SCORING_MIN_PARTITION = 2000  # kleinere partities kosten meer dan ze opleveren
+
+_pool = {"pid": None, "executor": None}
+_pool_lock = threading.Lock()
+
+
+def parallel_scoring_enabled(candidate_count, threshold=None):
+    threshold = PARALLEL_SCORING_THRESHOLD if threshold is None else threshold
+    return np is not None and threshold > 0 and candidate_count >= threshold
+
+
+def _executor():
+    """Persistente thread pool, opnieuw opgebouwd na een fork (gunicorn)."""
+    with _pool_lock:
+        if _pool["pid"] != os.getpid():
+            _pool["executor"] = ThreadPoolExecutor(
+                max_workers=PARALLEL_SCORING_WORKERS,
+                thread_name_prefix="scoring",
+            )
+            _pool["pid"] = os.getpid()
+        return _pool["executor"]
+
+
+def _epoch_us(value):
+    """Timestamp in hele microseconden (naive = UTC), exact zoals datetime-aftrekking."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _score_partition(
+    profiles, offset, required_skills, text_query, unlock_counts, semantic_similarities, now_us
+):
+    """
+    Scoort één partitie vectorieel.
+    Retourneert (-scores, globale indexen, profielen), gesorteerd.
+    """
+    n = len(profiles)
+
+    # A. Skills: soft overlap (exacte + verwante skills)
+    skill_factor = soft_skill_overlap(required_skills, [[s.id for s in p.skills] for p in profiles])
+
+    # B. Tekst
+    if text_query:
+        query = text_query.lower()
+        text_factor = np.fromiter(
+            (query in consultant_search_text(p) for p in profiles), dtype=np.int64, count=n
+        )
+    else:
+        text_factor = np.zeros(n, dtype=np.int64)
+
+    # B2. Semantische gelijkenis (TF-IDF)
+    semantic_factor = np.fromiter(
+        (semantic_similarities.get(p.id, 0.0) for p in profiles), dtype=np.float64, count=n
+    )
+
+    # C. Recency (hele dagen, afgerond naar beneden zoals timedelta.days)
+    created_us = np.rint(
+        np.fromiter((_epoch_us(p.created_at) for p in profiles), dtype=np.float64, count=n) * 1e6
+    ).astype(np.int64)
+    days_old = (now_us - created_us) // 86_400_000_000
+    recency_factor = np.maximum(0.0, 1 - days_old / 30)
+
+    # D. Populariteit
+    unlocks = np.fromiter((unlock_counts.get(p.id, 0) for p in profiles), dtype=np.int64, count=n)
+    popularity_factor = np.minimum(unlocks / CONSULTANT_MAX_UNLOCKS, 1.0)
+
+    skill = skill_factor * CONSULTANT_SKILL_WEIGHT
+    text = text_factor * CONSULTANT_TEXT_WEIGHT
+    semantic = semantic_factor * CONSULTANT_SEMANTIC_WEIGHT
+    recency = recency_factor * CONSULTANT_RECENCY_WEIGHT
+    popularity = popularity_factor * CONSULTANT_POPULARITY_WEIGHT
+    total = skill + text + semantic + recency + popularity
+
+    # hoogste score eerst, bij gelijke score de oorspronkelijke volgorde
+    order = np.lexsort((np.arange(n), -total))
+
+    # score velden zetten in de oorspronkelijke volgorde (geheugen-vriendelijker)
+    columns = zip(
+        profiles,
+        total.tolist(),
+        skill.tolist(),
+        text.tolist(),
+        semantic.tolist(),
+        recency.tolist(),
+        popularity.tolist(),
+        skill_factor.tolist(),
+        text_factor.tolist(),
+        semantic_factor.tolist(),
+        recency_factor.tolist(),
+        popularity_factor.tolist(),
+        unlocks.tolist(),
+    )
+    for profile, score, s, t, sem, r, pop, sf, tf, semf, rf, pf, uc in columns:
+        profile.score = score
+        profile.score_breakdown = {
+            "total": score,
+            "skill": s,
+            "text": t,
+            "semantic": sem,
+            "recency": r,
+            "popularity": pop,
+            "skill_factor": sf,
+            "text_factor": tf,
+            "semantic_factor": semf,
+            # max(0, ...) in de sequentiële versie geeft int 0
+            "recency_factor": rf if rf > 0 else 0,
+            "popularity_factor": pf,
+            "unlock_count": uc,
+        }
+
+    return (
+        (-total[order]).tolist(),
+        (order + offset).tolist(),
+        [profiles[i] for i in order.tolist()],
+    )
+
+
+def score_consultants_parallel(
+    consultants,
+    required_job,
+    text_query,
+    unlock_counts,
+    now,
+    workers=None,
+    semantic_similarities=None,
+):
+    """
+    Parallelle variant van de relevance scoring in matching.rank_consultants.
+    Zet score + score_breakdown en retourneert alle consultants gesorteerd.
+    """
+    consultants = list(consultants)
+    workers = workers or PARALLEL_SCORING_WORKERS
+    partitions = max(1, min(workers, len(consultants) // PARALLEL_SCORING_MIN_PARTITION))
+    size = -(-len(consultants) // partitions)  # afronden naar boven
+
+    required_skills = np.fromiter((s.id for s in required_job.skills), dtype=np.int64)
+    now_us = round(_epoch_us(now) * 1e6)
+    semantic_similarities = semantic_similarities or {}
+
+    chunks = [
+        (consultants[start:start + size], start)
+        for start in range(0, len(consultants), size)
+    ]
+    if len(chunks) == 1:
+        _, _, ranked = _score_partition(
+            chunks[0][0], 0, required_skills, text_query, unlock_counts,
+            semantic_similarities, now_us,
+        )
+        return ranked
+
+    futures = [
+        _executor().submit(
+            _score_partition,
+            chunk,
+            offset,
+            required_skills,
+            text_query,
+            unlock_counts,
+            semantic_similarities,
+            now_us,
+        )
+        for chunk, offset in chunks
+    ]
+    # (-score, globale index) is uniek, dus profielen worden nooit vergeleken
+    merged = heapq.merge(*(zip(*future.result()) for future in futures))
+    return [profile for _, _, profile in merged]
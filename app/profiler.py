@@ -0,0 +1,262 @@
+import os
+import sys
+import time
+import threading
+import itertools
+from collections import Counter, deque
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from flask import current_app, g, request, session, template_rendered, before_render_template
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import event
+
+from .models import UserRole
+
+# ------------------ ON-DEMAND REQUEST PROFILER ------------------
+# Admin-only profiler om trage requests (bv. /consultants voor één company)
+# te analyseren. Activeren met ?_profile=1 of de header "X-Profile: 1".
+# Andere sessies (bv. de company die het probleem reproduceert) enkel met een
+# ondertekend token van een admin (profiling_token), gebonden aan die user en
+# geldig voor PROFILER_TOKEN_MAX_AGE seconden.
+#
+# - Een sampling-thread neemt elke PROFILER_SAMPLE_INTERVAL seconden de
+#   call stack van de request-thread (flame-graph-ready, "folded" formaat).
+# - SQL-tijd wordt gemeten via SQLAlchemy cursor events.
+# - Template-tijd wordt gemeten via de Flask render signals.
+# - Python-tijd = totale tijd - SQL-tijd - template-tijd.
+#
+# Profielen worden bewaard in een begrensde ring buffer (deque met maxlen),
+# dus geheugengebruik blijft beperkt, ook als er veel geprofiled wordt.
+
+PROFILER_MAX_PROFILES = int(os.getenv("PROFILER_MAX_PROFILES", "20"))
+PROFILER_SAMPLE_INTERVAL = float(os.getenv("PROFILER_SAMPLE_INTERVAL", "0.005"))
+PROFILER_MAX_STACK_DEPTH = 64
+PROFILER_TOKEN_MAX_AGE = int(os.getenv("PROFILER_TOKEN_MAX_AGE", "900"))  # seconden
+
+_profiles = deque(maxlen=PROFILER_MAX_PROFILES)
+_profiles_lock = threading.Lock()
+_profile_ids = itertools.count(1)
+
+
+class RequestProfile:
+    """
+    Meetgegevens van één geprofilede request.
+    """
+
+    def __init__(self, method, path, user_id):
+        self.id = next(_profile_ids)
+        self.method = method
+        self.path = path
+        self.user_id = user_id
+        self.created_at = datetime.now(timezone.utc)
+        self.status_code = None
+
+        self.started = time.perf_counter()
+        self.total_time = 0.0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+        self.sql_statements = Counter()     # statement -> aantal
+        self.sql_statement_time = Counter()  # statement -> totale tijd
+        self.templates = Counter()           # template -> totale tijd
+
+        # huidige fase, wordt door de sampler gebruikt als root-frame
+        self.phase = "python"
+        self.stacks = Counter()  # "frame;frame;frame" -> aantal samples
+        self.sample_count = 0
+
+        self._sql_started = None
+        self._phase_before_sql = "python"
+        self._template_started = None
+        self._template_sql_time = 0.0
+        self._sampler = None
+
+    @property
+    def python_time(self):
+        return max(self.total_time - self.sql_time - self.template_time, 0.0)
+
+    @property
+    def query_count(self):
+        return sum(self.sql_statements.values())
+
+    def folded(self):
+        """
+        Stacks in het 'folded' formaat (flamegraph.pl / speedscope).
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def top_sql(self, limit=10):
+        return [
+            {
+                "statement": statement,
+                "count": self.sql_statements[statement],
+                "time": self.sql_statement_time[statement],
+            }
+            for statement, _ in self.sql_statement_time.most_common(limit)
+        ]
+
+
+class _StackSampler(threading.Thread):
+    """
+    Neemt periodiek de stack van één thread via sys._current_frames().
+    """
+
+    def __init__(self, profile, thread_id, interval):
+        super().__init__(daemon=True, name=f"profiler-{profile.id}")
+        self.profile = profile
+        self.thread_id = thread_id
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            frames = []
+            while frame is not None and len(frames) < PROFILER_MAX_STACK_DEPTH:
+                code = frame.f_code
+                frames.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                )
+                frame = frame.f_back
+            frames.append(f"[{self.profile.phase}]")
+            frames.reverse()
+
+            self.profile.stacks[";".join(frames)] += 1
+            self.profile.sample_count += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=1)
+
+
+def get_profiles():
+    """Alle bewaarde profielen, nieuwste eerst."""
+    with _profiles_lock:
+        return list(reversed(_profiles))
+
+
+def get_profile(profile_id):
+    with _profiles_lock:
+        return next((p for p in _profiles if p.id == profile_id), None)
+
+
+def _token_serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt="request-profiler")
+
+
+def profiling_token(user_id):
+    """Token waarmee één user (niet-admin) zijn eigen requests kan laten profilen."""
+    return _token_serializer().dumps(user_id)
+
+
+def _profiling_requested():
+    flag = request.args.get("_profile") or request.headers.get("X-Profile")
+    if not flag:
+        return False
+
+    if session.get("role") == UserRole.admin.value:
+        return True
+
+    user_id = session.get("user_id")
+    if not user_id:
+        return False
+    try:
+        token_user_id = _token_serializer().loads(flag, max_age=PROFILER_TOKEN_MAX_AGE)
+    except BadSignature:  # ook SignatureExpired
+        return False
+    return token_user_id == user_id
+
+
+def _profiled_path():
+    """Pad + query string zonder de _profile flag (kan een token zijn)."""
+    args = [(key, value) for key, value in request.args.items(multi=True) if key != "_profile"]
+    return request.path + ("?" + urlencode(args) if args else "")
+
+
+def _current_profile():
+    return g.get("_request_profile")
+
+
+def init_profiler(app, engine):
+    """
+    Koppelt de profiler aan de Flask app en de SQLAlchemy engine.
+    """
+
+    @app.before_request
+    def start_request_profile():
+        if not _profiling_requested():
+            return
+
+        profile = RequestProfile(request.method, _profiled_path(), session.get("user_id"))
+        sampler = _StackSampler(profile, threading.get_ident(), PROFILER_SAMPLE_INTERVAL)
+        profile._sampler = sampler
+        g._request_profile = profile
+        sampler.start()
+
+    @app.after_request
+    def store_request_profile(response):
+        profile = _current_profile()
+        if profile is None:
+            return response
+
+        profile._sampler.stop()
+        profile.total_time = time.perf_counter() - profile.started
+        profile.status_code = response.status_code
+        g._request_profile = None
+
+        with _profiles_lock:
+            _profiles.append(profile)
+
+        response.headers["X-Profile-Id"] = str(profile.id)
+        return response
+
+    @app.teardown_request
+    def stop_request_profile(exc):
+        # Bij een exception wordt after_request overgeslagen
+        profile = g.pop("_request_profile", None)
+        if profile is not None:
+            profile._sampler.stop()
+
+    @before_render_template.connect_via(app)
+    def template_started(sender, template, context, **extra):
+        profile = _current_profile()
+        if profile is not None:
+            profile._template_started = time.perf_counter()
+            profile._template_sql_time = 0.0
+            profile.phase = "template"
+
+    @template_rendered.connect_via(app)
+    def template_finished(sender, template, context, **extra):
+        profile = _current_profile()
+        if profile is not None and profile._template_started is not None:
+            # lazy loads tijdens het renderen tellen als SQL-tijd, niet dubbel
+            elapsed = time.perf_counter() - profile._template_started - profile._template_sql_time
+            profile.template_time += elapsed
+            profile.templates[template.name] += elapsed
+            profile._template_started = None
+            profile.phase = "python"
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def sql_started(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile() if g else None
+        if profile is not None:
+            profile._sql_started = time.perf_counter()
+            profile._phase_before_sql = profile.phase
+            profile.phase = "sql"
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def sql_finished(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile() if g else None
+        if profile is not None and profile._sql_started is not None:
+            elapsed = time.perf_counter() - profile._sql_started
+            profile.sql_time += elapsed
+            profile.sql_statements[statement] += 1
+            profile.sql_statement_time[statement] += elapsed
+            if profile._template_started is not None:
+                profile._template_sql_time += elapsed
+            profile._sql_started = None
+            profile.phase = profile._phase_before_sql
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+
+from flask import Response, request, session
+from sqlalchemy import case, create_engine, delete
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .supabase_client import DATABASE_URL, engine
+from .models import RateLimitBucket
+
+# ------------------ RATE LIMITING ------------------
+# Token buckets per endpoint, per user (session) en per IP-adres, zodat
+# scrapers de unlock-endpoints en zoeklijsten niet kunnen uitputten.
+#
+# - Elke bucket heeft capacity tokens en krijgt er rate per seconde bij; een
+#   request kost één token. Leeg → 429 met Retry-After (tot er weer één is).
+# - Per endpoint twee buckets: "user" (ingelogde user) en "ip". De IP-bucket
+#   is ruimer, want meerdere users kunnen achter hetzelfde adres zitten.
+#   Achter een reverse proxy: ProxyFix configureren, anders is elk adres de proxy.
+# - Stores (RATE_LIMIT_STORE):
+#     memory   – dict in het process (één worker / één node)
+#     database – tabel rate_limit_buckets in de app-database, gedeeld door
+#                alle workers en nodes; één atomaire UPSERT ... RETURNING per bucket
+#     local    – zelfde tabel in een gedeeld SQLite-bestand: stand-in voor
+#                meerdere workers op één machine, zonder de app-database te belasten
+# - Faalt de store (database weg), dan wordt het request doorgelaten.
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+RATE_LIMIT_LOCAL_PATH = os.getenv("RATE_LIMIT_LOCAL_PATH") or os.path.join(
+    tempfile.gettempdir(),
+    "iconsult-ratelimit-" + hashlib.sha1(DATABASE_URL.encode()).hexdigest()[:12] + ".db",
+)
+RATE_LIMIT_IDLE_TTL = 24 * 3600  # seconden; volle, ongebruikte buckets opruimen
+MEMORY_MAX_BUCKETS = 100000
+
+# endpoint -> {"user": [capacity, per_seconds], "ip": [capacity, per_seconds]}
+# capacity requests in een burst, daarna gemiddeld capacity per per_seconds.
+RATE_LIMITS = {
+    "main.unlock_consultant": {"user": [20, 60], "ip": [60, 60]},
+    "main.unlock_job": {"user": [20, 60], "ip": [60, 60]},
+    "main.consultants_list": {"user": [30, 60], "ip": [90, 60]},
+    "main.jobs_list": {"user": [30, 60], "ip": [90, 60]},
+    "api.consultants_search": {"user": [60, 60], "ip": [180, 60]},
+    "api.jobs_search": {"user": [60, 60], "ip": [180, 60]},
+}
+RATE_LIMITS.update(json.loads(os.getenv("RATE_LIMITS", "{}")))
+
+logger = logging.getLogger(__name__)
+
+
+def _retry_after(tokens, rate):
+    """Seconden tot er weer één token is."""
+    return max(1, math.ceil((1 - tokens) / rate))
+
+
+class MemoryStore:
+    """Buckets in een dict van dit process (thread-safe)."""
+
+    def __init__(self, max_buckets=MEMORY_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, now):
+        """Eén token nemen. Retourneert (toegelaten, resterende tokens)."""
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            if key not in self._buckets and len(self._buckets) >= self.max_buckets:
+                self._prune(now)
+            self._buckets[key] = (tokens, now)
+        return allowed, tokens
+
+    def _prune(self, now):
+        cutoff = now - RATE_LIMIT_IDLE_TTL
+        stale = [key for key, (_, updated_at) in self._buckets.items() if updated_at < cutoff]
+        for key in stale or list(self._buckets)[: len(self._buckets) // 10]:
+            del self._buckets[key]
+
+
+class DatabaseStore:
+    """
+    Buckets in rate_limit_buckets. Bijvullen, nemen en het resultaat lezen
+    gebeurt in één INSERT ... ON CONFLICT DO UPDATE ... RETURNING, zodat
+    gelijktijdige requests (ook van andere workers/nodes) correct tellen.
+    """
+
+    def __init__(self, bind):
+        self.bind = bind
+        dialects = {"postgresql": postgresql, "sqlite": sqlite}
+        if bind.dialect.name not in dialects:
+            raise RuntimeError(f"Rate limit store not supported on {bind.dialect.name}")
+        self._insert = dialects[bind.dialect.name].insert
+
+    def _statement(self, key, capacity, rate, now):
+        bucket = RateLimitBucket.__table__
+        refilled = bucket.c.tokens + (now - bucket.c.updated_at) * rate
+        available = case((refilled > capacity, capacity), else_=refilled)
+        stmt = self._insert(bucket).values(
+            key=key, tokens=capacity - 1, updated_at=now, allowed=True
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[bucket.c.key],
+            set_={
+                "tokens": case((available >= 1, available - 1), else_=available),
+                "updated_at": now,
+                "allowed": available >= 1,
+            },
+        ).returning(bucket.c.allowed, bucket.c.tokens)
+
+    def take(self, key, capacity, rate, now):
+        with self.bind.begin() as conn:
+            allowed, tokens = conn.execute(self._statement(key, capacity, rate, now)).one()
+            if random.random() < 0.001:
+                conn.execute(
+                    delete(RateLimitBucket).where(
+                        RateLimitBucket.updated_at < now - RATE_LIMIT_IDLE_TTL
+                    )
+                )
+        return bool(allowed), tokens
+
+
+def _local_engine():
+    local = create_engine(f"sqlite:///{RATE_LIMIT_LOCAL_PATH}", future=True)
+    RateLimitBucket.__table__.create(local, checkfirst=True)
+    return local
+
+
+_state = {"pid": None, "store": None}
+_state_lock = threading.Lock()
+
+
+def get_store():
+    """Store van dit worker-process (opnieuw na een fork: geen gedeelde verbindingen)."""
+    if _state["pid"] == os.getpid():
+        return _state["store"]
+    with _state_lock:
+        if _state["pid"] != os.getpid():
+            if RATE_LIMIT_STORE == "memory":
+                store = MemoryStore()
+            elif RATE_LIMIT_STORE == "database":
+                store = DatabaseStore(engine)
+            elif RATE_LIMIT_STORE == "local":
+                store = DatabaseStore(_local_engine())
+            else:
+                raise RuntimeError(f"Unknown RATE_LIMIT_STORE: {RATE_LIMIT_STORE}")
+            _state["store"] = store
+            _state["pid"] = os.getpid()
+    return _state["store"]
+
+
+def _identities():
+    user_id = session.get("user_id")
+    if user_id:
+        yield "user", str(user_id)
+    if request.remote_addr:
+        yield "ip", request.remote_addr
+
+
+def check_rate_limit(endpoint):
+    """
+    None als het request door mag, anders de Retry-After in seconden.
+    Alle buckets van het request worden genomen (user én ip).
+    """
+    limits = RATE_LIMITS.get(endpoint)
+    if not limits:
+        return None
+
+    store = get_store()
+    now = time.time()
+    retry_after = None
+    for kind, identity in _identities():
+        if kind not in limits:
+            continue
+        capacity, per_seconds = limits[kind]
+        rate = capacity / per_seconds
+        try:
+            allowed, tokens = store.take(f"{endpoint}:{kind}:{identity}", capacity, rate, now)
+        except Exception:
+            logger.exception("Rate limit store failed, request allowed")
+            return None
+        if not allowed:
+            retry_after = max(retry_after or 0, _retry_after(tokens, rate))
+    return retry_after
+
+
+def too_many_requests(retry_after):
+    """429 met Retry-After: JSON voor de API, platte tekst voor pagina's."""
+    if request.blueprint == "api":
+        from .api import json_response
+        response = json_response({"error": "Too many requests.", "retry_after": retry_after}, status=429)
+    else:
+        response = Response(
+            f"Too many requests. Please try again in {retry_after} seconds.",
+            status=429,
+            mimetype="text/plain",
+        )
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def init_rate_limits(app):
+    if not RATE_LIMIT_ENABLED:
+        return
+
+    @app.before_request
+    def enforce_rate_limit():
+        retry_after = check_rate_limit(request.endpoint)
+        if retry_after is not None:
+            return too_many_requests(retry_after)
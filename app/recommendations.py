@@ -0,0 +1,542 @@
+import heapq
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import joinedload, selectinload
+
+from .supabase_client import engine, get_session
+from .models import (
+    Company,
+    ConsultantProfile,
+    JobPost,
+    JobSkill,
+    ProfileSkill,
+    Recommendation,
+    RecommendationChange,
+    RecommendationRun,
+    RecommendationSubject,
+    UnlockTarget,
+)
+from .invalidation import on_commit
+from .matching import (
+    company_jobs_statement,
+    compute_consultant_relevance,
+    compute_job_relevance,
+    get_unlock_counts,
+    get_unlocked_target_ids,
+    pick_required_job,
+    rank_consultants,
+    rank_jobs,
+)
+from .facets import CONSULTANT_FACETS, JOB_FACETS, grouped_facet_counts
+from .text_similarity import CONSULTANT_DOCUMENT, JOB_DOCUMENT, semantic_scores
+from .skill_similarity import skill_overlap_scores
+
+# ------------------ PRECOMPUTED RECOMMENDATIONS ------------------
+# Nachtelijke batch (flask recommendations compute) die voor elke beschikbare
+# consultant de top-N jobs en voor elke actieve job de top-N consultants
+# berekent, met exact dezelfde scoring als de live relevance.
+#
+# /jobs en /consultants serveren hieruit zolang er geen ad-hoc filters
+# gezet zijn; anders (of als er nog geen resultaat is) wordt live gescoord.
+#
+# De run is een kandidatenlijst, geen eindresultaat: jobs/profielen die sinds
+# de start van de run gewijzigd zijn (recommendation_changes, bijgehouden via
+# de invalidation bus) worden samen met de top-N live gescoord. Zo verschijnen
+# nieuwe jobs/profielen en gewijzigde skills meteen. Is het onderwerp zelf
+# gewijzigd (eigen profiel/job), dan wordt alles live gescoord.
+
+RECOMMENDATIONS_TOP_N = int(os.getenv("RECOMMENDATIONS_TOP_N", "100"))
+RECOMMENDATIONS_CHUNK_SIZE = int(os.getenv("RECOMMENDATIONS_CHUNK_SIZE", "200"))
+# Meer wijzigingen sinds de run dan dit → live scoren i.p.v. bijscoren
+RECOMMENDATIONS_MAX_CHANGES = int(os.getenv("RECOMMENDATIONS_MAX_CHANGES", "1000"))
+
+CHANGE_ENTITIES = ("job_post", "consultant_profile")
+
+logger = logging.getLogger(__name__)
+
+# Kandidaten per worker-process, één keer geladen in _init_worker
+_worker_candidates = {}
+
+
+# ------------------ BATCH (PROCESS POOL) ------------------
+
+def _load_candidates():
+    """
+    Alle actieve jobs en beschikbare consultants (met skills) + unlock counts.
+    Objecten worden losgekoppeld van de sessie, enkel geladen attributen worden gebruikt.
+    """
+    with get_session() as db:
+        jobs = (
+            db.query(JobPost)
+            .options(selectinload(JobPost.skills))
+            .filter(JobPost.is_active == True)
+            .all()
+        )
+        consultants = (
+            db.query(ConsultantProfile)
+            .options(selectinload(ConsultantProfile.skills))
+            .filter(ConsultantProfile.availability == True)
+            .all()
+        )
+        job_unlocks = get_unlock_counts(db, UnlockTarget.job, [j.id for j in jobs])
+        consultant_unlocks = get_unlock_counts(
+            db, UnlockTarget.consultant, [c.id for c in consultants]
+        )
+
+    return {
+        "jobs": {j.id: j for j in jobs},
+        "consultants": {c.id: c for c in consultants},
+        "job_unlocks": job_unlocks,
+        "consultant_unlocks": consultant_unlocks,
+    }
+
+
+def _init_worker():
+    """
+    Draait één keer per worker-process.
+    - Connecties van het parent process niet hergebruiken na fork.
+    - Kandidaten één keer laden i.p.v. per chunk.
+    """
+    engine.dispose(close=False)
+    _worker_candidates.update(_load_candidates())
+
+
+def _top_n(scored, top_n):
+    """(score_data, target_id) tuples -> top-N op score (tiebreaker: laagste id)."""
+    return heapq.nsmallest(top_n, scored, key=lambda item: (-item[0]["total"], item[1]))
+
+
+def _recommendation_rows(generation, subject_type, subject_id, top):
+    return [
+        {
+            "generation": generation,
+            "subject_type": subject_type,
+            "subject_id": subject_id,
+            "target_id": target_id,
+            "rank": rank,
+            "score": data["total"],
+            "skill_factor": data["skill_factor"],
+            "semantic_factor": data["semantic_factor"],
+            "recency_factor": data["recency_factor"],
+            "popularity_factor": data["popularity_factor"],
+            "unlock_count": data["unlock_count"],
+        }
+        for rank, (data, target_id) in enumerate(top, start=1)
+    ]
+
+
+def _write_rows(rows):
+    if not rows:
+        return 0
+    with get_session() as db:
+        db.execute(insert(Recommendation), rows)
+        db.commit()
+    return len(rows)
+
+
+def _jobs_for_consultants_chunk(args):
+    """Top-N jobs voor een chunk consultant-ids."""
+    generation, consultant_ids, top_n, now = args
+    jobs = _worker_candidates["jobs"]
+    consultants = _worker_candidates["consultants"]
+    unlock_counts = _worker_candidates["job_unlocks"]
+
+    rows = []
+    for consultant_id in consultant_ids:
+        profile = consultants.get(consultant_id)
+        if profile is None:
+            continue
+        consultant_skill_ids = {s.id for s in profile.skills}
+        semantic_similarities = semantic_scores(
+            CONSULTANT_DOCUMENT, consultant_id, JOB_DOCUMENT, jobs.keys()
+        )
+        skill_factors = skill_overlap_scores(consultant_skill_ids, jobs.values())
+
+        scored = [
+            (
+                compute_job_relevance(
+                    job=job,
+                    consultant_profile=profile,
+                    consultant_skill_ids=consultant_skill_ids,
+                    text_query=None,
+                    unlock_counts=unlock_counts,
+                    now=now,
+                    semantic_similarities=semantic_similarities,
+                    skill_factors=skill_factors,
+                ),
+                job.id,
+            )
+            for job in jobs.values()
+        ]
+        rows.extend(_recommendation_rows(
+            generation, RecommendationSubject.consultant, consultant_id, _top_n(scored, top_n)
+        ))
+
+    return _write_rows(rows)
+
+
+def _consultants_for_jobs_chunk(args):
+    """Top-N consultants voor een chunk job-ids."""
+    generation, job_ids, top_n, now = args
+    jobs = _worker_candidates["jobs"]
+    consultants = _worker_candidates["consultants"]
+    unlock_counts = _worker_candidates["consultant_unlocks"]
+
+    rows = []
+    for job_id in job_ids:
+        job = jobs.get(job_id)
+        if job is None:
+            continue
+        required_skill_ids = {s.id for s in job.skills}
+        semantic_similarities = semantic_scores(
+            JOB_DOCUMENT, job_id, CONSULTANT_DOCUMENT, consultants.keys()
+        )
+        skill_factors = skill_overlap_scores(required_skill_ids, consultants.values())
+
+        scored = [
+            (
+                compute_consultant_relevance(
+                    profile=profile,
+                    required_job=job,
+                    required_skill_ids=required_skill_ids,
+                    text_query=None,
+                    unlock_counts=unlock_counts,
+                    now=now,
+                    semantic_similarities=semantic_similarities,
+                    skill_factors=skill_factors,
+                ),
+                profile.id,
+            )
+            for profile in consultants.values()
+        ]
+        rows.extend(_recommendation_rows(
+            generation, RecommendationSubject.job, job_id, _top_n(scored, top_n)
+        ))
+
+    return _write_rows(rows)
+
+
+def _chunks(ids, size):
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+def compute_recommendations(workers=None, top_n=RECOMMENDATIONS_TOP_N, chunk_size=RECOMMENDATIONS_CHUNK_SIZE):
+    """
+    Bereken een nieuwe generatie recommendations.
+
+    - Nieuwe generatie wordt pas geserveerd als ze volledig geschreven is
+      (finished_at), oudere generaties worden daarna verwijderd.
+    - Wijzigingen van vóór de start van deze run zitten erin verwerkt en
+      worden opgeruimd.
+    Retourneert (generation, aantal rijen).
+    """
+    with get_session() as db:
+        run = RecommendationRun()
+        db.add(run)
+        db.commit()
+        generation = run.generation
+
+        consultant_ids = [
+            row[0] for row in db.query(ConsultantProfile.id)
+            .filter(ConsultantProfile.availability == True)
+            .order_by(ConsultantProfile.id)
+        ]
+        job_ids = [
+            row[0] for row in db.query(JobPost.id)
+            .filter(JobPost.is_active == True)
+            .order_by(JobPost.id)
+        ]
+
+    now = datetime.now(timezone.utc)
+    total = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for written in pool.map(
+            _jobs_for_consultants_chunk,
+            [(generation, chunk, top_n, now) for chunk in _chunks(consultant_ids, chunk_size)],
+        ):
+            total += written
+        for written in pool.map(
+            _consultants_for_jobs_chunk,
+            [(generation, chunk, top_n, now) for chunk in _chunks(job_ids, chunk_size)],
+        ):
+            total += written
+
+    with get_session() as db:
+        db.query(RecommendationRun).filter_by(generation=generation).update(
+            {"finished_at": datetime.now(timezone.utc)}
+        )
+        db.query(Recommendation).filter(Recommendation.generation < generation).delete(
+            synchronize_session=False
+        )
+        db.query(RecommendationRun).filter(RecommendationRun.generation < generation).delete(
+            synchronize_session=False
+        )
+        started_at = (
+            select(RecommendationRun.started_at)
+            .where(RecommendationRun.generation == generation)
+            .scalar_subquery()
+        )
+        db.query(RecommendationChange).filter(RecommendationChange.changed_at < started_at).delete(
+            synchronize_session=False
+        )
+        db.commit()
+
+    return generation, total
+
+
+recommendations_cli = AppGroup("recommendations", help="Precomputed top-N matches.")
+
+
+@recommendations_cli.command("compute")
+@click.option("--workers", type=int, default=None, help="Aantal processen (default: aantal CPU's).")
+@click.option("--top-n", type=int, default=RECOMMENDATIONS_TOP_N, show_default=True)
+@click.option("--chunk-size", type=int, default=RECOMMENDATIONS_CHUNK_SIZE, show_default=True)
+def compute_command(workers, top_n, chunk_size):
+    """Bereken een nieuwe generatie recommendations (nachtelijke cron job)."""
+    generation, total = compute_recommendations(workers, top_n, chunk_size)
+    click.echo(f"Generation {generation}: {total} recommendations written.")
+
+
+# ------------------ CHANGES SINDS DE RUN ------------------
+
+def record_changes(events):
+    """
+    on_commit hook: gewijzigde jobs/profielen (ook nieuw, gesloten of andere
+    skills) bijhouden, zodat het serveren ze live kan bijscoren. Zonder
+    tabellen (`flask schema create` niet gedraaid) enkel een waarschuwing.
+    """
+    rows = [
+        {"entity": entity, "entity_id": entity_id}
+        for entity, entity_id, _ in events
+        if entity in CHANGE_ENTITIES and entity_id is not None
+    ]
+    if not rows:
+        return
+    with get_session() as db:
+        try:
+            db.execute(insert(RecommendationChange), rows)
+            db.commit()
+        except (OperationalError, ProgrammingError):
+            db.rollback()
+            logger.warning("Recommendation tables missing, changes not recorded")
+
+
+on_commit(record_changes)
+
+
+def _changes_since(run, entity):
+    """Wijzigingen van één entity sinds de start van de run."""
+    # started_at als subquery: vergelijking op de opgeslagen waarden (zelfde klok)
+    started_at = (
+        select(RecommendationRun.started_at)
+        .where(RecommendationRun.generation == run.generation)
+        .scalar_subquery()
+    )
+    return select(RecommendationChange.entity_id).where(
+        RecommendationChange.entity == entity,
+        RecommendationChange.changed_at >= started_at,
+    )
+
+
+def _changed_since(db, run, entity):
+    """
+    {ids} van entity gewijzigd sinds de start van de run, of None bij meer dan
+    RECOMMENDATIONS_MAX_CHANGES (dan is live scoren goedkoper dan bijscoren).
+    """
+    ids = db.execute(
+        _changes_since(run, entity).distinct().limit(RECOMMENDATIONS_MAX_CHANGES + 1)
+    ).scalars().all()
+    if len(ids) > RECOMMENDATIONS_MAX_CHANGES:
+        return None
+    return set(ids)
+
+
+def _is_changed_since(db, run, entity, entity_id):
+    return db.execute(
+        _changes_since(run, entity).where(RecommendationChange.entity_id == entity_id).limit(1)
+    ).first() is not None
+
+
+# ------------------ SERVING ------------------
+
+def current_run(db):
+    """
+    Laatste volledig afgewerkte run, of None. Ook None als de tabellen nog
+    niet bestaan (`flask schema create` niet gedraaid): dan wordt live gescoord.
+    """
+    try:
+        return (
+            db.query(RecommendationRun)
+            .filter(RecommendationRun.finished_at.isnot(None))
+            .order_by(RecommendationRun.generation.desc())
+            .first()
+        )
+    except (OperationalError, ProgrammingError):
+        db.rollback()
+        logger.warning("Recommendation tables missing, serving live results")
+        return None
+
+
+def _target_ids(db, run, subject_type, subject_id):
+    return {
+        row[0] for row in db.query(Recommendation.target_id).filter(
+            Recommendation.generation == run.generation,
+            Recommendation.subject_type == subject_type,
+            Recommendation.subject_id == subject_id,
+        )
+    }
+
+
+def has_adhoc_job_filters(filters):
+    """Filters van /jobs die niet in de voorberekende top-N zitten."""
+    return (
+        filters["sort_by"] != "relevance"
+        or bool(filters["text_query"])
+        or bool(filters["contract_type"])
+        or filters["same_country_only"]
+        or (filters["max_distance_km"] is not None and not filters["ignore_distance"])
+    )
+
+
+def has_adhoc_consultant_filters(filters):
+    """Filters van /consultants die niet in de voorberekende top-N zitten."""
+    return (
+        filters["sort_by"] != "relevance"
+        or bool(filters["text_query"])
+        or filters["min_experience"] is not None
+        or filters["same_country_only"]
+        or filters["max_distance_km"] is not None
+    )
+
+
+def recommended_jobs(db, user, filters):
+    """
+    Top-N jobs in hetzelfde formaat als matching.search_jobs. None → live scoren.
+
+    Kandidaten = top-N van de laatste run + jobs gewijzigd sinds die run,
+    live gescoord. Is het eigen profiel sindsdien gewijzigd, dan live.
+    Facets tellen alle actieve jobs (zoals de live zoekopdracht zonder filters).
+    """
+    if has_adhoc_job_filters(filters):
+        return None
+
+    run = current_run(db)
+    if run is None:
+        return None
+
+    consultant_profile = (
+        db.query(ConsultantProfile)
+        .options(selectinload(ConsultantProfile.skills))
+        .filter(ConsultantProfile.user_id == user.id)
+        .first()
+    )
+    if not consultant_profile:
+        return None
+
+    if _is_changed_since(db, run, "consultant_profile", consultant_profile.id):
+        return None
+    changed_jobs = _changed_since(db, run, "job_post")
+    if changed_jobs is None:
+        return None
+
+    target_ids = _target_ids(db, run, RecommendationSubject.consultant, consultant_profile.id)
+    if not target_ids:
+        return None
+
+    jobs = (
+        db.query(JobPost)
+        .options(joinedload(JobPost.company), selectinload(JobPost.skills))
+        .filter(
+            JobPost.id.in_(target_ids | changed_jobs),
+            JobPost.is_active == True,  # sindsdien gesloten jobs overslaan
+        )
+        .all()
+    )
+    unlocked_job_ids = get_unlocked_target_ids(db, user.id, UnlockTarget.job)
+    unlock_counts = get_unlock_counts(db, UnlockTarget.job, [j.id for j in jobs])
+    ranked = rank_jobs(jobs, filters, consultant_profile, unlocked_job_ids, unlock_counts)
+
+    active_jobs = (
+        select(JobPost.id, JobPost.contract_type, JobPost.country, JobPost.location_city)
+        .where(JobPost.is_active == True)
+        .subquery()
+    )
+    return {
+        "jobs": ranked[:RECOMMENDATIONS_TOP_N],
+        "consultant_profile": consultant_profile,
+        "facets": grouped_facet_counts(db, active_jobs, JOB_FACETS, JobSkill.job_id, JobSkill.skill_id),
+    }
+
+
+def recommended_consultants(db, user, filters):
+    """
+    Top-N consultants voor de gekozen job, in hetzelfde formaat als
+    matching.search_consultants. None → live scoren.
+
+    Kandidaten = top-N van de laatste run + profielen gewijzigd sinds die
+    run, live gescoord. Is de job sindsdien gewijzigd, dan live.
+    """
+    if has_adhoc_consultant_filters(filters):
+        return None
+
+    run = current_run(db)
+    if run is None:
+        return None
+
+    company_profile = db.query(Company).filter_by(user_id=user.id).first()
+    if not company_profile:
+        return None
+
+    company_jobs = db.execute(company_jobs_statement(company_profile.id)).scalars().all()
+    required_job, selected_job_id = pick_required_job(company_jobs, filters["job_id"])
+    if not required_job:
+        return None
+
+    if _is_changed_since(db, run, "job_post", required_job.id):
+        return None
+    changed_consultants = _changed_since(db, run, "consultant_profile")
+    if changed_consultants is None:
+        return None
+
+    target_ids = _target_ids(db, run, RecommendationSubject.job, required_job.id)
+    if not target_ids:
+        return None
+
+    consultants = (
+        db.query(ConsultantProfile)
+        .options(joinedload(ConsultantProfile.user), selectinload(ConsultantProfile.skills))
+        .filter(
+            ConsultantProfile.id.in_(target_ids | changed_consultants),
+            ConsultantProfile.availability == True,  # sindsdien bezette consultants overslaan
+        )
+        .all()
+    )
+    unlocked_profile_ids = get_unlocked_target_ids(db, user.id, UnlockTarget.consultant)
+    unlock_counts = get_unlock_counts(db, UnlockTarget.consultant, [c.id for c in consultants])
+    ranked = rank_consultants(
+        consultants, filters, required_job, unlocked_profile_ids, unlock_counts
+    )
+
+    available_consultants = (
+        select(ConsultantProfile.id, ConsultantProfile.country, ConsultantProfile.location_city)
+        .where(ConsultantProfile.availability == True)
+        .subquery()
+    )
+    return {
+        "consultants": ranked[:RECOMMENDATIONS_TOP_N],
+        "company_jobs": company_jobs,
+        "required_job": required_job,
+        "selected_job_id": selected_job_id,
+        "facets": grouped_facet_counts(
+            db, available_consultants, CONSULTANT_FACETS,
+            ProfileSkill.profile_id, ProfileSkill.skill_id,
+        ),
+    }
@@ -0,0 +1,56 @@
+# ------------------ RELEVANCE GEWICHTEN ------------------
+# Gewichten en zoektekst van de relevance scoring, gedeeld door matching.py
+# (sequentieel) en parallel_scoring.py (vectorieel). Zonder imports uit de
+# app, zodat beide kanten dit op module-niveau kunnen importeren.
+#
+# Gewichten tellen op tot 1.0. De semantische component (TF-IDF, 0.15) is
+# vrijgemaakt uit de andere: skill 0.50 → 0.45, tekst 0.20 → 0.15, recency
+# 0.20 → 0.15 (populariteit blijft 0.10). Skills blijven de grootste factor;
+# tekst (enkel met een zoekterm) en recency (0 na 30 dagen) tellen voor veel
+# kandidaten al niet mee en geven elk 0.05 af. Zo blijft 1.0 het maximum.
+# Gevolg: absolute scores (en rangschikking bij gelijke skills) verschuiven.
+
+CONSULTANT_SKILL_WEIGHT = 0.45
+CONSULTANT_TEXT_WEIGHT = 0.15
+CONSULTANT_SEMANTIC_WEIGHT = 0.15  # TF-IDF: job titel/beschrijving ↔ headline
+CONSULTANT_RECENCY_WEIGHT = 0.15
+CONSULTANT_POPULARITY_WEIGHT = 0.10
+CONSULTANT_MAX_UNLOCKS = 50  # voor normalisatie van popularity
+
+JOB_SKILL_WEIGHT = 0.45
+JOB_TEXT_WEIGHT = 0.15
+JOB_SEMANTIC_WEIGHT = 0.15  # TF-IDF: headline ↔ job titel/beschrijving
+JOB_RECENCY_WEIGHT = 0.15
+JOB_POPULARITY_WEIGHT = 0.10
+JOB_MAX_UNLOCKS = 50  # voor normalisatie van popularity
+
+
+def consultant_search_text(profile):
+    """Velden waarin de zoekterm (q) gezocht wordt, in lowercase."""
+    return " ".join(
+        filter(
+            None,
+            [
+                profile.display_name_masked,
+                profile.headline,
+                profile.location_city,
+                profile.country,
+            ],
+        )
+    ).lower()
+
+
+def job_search_text(job):
+    """Velden waarin de zoekterm (q) gezocht wordt, in lowercase."""
+    return " ".join(
+        filter(
+            None,
+            [
+                job.title,
+                job.description,
+                job.location_city,
+                job.country,
+                job.contract_type,
+            ],
+        )
+    ).lower()
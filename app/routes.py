@@ -1,12 +1,48 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
-from datetime import datetime, timezone
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, Response
+from datetime import datetime, timezone, timedelta
 from functools import wraps
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, case, literal, select, union_all, tuple_
 from sqlalchemy.orm import joinedload, selectinload
 import os
-import mimetypes
-import time
-from .supabase_client import get_session, supabase
+from .supabase_client import get_session
+from .storage import UploadRejected, get_storage, replace_reference, save_upload
+from .profiler import PROFILER_TOKEN_MAX_AGE, get_profiles, get_profile, profiling_token
+from .exports import EXPORT_TABLES, EXPORT_FORMATS, stream_export
+from .matching import (
+    parse_consultant_filters,
+    parse_job_filters,
+    search_consultants,
+    search_jobs,
+)
+from .async_search import (
+    ASYNC_SEARCH,
+    search_consultants_concurrently,
+    search_jobs_concurrently,
+)
+from .recommendations import recommended_consultants, recommended_jobs
+from .dashboard import load_dashboard
+from .saved_searches import (
+    KIND_BY_ROLE,
+    SAVED_SEARCH_LIMIT,
+    refresh_saved_search,
+    remove_saved_search,
+    saved_search_filters,
+    saved_search_items,
+    saved_searches_overview,
+)
+from .archive import (
+    archived_jobs_statement,
+    delete_archived_job,
+    find_job,
+    has_collaborated,
+    restore_job,
+)
+from .collaborations import (
+    JOB_UNAVAILABLE,
+    CollaborationConflict,
+    end_collaborations,
+    start_collaboration,
+)
 from .models import (
     User,
     ConsultantProfile,
@@ -18,24 +54,15 @@ from .models import (
     UnlockTarget,
     Collaboration,
     CollaborationStatus,
+    ArchivedCollaboration,
+    ArchivedJobPost,
+    SavedSearch,
+    SavedSearchKind,
 )
 import requests
-from math import radians, sin, cos, sqrt, atan2
 
 MAPBOX_TOKEN = os.getenv("MAPBOX_TOKEN")
 
-CONSULTANT_SKILL_WEIGHT = 0.50
-CONSULTANT_TEXT_WEIGHT = 0.20
-CONSULTANT_RECENCY_WEIGHT = 0.20
-CONSULTANT_POPULARITY_WEIGHT = 0.10
-CONSULTANT_MAX_UNLOCKS = 50  # voor normalisatie van popularity
-
-JOB_SKILL_WEIGHT = 0.50
-JOB_TEXT_WEIGHT = 0.20
-JOB_RECENCY_WEIGHT = 0.20
-JOB_POPULARITY_WEIGHT = 0.10
-JOB_MAX_UNLOCKS = 50  # voor normalisatie van popularity
-
 POSSIBLE_CONTRACT_TYPES = [
     ("Freelance", "Freelance"),
     ("Full-time", "Full-time"),
@@ -46,30 +73,6 @@ POSSIBLE_CONTRACT_TYPES = [
 
 # ------------------ MAPBOX HELPERS ------------------
 
-def haversine_km(lat1, lon1, lat2, lon2):
-    """
-    Bereken afstand in km tussen twee (lat, lon) punten met de Haversine-formule.
-
-    Wordt gebruikt om consultants en jobs binnen een bepaalde radius te filteren.
-    """
-    try:
-        lat1 = float(lat1)
-        lon1 = float(lon1)
-        lat2 = float(lat2)
-        lon2 = float(lon2)
-    except (TypeError, ValueError):
-        return None
-
-    R = 6371.0  # straal aarde in km
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-
-    return R * c  # km
-
-
 def geocode_with_mapbox(city, country):
     """
     Geocode 'stad, land' naar (lat, lon) met Mapbox.
@@ -109,45 +112,6 @@ def geocode_with_mapbox(city, country):
 
 # ------------------ SUPABASE STORAGE HELPER ------------------
 
-def upload_file_to_bucket(file_obj, bucket_name, folder="uploads"):
-    """
-    Uploads een file naar Supabase Storage en geeft de public URL terug.
-    - Leest de file uit request.files
-    - Bepaalt het content-type
-    - Gebruikt een unieke bestandsnaam met timestamp
-
-    Retourneert:
-        - public URL (string) als upload slaagt
-        - None bij fouten
-    """
-    try:
-        # Unieke filename: timestamp_original_filename
-        filename = f"{int(time.time())}_{file_obj.filename.replace(' ', '_')}"
-        file_path = f"{folder}/{filename}"
-
-        # Bepaal content type (image/jpeg, application/pdf, ...)
-        content_type = mimetypes.guess_type(file_obj.filename)[0] or "application/octet-stream"
-
-        # File bytes lezen
-        file_data = file_obj.read()
-
-        # Upload naar Supabase
-        supabase.storage.from_(bucket_name).upload(
-            file_path,
-            file_data,
-            {"content-type": content_type}
-        )
-
-        # Public URL ophalen
-        public_url_response = supabase.storage.from_(bucket_name).get_public_url(file_path)
-
-        return public_url_response
-
-    except Exception as e:
-        print(f"Upload error: {e}")
-        return None
-
-
 # ------------------ BLUEPRINT & GENERIC HELPERS ------------------
 
 main = Blueprint("main", __name__)
@@ -269,41 +233,6 @@ def get_all_skills(db, ordered=True):
     return q.all()
 
 
-def get_unlock_counts(db, target_type, target_ids):
-    """
-    Centraliseer unlock-count aggregatie (popularity) voor relevance.
-    Geeft dict terug: {target_id: count}
-    """
-    if not target_ids:
-        return {}
-
-    unlock_rows = (
-        db.query(Unlock.target_id, func.count(Unlock.id))
-        .filter(
-            Unlock.target_type == target_type,
-            Unlock.target_id.in_(target_ids),
-        )
-        .group_by(Unlock.target_id)
-        .all()
-    )
-    return {target_id: count for target_id, count in unlock_rows}
-
-
-def apply_relevance_scoring(items, scoring_fn):
-    """
-    Centraliseer: score berekenen + score velden zetten + sorteren.
-    scoring_fn(item) moet score_data dict returnen met key 'total'.
-    """
-    scored_items = []
-    for item in items:
-        score_data = scoring_fn(item)
-        item.score = score_data["total"]
-        item.score_breakdown = score_data
-        scored_items.append(item)
-
-    return sorted(scored_items, key=lambda x: x.score, reverse=True)
-
-
 def is_unlocked(db, unlocking_user_id, target_type, target_id):
     """
     Check of een user de contactgegevens van een bepaald target al heeft 'unlocked'.
@@ -324,246 +253,30 @@ def is_unlocked(db, unlocking_user_id, target_type, target_id):
     )
 
 
-def check_profile_completion(user, profile, company):
+def check_profile_completion(role, completion):
     """
     Toont waarschuwingen (flash) als een profiel onvolledig is.
 
+    completion komt uit dashboard.profile_completion:
     - Voor consultants: headline, years_experience, locatie, skills, foto, CV, naam.
     - Voor companies: company name, locatie.
     """
-    missing_fields = []
-    edit_target = 'profile'  # Default target: Edit Profile
-
-    if user.role == UserRole.consultant:
-        if not profile:
-            return
-
-        # 1. Essentiële Matching Velden
-        if not profile.headline or profile.headline.strip() == "":
-            missing_fields.append("Headline")
-        if profile.years_experience is None:
-            missing_fields.append("Years of experience")
-        if not profile.location_city or profile.location_city.strip() == "":
-            missing_fields.append("City")
-        if not profile.country or profile.country.strip() == "":
-            missing_fields.append("Country")
-
-        # 2. Skills
-        if not profile.skills:
-            missing_fields.append("Skills")
-            edit_target = 'skills'
-
-        # 3. Profielkwaliteit
-        if not profile.profile_image:
-            missing_fields.append("Profile Picture")
-        if not profile.cv_document:
-            missing_fields.append("CV Document")
-
-        # 4. Volledige naam
-        if not profile.display_name_masked or profile.display_name_masked.strip() == "":
-            missing_fields.append("Full Name")
-
-        if missing_fields:
-            fields_str = ", ".join(missing_fields)
-            flash(
-                f"Your profile is incomplete! Please update the following details for better matching: {fields_str}.",
-                f"warning-link-{edit_target}"
-            )
-
-    elif user.role == UserRole.company:
-        if not company:
-            return
-
-        if not company.company_name_masked or company.company_name_masked.strip() == "":
-            missing_fields.append("Company Name")
-        if not company.location_city or company.location_city.strip() == "":
-            missing_fields.append("City")
-        if not company.country or company.country.strip() == "":
-            missing_fields.append("Country")
-
-        if missing_fields:
-            fields_str = ", ".join(missing_fields)
-            flash(
-                f"Your company profile is incomplete! Please update the following details: {fields_str}.",
-                "warning-link-profile"
-            )
+    if not completion:
+        return
 
+    missing_fields, edit_target = completion
+    fields_str = ", ".join(missing_fields)
 
-# ------------------ RELEVANCE SCORE HELPERS ------------------
-# Deze helpers maken de matching beter uitbreidbaar/scalable:
-# als je later de scoring wilt aanpassen, kan dat centraal hier.
-
-def compute_consultant_relevance(
-    profile,
-    required_job,
-    required_skill_ids,
-    text_query,
-    unlock_counts,
-    now,
-):
-    """
-    Bereken relevance-score voor een consultant vanuit een geselecteerde JobPost.
-
-    Let op: deze functie verandert NIETS aan het gedrag t.o.v. de oude inline code,
-    alleen gestructureerd in een helper voor schaalbaarheid.
-    """
-    if not required_job:
-        # Geen job → geen relevance mogelijk
-        return {
-            "total": 0.0,
-            "skill": 0.0,
-            "text": 0.0,
-            "recency": 0.0,
-            "popularity": 0.0,
-            "skill_factor": 0.0,
-            "text_factor": 0.0,
-            "recency_factor": 0.0,
-            "popularity_factor": 0.0,
-            "unlock_count": 0,
-        }
-
-    # A. Skills
-    consultant_skill_ids = {s.id for s in profile.skills}
-    matched = len(consultant_skill_ids & required_skill_ids)
-    max_skills = max(len(required_skill_ids), 1)
-    skill_similarity = matched / max_skills
-    skill_weighted_score = skill_similarity * CONSULTANT_SKILL_WEIGHT
-
-    # B. Text match (eenvoudig: substring zoekterm in combinatie van velden)
-    text_match = 0
-    if text_query:
-        text_fields = " ".join(
-            filter(
-                None,
-                [
-                    profile.display_name_masked,
-                    profile.headline,
-                    profile.location_city,
-                    profile.country,
-                ],
-            )
+    if role == UserRole.consultant:
+        flash(
+            f"Your profile is incomplete! Please update the following details for better matching: {fields_str}.",
+            f"warning-link-{edit_target}"
         )
-        if text_query.lower() in text_fields.lower():
-            text_match = 1
-    text_weighted_score = text_match * CONSULTANT_TEXT_WEIGHT
-
-    # C. Recency (nieuwere profielen scoren hoger)
-    days_old = (now - profile.created_at).days
-    recency_factor = max(0, 1 - days_old / 30)  # binnen 30 dagen → tot 1.0
-    recency_weighted_score = recency_factor * CONSULTANT_RECENCY_WEIGHT
-
-    # D. Populariteit (aantal unlocks, genormaliseerd met CONSULTANT_MAX_UNLOCKS)
-    unlock_count = unlock_counts.get(profile.id, 0)
-    popularity_factor = min(unlock_count / CONSULTANT_MAX_UNLOCKS, 1.0)
-    popularity_weighted_score = popularity_factor * CONSULTANT_POPULARITY_WEIGHT
-
-    final_score = (
-        skill_weighted_score
-        + text_weighted_score
-        + recency_weighted_score
-        + popularity_weighted_score
-    )
-
-    return {
-        "total": final_score,
-        "skill": skill_weighted_score,
-        "text": text_weighted_score,
-        "recency": recency_weighted_score,
-        "popularity": popularity_weighted_score,
-        "skill_factor": skill_similarity,
-        "text_factor": text_match,
-        "recency_factor": recency_factor,
-        "popularity_factor": popularity_factor,
-        "unlock_count": unlock_count,
-    }
-
-
-def compute_job_relevance(
-    job,
-    consultant_profile,
-    consultant_skill_ids,
-    text_query,
-    unlock_counts,
-    now,
-):
-    """
-    Bereken relevance-score voor een JobPost vanuit een consultant-profiel.
-
-    Houdt rekening met:
-    - Skill overlap
-    - Tekst-match
-    - Recency
-    - Populariteit (unlocks)
-    """
-    if not consultant_profile:
-        return {
-            "total": 0.0,
-            "skill": 0.0,
-            "text": 0.0,
-            "recency": 0.0,
-            "popularity": 0.0,
-            "skill_factor": 0.0,
-            "text_factor": 0.0,
-            "recency_factor": 0.0,
-            "popularity_factor": 0.0,
-            "unlock_count": 0,
-        }
-
-    # A. Skills
-    job_skill_ids = {s.id for s in job.skills}
-    matched = len(job_skill_ids & consultant_skill_ids)
-    max_skills = max(len(consultant_skill_ids), 1)
-    skill_similarity = matched / max_skills
-    skill_weighted_score = skill_similarity * JOB_SKILL_WEIGHT
-
-    # B. Text match
-    text_match = 0
-    if text_query:
-        text_fields = " ".join(
-            filter(
-                None,
-                [
-                    job.title,
-                    job.description,
-                    job.location_city,
-                    job.country,
-                    job.contract_type,
-                ],
-            )
+    elif role == UserRole.company:
+        flash(
+            f"Your company profile is incomplete! Please update the following details: {fields_str}.",
+            "warning-link-profile"
         )
-        if text_query.lower() in text_fields.lower():
-            text_match = 1
-    text_weighted_score = text_match * JOB_TEXT_WEIGHT
-
-    # C. Recency
-    days_old = (now - job.created_at).days
-    recency_factor = max(0, 1 - days_old / 30)
-    recency_weighted_score = recency_factor * JOB_RECENCY_WEIGHT
-
-    # D. Populariteit (unlocks)
-    unlock_count = unlock_counts.get(job.id, 0)
-    popularity_factor = min(unlock_count / JOB_MAX_UNLOCKS, 1.0)
-    popularity_weighted_score = popularity_factor * JOB_POPULARITY_WEIGHT
-
-    total = (
-        skill_weighted_score
-        + text_weighted_score
-        + recency_weighted_score
-        + popularity_weighted_score
-    )
-
-    return {
-        "total": total,
-        "skill": skill_weighted_score,
-        "text": text_weighted_score,
-        "recency": recency_weighted_score,
-        "popularity": popularity_weighted_score,
-        "skill_factor": skill_similarity,
-        "text_factor": text_match,
-        "recency_factor": recency_factor,
-        "popularity_factor": popularity_factor,
-        "unlock_count": unlock_count,
-    }
 
 
 # ------------------ HOME ------------------
@@ -604,6 +317,12 @@ def company_jobs_list():
             .filter(JobPost.company_id == company.id)
         )
 
+        # Gearchiveerde jobs blijven zichtbaar voor de eigenaar
+        archived_stmt = archived_jobs_statement(company.id).options(
+            joinedload(ArchivedJobPost.hired_consultant),
+            selectinload(ArchivedJobPost.skills),
+        )
+
         # Eenvoudige text search op title/description
         if q:
             query = query.filter(
@@ -612,8 +331,17 @@ def company_jobs_list():
                     JobPost.description.ilike(f"%{q}%"),
                 )
             )
+            archived_stmt = archived_stmt.where(
+                or_(
+                    ArchivedJobPost.title.ilike(f"%{q}%"),
+                    ArchivedJobPost.description.ilike(f"%{q}%"),
+                )
+            )
 
         jobs = query.order_by(JobPost.created_at.desc()).all()
+        archived_jobs = db.execute(archived_stmt).scalars().all()
+        if archived_jobs:
+            jobs = sorted(jobs + archived_jobs, key=lambda job: job.created_at, reverse=True)
 
         all_skills = []  
 
@@ -753,75 +481,17 @@ def dashboard():
             flash("Please log in to view your dashboard.")
             return redirect(url_for("main.login"))
 
-        profile = None
-        company = None
-        company_jobs = []
-        company_active_collaborations = []
-        consultant_active_collaborations = []
-
-        if user.role == UserRole.consultant:
-            profile = (
-                db.query(ConsultantProfile)
-                .options(selectinload(ConsultantProfile.skills))  # template gebruikt profile.skills
-                .filter_by(user_id=user.id)
-                .first()
-            )
-
-            if profile:
-                consultant_active_collaborations = (
-                    db.query(Collaboration)
-                    .options(
-                        joinedload(Collaboration.company)  # template gebruikt collab.company.company_name_masked
-                    )
-                    .filter(
-                        Collaboration.consultant_id == profile.id,
-                        Collaboration.status == CollaborationStatus.active,
-                    )
-                    .order_by(Collaboration.started_at.desc())
-                    .all()
-                )
-
-        elif user.role == UserRole.company:
-            company = db.query(Company).filter_by(user_id=user.id).first()
-
-            if company:
-                # Je toont company_jobs niet in dashboard.html, dus dit mag je zelfs weglaten.
-                # Als je het toch wil blijven doorgeven: hired_consultant is dan ook niet nodig
-                # tenzij je die in template toont.
-                company_jobs = (
-                    db.query(JobPost)
-                    .filter(JobPost.company_id == company.id)
-                    .order_by(JobPost.created_at.desc())
-                    .all()
-                )
-
-                company_active_collaborations = (
-                    db.query(Collaboration)
-                    .options(
-                        joinedload(Collaboration.consultant),  # template gebruikt collab.consultant.*
-                    )
-                    .filter(
-                        Collaboration.status == CollaborationStatus.active,
-                        or_(
-                            Collaboration.company_id == company.id,
-                            Collaboration.job_post.has(JobPost.company_id == company.id),
-                        ),
-                    )
-                    .order_by(Collaboration.started_at.desc())
-                    .all()
-                )
-
-        check_profile_completion(user, profile, company)
+        # Eén query per rol, kort gecachet per user (zie dashboard.py)
+        summary = load_dashboard(db, user.id, user.role.value)
+        check_profile_completion(user.role, summary["completion"])
 
         return render_template(
             "dashboard.html",
             user=user,
-            profile=profile,
-            company=company,
+            profile=summary["profile"],
+            company=summary["profile"] if user.role == UserRole.company else None,
             UserRole=UserRole,
-            company_jobs=company_jobs,
-            company_active_collaborations=company_active_collaborations,
-            consultant_active_collaborations=consultant_active_collaborations,
+            collaborations=summary["collaborations"],
         )
 
 # ------------------ CONSULTANTS ------------------
@@ -882,45 +552,40 @@ def edit_consultant_profile():
             # - lopende collaborations worden beëindigd
             # - current_company wordt losgekoppeld
             if (not was_available_before) and profile.availability:
-                now = datetime.now(timezone.utc)
-                active_collabs = (
-                    db.query(Collaboration)
-                    .filter(
-                        Collaboration.consultant_id == profile.id,
-                        Collaboration.status == CollaborationStatus.active,
-                    )
-                    .all()
-                )
-                for c in active_collabs:
-                    c.status = CollaborationStatus.ended
-                    c.ended_at = now
-
-                profile.current_company_id = None
+                end_collaborations(db, profile.id)
 
             # Locatie laten geocoden voor afstandsfilters
             lat, lon = geocode_with_mapbox(profile.location_city, profile.country)
             profile.latitude = lat
             profile.longitude = lon
 
-            bucket_name = os.getenv("SUPABASE_BUCKET_NAME", "iconsult-assets")
-
-            # -- Profielfoto upload (Supabase) --
+            # -- Profielfoto upload (storage backend) --
             file = request.files.get("profile_image")
             if file and file.filename != "":
-                public_url = upload_file_to_bucket(file, bucket_name, folder="profile_images")
-                if public_url:
-                    profile.profile_image = public_url
+                try:
+                    public_url = save_upload(db, file, "profile_images")
+                except UploadRejected as rejected:
+                    flash(f"Profile image not saved: {rejected}", "error")
                 else:
-                    flash("Failed to upload profile image.", "error")
+                    if public_url:
+                        replace_reference(db, profile.profile_image, public_url)
+                        profile.profile_image = public_url
+                    else:
+                        flash("Failed to upload profile image.", "error")
 
-            # -- CV upload (Supabase) --
+            # -- CV upload (storage backend) --
             cv_file = request.files.get("cv_document")
             if cv_file and cv_file.filename != "":
-                public_url = upload_file_to_bucket(cv_file, bucket_name, folder="cv_documents")
-                if public_url:
-                    profile.cv_document = public_url
+                try:
+                    public_url = save_upload(db, cv_file, "cv_documents")
+                except UploadRejected as rejected:
+                    flash(f"CV not saved: {rejected}", "error")
                 else:
-                    flash("Failed to upload CV.", "error")
+                    if public_url:
+                        replace_reference(db, profile.cv_document, public_url)
+                        profile.cv_document = public_url
+                    else:
+                        flash("Failed to upload CV.", "error")
 
             db.commit()
             flash("Profile updated successfully")
@@ -933,6 +598,24 @@ def edit_consultant_profile():
         )
 
 
+@main.route("/uploads/<path:key>")
+def uploaded_file(key):
+    """
+    Uploads van de lokale storage backend (STORAGE_BACKEND=local).
+    Range requests en conditional headers via send_file; 404 voor Supabase.
+    """
+    return get_storage().serve(key)
+
+
+@main.route("/uploads/direct/<token>", methods=["PUT"])
+def direct_upload(token):
+    """
+    Stand-in storage server voor direct uploads (STORAGE_BACKEND=local):
+    de browser PUT het bestand hierheen met het token van /api/v1/uploads/sign.
+    """
+    return get_storage().receive(token, request.stream)
+
+
 @main.route("/consultant/skills/edit", methods=["GET", "POST"])
 def edit_consultant_skills():
     """
@@ -1021,15 +704,7 @@ def consultant_detail(profile_id):
                 company = db.query(Company).filter_by(user_id=user.id).first()
 
                 if company:
-                    collab_exists = (
-                        db.query(Collaboration)
-                        .filter(
-                            Collaboration.company_id == company.id,
-                            Collaboration.consultant_id == profile.id,
-                        )
-                        .first()
-                        is not None
-                    )
+                    collab_exists = has_collaborated(db, company.id, profile.id)
 
                     if collab_exists:
                         is_unlocked_status = True
@@ -1067,6 +742,8 @@ def consultants_list():
     - Handmatige filters (skills, city, country, min_experience).
     - Locatiefilter (max_distance_km, same_country_only) o.b.v. job-locatie.
     - Relevance-sorting o.b.v. geselecteerde job (skills, tekst, recency, popularity).
+
+    De filter- en scoringlogica zit in matching.search_consultants.
     """
     with get_session() as db:
         user = get_current_user(db)
@@ -1079,227 +756,37 @@ def consultants_list():
         if guard:
             return guard
 
-        sort_by = request.args.get("sort_by", "relevance")
-
-        # Skills-filter (IDs uit query string)
-        query_skills = request.args.getlist("skills")
-        if query_skills:
-            query_skills = list(map(int, query_skills))
-
-        city = request.args.get("city")
-        country = request.args.get("country")
-        text_query = request.args.get("q", None)
-
-        # Min. jaren ervaring
-        min_experience_raw = (request.args.get("min_experience") or "").strip()
-        min_experience = None
-        if min_experience_raw:
-            try:
-                min_experience = int(min_experience_raw)
-            except ValueError:
-                min_experience = None
-
-        # Locatie-filters
-        max_distance_raw = (request.args.get("max_distance_km", "") or "").strip()
-        max_distance_km = None
-        if max_distance_raw != "":
-            try:
-                val = float(max_distance_raw)
-                if val > 0:
-                    max_distance_km = val
-            except ValueError:
-                max_distance_km = None
-
-        same_country_only = request.args.get("same_country_only") == "1"
-
-        # Expliciet gekozen job voor relevance matching
-        selected_job_id = request.args.get("job_id", type=int)
-
-        # Company-profiel ophalen (o.a. voor jobs & land)
-        company_profile = db.query(Company).filter_by(user_id=user.id).first()
+        filters = parse_consultant_filters(request.args)
+        sort_by = filters["sort_by"]
 
-        required_job = None
-        required_skill_ids = set()
-        company_jobs = []
-
-        if company_profile:
-            company_jobs = (
-                db.query(JobPost)
-                .options(selectinload(JobPost.skills))
-                .filter(
-                    JobPost.company_id == company_profile.id,
-                    JobPost.is_active == True
-                )
-                .order_by(JobPost.created_at.desc())
-                .all()
-            )
-
-            # Probeer eerst job_id uit query
-            if selected_job_id:
-                required_job = next(
-                    (job for job in company_jobs if job.id == selected_job_id),
-                    None,
-                )
-
-            if required_job and not selected_job_id:
-                selected_job_id = required_job.id
-
-            # Geen geldige gekozen job → fallback naar nieuwste job (ook actief)
-            if not required_job and company_jobs:
-                required_job = company_jobs[0]
-
-            if required_job and not selected_job_id:
-                selected_job_id = required_job.id
-
-            if required_job:
-                required_skill_ids = {s.id for s in required_job.skills}
+        # Voorberekende top-N (nachtelijke batch) als er geen ad-hoc filters zijn
+        result = recommended_consultants(db, user, filters)
+        if result is not None:
+            all_skills = get_all_skills(db, ordered=True)
+        elif ASYNC_SEARCH:
+            result = search_consultants_concurrently(user, filters, with_skills=True, facets=True)
+            all_skills = result["skills"]
+        else:
+            result = search_consultants(db, user, filters, facets=True)
+            all_skills = get_all_skills(db, ordered=True)
 
         # In relevance-modus moet er een (actieve) job zijn
-        if not required_job and sort_by == "relevance":
+        if not result["required_job"] and sort_by == "relevance":
             flash(
                 "First, create an active Job Post (or select one) "
                 "to enable the IConsult relevance filter based on your needs."
             )
 
-        # same_country_only moet op basis van de job-locatie werken (zelfde referentie als distance)
-        country_source = None
-        if required_job and required_job.country:
-            country_source = required_job.country
-        elif company_profile and company_profile.country:
-            country_source = company_profile.country
-
-        company_country = (country_source or "").strip().lower() if country_source else None
-
-        # Origin-coördinaten voor afstandsfilter: job-locatie
-        origin_lat = None
-        origin_lon = None
-
-        if max_distance_km is not None and required_job:
-            origin_lat = required_job.latitude
-            origin_lon = required_job.longitude
-
-            # ✅ STRICT: als afstandsfilter actief is maar job heeft geen coords → geen consultants tonen
-            if origin_lat is None or origin_lon is None:
-                consultants = []
-                return render_template(
-                    "consultant_list.html",
-                    consultants=consultants,
-                    skills=get_all_skills(db, ordered=True),
-                    user=user,
-                    sort_by=sort_by,
-                    company_jobs=company_jobs,
-                    selected_job_id=selected_job_id,
-                    UserRole=UserRole,
-                )
-
-        # Basisquery
-        query = (
-            db.query(ConsultantProfile)
-            .options(
-                joinedload(ConsultantProfile.user),
-                selectinload(ConsultantProfile.skills),
-            )
-            .filter(ConsultantProfile.availability == True)
-        )
-
-        if min_experience is not None:
-            query = query.filter(ConsultantProfile.years_experience >= min_experience)
-
-        # ✅ Backend filtering voor same_country_only (niet aan distance/geocode komen)
-        if same_country_only and company_country:
-            query = query.filter(func.lower(ConsultantProfile.country) == company_country)
-
-        # Handmatige filters gelden alleen als niet 'relevance'
-        if sort_by != "relevance":
-            if city:
-                query = query.filter(ConsultantProfile.location_city.ilike(f"%{city}%"))
-            if country:
-                query = query.filter(ConsultantProfile.country.ilike(f"%{country}%"))
-            if query_skills:
-                for skill_id in query_skills:
-                    query = query.filter(
-                        ConsultantProfile.skills.any(Skill.id == skill_id)
-                    )
-
-        consultants = query.all()
-
-        # Locatie-filter (afstand tot job) — bewust Python-level laten (distance/geocode met rust laten)
-        filtered_consultants = []
-        for profile in consultants:
-            if (
-                max_distance_km is not None
-                and origin_lat is not None
-                and origin_lon is not None
-            ):
-                prof_lat = getattr(profile, "latitude", None)
-                prof_lon = getattr(profile, "longitude", None)
-
-                if prof_lat is None or prof_lon is None:
-                    continue
-
-                distance = haversine_km(origin_lat, origin_lon, prof_lat, prof_lon)
-                profile.distance_km = distance
-
-                if distance is None or distance > max_distance_km:
-                    continue
-
-            filtered_consultants.append(profile)
-
-        consultants = filtered_consultants
-
-        # Unlock-status voor huidige company
-        unlocked_profile_ids = set()
-        if user and user.role == UserRole.company:
-            unlocked_profiles_rows = (
-                db.query(Unlock.target_id)
-                .filter(
-                    Unlock.user_id == user.id,
-                    Unlock.target_type == UnlockTarget.consultant,
-                )
-                .all()
-            )
-            unlocked_profile_ids = {row[0] for row in unlocked_profiles_rows}
-
-        for consultant in consultants:
-            consultant.is_unlocked_for_me = consultant.id in unlocked_profile_ids
-
-        # Relevance sorting
-        if sort_by == "relevance":
-            now = datetime.now(timezone.utc)
-
-            consultant_ids = [c.id for c in consultants]
-            unlock_counts = get_unlock_counts(db, UnlockTarget.consultant, consultant_ids)
-
-            consultants = apply_relevance_scoring(
-                consultants,
-                lambda consultant: compute_consultant_relevance(
-                    profile=consultant,
-                    required_job=required_job,
-                    required_skill_ids=required_skill_ids,
-                    text_query=text_query,
-                    unlock_counts=unlock_counts,
-                    now=now,
-                )
-            )
-
-        elif sort_by == "title":
-            consultants = sorted(
-                consultants,
-                key=lambda c: c.display_name_masked
-                if c.display_name_masked
-                else c.user.username,
-            )
-
-        all_skills = get_all_skills(db, ordered=True)
-
         return render_template(
             "consultant_list.html",
-            consultants=consultants,
+            consultants=result["consultants"],
             skills=all_skills,
             user=user,
             sort_by=sort_by,
-            company_jobs=company_jobs,
-            selected_job_id=selected_job_id,
+            company_jobs=result["company_jobs"],
+            selected_job_id=result["selected_job_id"],
+            facets=result["facets"],
+            saved_searches=saved_searches_overview(db, user.id),
             UserRole=UserRole,
         )
 
@@ -1501,41 +988,21 @@ def collaborate_with_consultant(profile_id):
                 )
             return redirect(url_for("main.consultant_detail", profile_id=profile_id))
 
-        # Optioneel koppelen aan job
-        job = None
-        if job_id:
-            job = (
-                db.query(JobPost)
-                .filter(
-                    JobPost.id == job_id,
-                    JobPost.company_id == company.id,
+        # Consultant blokkeren en (optioneel) ENKEL de gekozen job sluiten,
+        # in één transactie: faalt als een andere company net voor was.
+        try:
+            start_collaboration(db, company.id, profile.id, job_id=job_id or None)
+        except CollaborationConflict as conflict:
+            if conflict.reason == JOB_UNAVAILABLE:
+                flash(
+                    "Selected job not found, not owned by your company or already filled.",
+                    "error",
                 )
-                .first()
-            )
-            if not job:
-                flash("Selected job not found or not owned by your company.", "error")
-                return redirect(url_for("main.consultant_detail", profile_id=profile_id))
-
-        collab = Collaboration(
-            company_id=company.id,
-            consultant_id=profile.id,
-            job_post_id=job.id if job else None,
-            status=CollaborationStatus.active,
-        )
-        db.add(collab)
-
-        # Consultant blokkeren
-        profile.availability = False
-        profile.current_company_id = company.id
-
-        # 🔹 Hier wordt ENKEL de gekozen job gesloten
-        if job:
-            job.is_active = False
-            job.hired_consultant_id = profile.id
-
-        db.commit()
+            else:
+                flash("This consultant is currently not available.", "error")
+            return redirect(url_for("main.consultant_detail", profile_id=profile_id))
 
-        if job:
+        if job_id:
             flash(
                 
                     "You are now collaborating with this consultant on the selected job. "
@@ -1553,9 +1020,9 @@ def collaborate_with_consultant(profile_id):
             )
 
         # Terug naar detail, mét job_id voor duidelijkheid
-        if job:
+        if job_id:
             return redirect(
-                url_for("main.consultant_detail", profile_id=profile.id, job_id=job.id)
+                url_for("main.consultant_detail", profile_id=profile_id, job_id=job_id)
             )
         return redirect(url_for("main.consultant_detail", profile_id=profile.id))
 
@@ -1665,39 +1132,18 @@ def collaborate_on_job(job_id):
             flash("First unlock this job before starting a collaboration.", "error")
             return redirect(url_for("main.job_detail", job_id=job_id))
 
-        collab = Collaboration(
-            company_id=job.company_id,
-            consultant_id=profile.id,
-            job_post_id=job.id,
-            status=CollaborationStatus.active,
-        )
-        db.add(collab)
-
-        # Job sluiten + consultant unavailable maken
-        job.is_active = False
-        job.hired_consultant_id = profile.id
-
-        profile.availability = False
-        profile.current_company_id = job.company_id
-
-        # Company krijgt automatische unlock op deze consultant
-        company_user_id = job.company.user_id if job.company else None
-        if company_user_id:
-            already_unlocked = is_unlocked(
-                db,
-                company_user_id,
-                UnlockTarget.consultant,
-                profile.id,
+        # Job sluiten + consultant unavailable maken + automatische unlock voor
+        # de company, in één transactie (faalt als iemand anders net voor was)
+        try:
+            start_collaboration(
+                db, job.company_id, profile.id, job_id=job.id, auto_unlock=True
             )
-            if not already_unlocked:
-                auto_unlock = Unlock(
-                    user_id=company_user_id,
-                    target_type=UnlockTarget.consultant,
-                    target_id=profile.id,
-                )
-                db.add(auto_unlock)
-
-        db.commit()
+        except CollaborationConflict as conflict:
+            if conflict.reason == JOB_UNAVAILABLE:
+                flash("This job is no longer available.", "error")
+            else:
+                flash("You are currently marked as unavailable.", "error")
+            return redirect(url_for("main.job_detail", job_id=job_id))
 
         flash(
             
@@ -1720,6 +1166,8 @@ def jobs_list():
     - Filters: skills, locatie, contract_type, tekst.
     - Locatie-filters o.b.v. consultant-locatie.
     - Relevance-sorting via compute_job_relevance.
+
+    De filter- en scoringlogica zit in matching.search_jobs.
     """
     with get_session() as db:
         user = get_current_user(db)
@@ -1732,165 +1180,31 @@ def jobs_list():
         if guard:
             return guard
 
-        sort_by = request.args.get("sort_by", "relevance")
-
-        query_skills = request.args.getlist("skills")
-        if query_skills:
-            query_skills = list(map(int, query_skills))
-
-        city = request.args.get("city")
-        country = request.args.get("country")
-        contract_type = request.args.get("contract_type")
-        text_query = request.args.get("q", None)
-
-        # Locatie-filters (afstand, zelfde land)
-        max_distance_raw = (request.args.get("max_distance_km", "") or "").strip()
-        max_distance_km = None
-        if max_distance_raw != "":
-            try:
-                val = float(max_distance_raw)
-                if val > 0:
-                    max_distance_km = val
-            except ValueError:
-                max_distance_km = None
-
-        ignore_distance = request.args.get("ignore_distance") == "1"
-        same_country_only = request.args.get("same_country_only") == "1"
-
-        # Consultant-profiel voor skills + locatie
-        consultant_profile = (
-            db.query(ConsultantProfile)
-            .options(selectinload(ConsultantProfile.skills))
-            .filter(ConsultantProfile.user_id == user.id)
-            .first()
-        )
-        consultant_skill_ids = set()
-        if consultant_profile:
-            consultant_skill_ids = {s.id for s in consultant_profile.skills}
-
-        consultant_lat = (
-            getattr(consultant_profile, "latitude", None) if consultant_profile else None
-        )
-        consultant_lon = (
-            getattr(consultant_profile, "longitude", None)
-            if consultant_profile
-            else None
-        )
-        consultant_country = (
-            (consultant_profile.country or "").strip().lower()
-            if consultant_profile and consultant_profile.country
-            else None
-        )
-
-        # Basisquery:
-        query = (
-            db.query(JobPost)
-            .options(
-                joinedload(JobPost.company),
-                selectinload(JobPost.skills),
-            )
-            .filter(JobPost.is_active == True)
-        )
-
-        # Contracttype filter ALTIJD toepassen
-        if contract_type:
-            query = query.filter(JobPost.contract_type == contract_type)
-
-        # ✅ Backend filtering voor same_country_only 
-        if same_country_only and consultant_country:
-            query = (
-                query.join(JobPost.company)
-                .filter(func.lower(func.coalesce(JobPost.country, Company.country)) == consultant_country)
-            )
-
-        # Overige manual filters niet in relevance-modus
-        if sort_by != "relevance":
-            if city:
-                query = query.filter(JobPost.location_city.ilike(f"%{city}%"))
-            if country:
-                query = query.filter(JobPost.country.ilike(f"%{country}%"))
-            if query_skills:
-                for skill_id in query_skills:
-                    query = query.filter(JobPost.skills.any(Skill.id == skill_id))
-
-        jobs = query.all()
-
-        # Locatie-filter: afstand tot consultant 
-        filtered_jobs = []
-        for job in jobs:
-            # Afstand via job-coördinaten
-            if (
-                not ignore_distance
-                and max_distance_km is not None
-                and consultant_lat is not None
-                and consultant_lon is not None
-            ):
-                job_lat = getattr(job, "latitude", None)
-                job_lon = getattr(job, "longitude", None)
-
-                if job_lat is None or job_lon is None:
-                    continue
-
-                distance = haversine_km(
-                    consultant_lat, consultant_lon, job_lat, job_lon
-                )
-                if distance is None or distance > max_distance_km:
-                    continue
-
-            filtered_jobs.append(job)
+        filters = parse_job_filters(request.args)
 
-        jobs = filtered_jobs
-
-        # Unlock status ophalen (welke jobs heeft deze consultant al unlocked?)
-        job_ids_unlocked_by_user = set()
-        if user and user.role == UserRole.consultant:
-            unlocked_jobs = (
-                db.query(Unlock.target_id)
-                .filter(
-                    Unlock.user_id == user.id,
-                    Unlock.target_type == UnlockTarget.job,
-                )
-                .all()
-            )
-            job_ids_unlocked_by_user = {row[0] for row in unlocked_jobs}
-
-        for job in jobs:
-            job.is_unlocked_for_me = job.id in job_ids_unlocked_by_user
-
-        # Relevance sorting (via helper)
-        if sort_by == "relevance":
-            now = datetime.now(timezone.utc)
-            job_ids = [j.id for j in jobs]
-
-            unlock_counts = get_unlock_counts(db, UnlockTarget.job, job_ids)
-
-            jobs = apply_relevance_scoring(
-                jobs,
-                lambda job: compute_job_relevance(
-                    job=job,
-                    consultant_profile=consultant_profile,
-                    consultant_skill_ids=consultant_skill_ids,
-                    text_query=text_query,
-                    unlock_counts=unlock_counts,
-                    now=now,
-                )
-            )
-
-        elif sort_by == "title":
-            jobs = sorted(jobs, key=lambda j: j.title or "")
-
-        all_skills = get_all_skills(db, ordered=True)
+        # Voorberekende top-N (nachtelijke batch) als er geen ad-hoc filters zijn
+        result = recommended_jobs(db, user, filters)
+        if result is not None:
+            all_skills = get_all_skills(db, ordered=True)
+        elif ASYNC_SEARCH:
+            result = search_jobs_concurrently(user, filters, with_skills=True, facets=True)
+            all_skills = result["skills"]
+        else:
+            result = search_jobs(db, user, filters, facets=True)
+            all_skills = get_all_skills(db, ordered=True)
 
         possible_contract_types = POSSIBLE_CONTRACT_TYPES
 
         return render_template(
             "job_list.html",
-            jobs=jobs,
+            jobs=result["jobs"],
             skills=all_skills,
             user=user,
-            sort_by=sort_by,
+            sort_by=filters["sort_by"],
             possible_contract_types=possible_contract_types,
-            current_contract_type=contract_type,
+            current_contract_type=filters["contract_type"],
+            facets=result["facets"],
+            saved_searches=saved_searches_overview(db, user.id),
             simple_search=False,
             show_mode_selector=True,
             UserRole=UserRole,
@@ -1906,7 +1220,8 @@ def job_detail(job_id):
     with get_session() as db:
         user = get_current_user(db)
 
-        job = db.query(JobPost).filter(JobPost.id == job_id).first()
+        # ook gearchiveerde jobs (enkel nog zichtbaar voor de eigenaar)
+        job = find_job(db, job_id)
         job, guard = get_or_redirect(
             job,
             ("Job not found"),
@@ -2041,7 +1356,7 @@ def job_edit(job_id):
         if guard:
             return guard
 
-        job = db.query(JobPost).filter_by(id=job_id, company_id=company.id).first()
+        job = find_job(db, job_id, company.id)
         job, guard = get_or_redirect(
             job,
             ("Job not found or you are not the owner"),
@@ -2055,6 +1370,10 @@ def job_edit(job_id):
         possible_contract_types = POSSIBLE_CONTRACT_TYPES
 
         if request.method == "POST":
+            # gearchiveerde job eerst terug naar job_posts
+            if isinstance(job, ArchivedJobPost):
+                job = restore_job(db, job)
+
             job.title = request.form.get("title")
             job.description = request.form.get("description")
             city = request.form.get("location_city")
@@ -2113,7 +1432,7 @@ def job_delete(job_id):
         if guard:
             return guard
 
-        job = db.query(JobPost).filter_by(id=job_id, company_id=company.id).first()
+        job = find_job(db, job_id, company.id)
         job, guard = get_or_redirect(
             job,
             ("Job not found or you are not the owner"),
@@ -2122,12 +1441,120 @@ def job_delete(job_id):
         if guard:
             return guard
 
-        db.delete(job)
+        if isinstance(job, ArchivedJobPost):
+            delete_archived_job(db, job)
+        else:
+            db.delete(job)
         db.commit()
         flash("Job deleted")
         return redirect(url_for("main.company_jobs_list"))
 
 
+# ------------------ SAVED SEARCHES ------------------
+
+def get_own_saved_search(db, user, search_id):
+    saved = db.get(SavedSearch, search_id)
+    if not user or not saved or saved.user_id != user.id:
+        return None
+    return saved
+
+
+@main.route("/saved-searches", methods=["POST"])
+def create_saved_search():
+    """
+    Huidige filters van /jobs (consultant) of /consultants (company) bewaren.
+    Het resultaat wordt meteen berekend en daarna incrementeel bijgehouden.
+    """
+    with get_session() as db:
+        user = get_current_user(db)
+        if not user or user.role not in KIND_BY_ROLE:
+            flash("Only consultants and companies can save searches.")
+            return redirect(url_for("main.dashboard"))
+
+        kind = KIND_BY_ROLE[user.role]
+        list_endpoint = "main.jobs_list" if kind == SavedSearchKind.jobs else "main.consultants_list"
+
+        count = db.query(SavedSearch).filter(SavedSearch.user_id == user.id).count()
+        if count >= SAVED_SEARCH_LIMIT:
+            flash(f"You can keep at most {SAVED_SEARCH_LIMIT} saved searches.", "error")
+            return redirect(url_for(list_endpoint))
+
+        saved = SavedSearch(
+            user_id=user.id,
+            kind=kind,
+            name=(request.form.get("name") or "").strip()[:120] or "Saved search",
+            query=(request.form.get("query") or "").lstrip("?"),
+            last_viewed_at=func.now(),
+        )
+        db.add(saved)
+        db.flush()
+        refresh_saved_search(db, saved)
+        db.commit()
+
+        flash("Search saved")
+        return redirect(url_for("main.saved_search_detail", search_id=saved.id))
+
+
+@main.route("/saved-searches/<int:search_id>", methods=["GET"])
+def saved_search_detail(search_id):
+    """
+    Voorberekend resultaat van een saved search (geen zoekquery), met
+    "N new since last visit". Zet last_viewed_at op nu.
+    """
+    with get_session() as db:
+        user = get_current_user(db)
+        saved, guard = get_or_redirect(
+            get_own_saved_search(db, user, search_id),
+            "Saved search not found",
+            "main.dashboard",
+        )
+        if guard:
+            return guard
+
+        filters = saved_search_filters(saved)
+        items = saved_search_items(db, saved)
+        new_count = sum(1 for item in items if item.is_new)
+
+        saved.last_viewed_at = func.now()
+        db.commit()
+
+        common = dict(
+            saved_search=saved,
+            new_count=new_count,
+            user=user,
+            UserRole=UserRole,
+        )
+        if saved.kind == SavedSearchKind.jobs:
+            return render_template(
+                "job_list.html",
+                jobs=items,
+                sort_by=filters["sort_by"],
+                show_mode_selector=False,
+                simple_search=False,
+                **common,
+            )
+        return render_template(
+            "consultant_list.html",
+            consultants=items,
+            sort_by=filters["sort_by"],
+            selected_job_id=filters["job_id"],
+            **common,
+        )
+
+
+@main.route("/saved-searches/<int:search_id>/delete", methods=["POST"])
+def delete_saved_search(search_id):
+    with get_session() as db:
+        user = get_current_user(db)
+        saved = get_own_saved_search(db, user, search_id)
+        if saved:
+            remove_saved_search(db, saved)
+            db.commit()
+            flash("Saved search deleted")
+        endpoint = "main.consultants_list" if user and user.role == UserRole.company else "main.jobs_list"
+        return redirect(url_for(endpoint))
+
+
 
 # ------------------ ADMIN DECORATOR ------------------
 
@@ -2151,6 +1578,90 @@ def admin_required(f):
     return decorated_function
 
 
+# ------------------ ADMIN HELPERS ------------------
+
+ADMIN_PAGE_SIZE = 25
+
+
+def parse_date_arg(value):
+    """'YYYY-MM-DD' uit de querystring -> datetime, of None bij lege/ongeldige waarde."""
+    try:
+        return datetime.strptime((value or "").strip(), "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def parse_datetime_arg(value):
+    """ISO-timestamp uit de querystring (keyset cursor) -> datetime of None."""
+    try:
+        return datetime.fromisoformat((value or "").strip())
+    except ValueError:
+        return None
+
+
+def get_company_stats(db, company_ids):
+    """
+    Aggregeer per company: actieve jobs, inactieve jobs en collaborations.
+
+    Jobs en collaborations worden via UNION ALL in één GROUP BY geteld,
+    zodat er nooit job-rijen (met lange descriptions) naar Python komen.
+    Geeft dict terug: {company_id: {"active_jobs", "inactive_jobs", "collaborations"}}
+    """
+    if not company_ids:
+        return {}
+
+    job_rows = select(
+        JobPost.company_id.label("company_id"),
+        case((JobPost.is_active == True, 1), else_=0).label("active_jobs"),
+        case((JobPost.is_active == True, 0), else_=1).label("inactive_jobs"),
+        literal(0).label("collaborations"),
+    ).where(JobPost.company_id.in_(company_ids))
+
+    collab_rows = select(
+        Collaboration.company_id.label("company_id"),
+        literal(0).label("active_jobs"),
+        literal(0).label("inactive_jobs"),
+        literal(1).label("collaborations"),
+    ).where(Collaboration.company_id.in_(company_ids))
+
+    # gearchiveerde jobs (altijd inactief) en collaborations tellen mee
+    archived_job_rows = select(
+        ArchivedJobPost.company_id.label("company_id"),
+        literal(0).label("active_jobs"),
+        literal(1).label("inactive_jobs"),
+        literal(0).label("collaborations"),
+    ).where(ArchivedJobPost.company_id.in_(company_ids))
+
+    archived_collab_rows = select(
+        ArchivedCollaboration.company_id.label("company_id"),
+        literal(0).label("active_jobs"),
+        literal(0).label("inactive_jobs"),
+        literal(1).label("collaborations"),
+    ).where(ArchivedCollaboration.company_id.in_(company_ids))
+
+    rows = union_all(job_rows, collab_rows, archived_job_rows, archived_collab_rows).subquery()
+
+    stats = (
+        db.query(
+            rows.c.company_id,
+            func.sum(rows.c.active_jobs),
+            func.sum(rows.c.inactive_jobs),
+            func.sum(rows.c.collaborations),
+        )
+        .group_by(rows.c.company_id)
+        .all()
+    )
+
+    return {
+        company_id: {
+            "active_jobs": int(active or 0),
+            "inactive_jobs": int(inactive or 0),
+            "collaborations": int(collabs or 0),
+        }
+        for company_id, active, inactive, collabs in stats
+    }
+
+
 # ------------------ ADMIN CONSULTANTS ------------------
 
 @main.route("/admin/consultants")
@@ -2178,30 +1689,73 @@ def admin_consultants():
 @admin_required
 def admin_companies():
     """
-    Admin-overzicht van companies + hun jobs.
-    - Jobs worden gegroepeerd per company_id.
-    - Simpele text search op company_name_masked.
+    Admin-overzicht van companies + tellers van hun jobs.
+    - Zoeken (q op company_name_masked) en pagineren gebeurt in SQL.
+    - Active/inactive jobs en collaborations per company komen uit één GROUP BY,
+      enkel voor de companies op de huidige pagina.
+    - Job details worden pas per company geladen (admin_company_jobs).
     """
-    q = request.args.get("q", "").lower()
+    q = request.args.get("q", "").strip()
+    page = max(request.args.get("page", 1, type=int) or 1, 1)
 
     with get_session() as db:
-        companies = db.query(Company).all()
-        jobs = db.query(JobPost).all()
+        query = db.query(Company.id, Company.company_name_masked)
 
-    jobs_by_company = {}
-    for job in jobs:
-        jobs_by_company.setdefault(job.company_id, []).append(job)
+        if q:
+            query = query.filter(Company.company_name_masked.ilike(f"%{q}%"))
 
-    if q:
-        companies = [
-            c for c in companies
-            if q in (c.company_name_masked or "").lower()
-        ]
+        total = query.count()
+        companies = (
+            query.order_by(Company.company_name_masked, Company.id)
+            .offset((page - 1) * ADMIN_PAGE_SIZE)
+            .limit(ADMIN_PAGE_SIZE)
+            .all()
+        )
+
+        stats_by_company = get_company_stats(db, [c.id for c in companies])
 
     return render_template(
         "admin_companies.html",
         companies=companies,
-        jobs_by_company=jobs_by_company
+        stats_by_company=stats_by_company,
+        page=page,
+        has_next=page * ADMIN_PAGE_SIZE < total,
+        total=total,
+        q=q,
+    )
+
+
+@main.route("/admin/companies/<int:company_id>/jobs")
+@login_required
+@admin_required
+def admin_company_jobs(company_id):
+    """
+    HTML-fragment met de jobs van één company (lazy geladen vanuit admin_companies).
+    - Enkel de getoonde kolommen, geen descriptions.
+    """
+    page = max(request.args.get("page", 1, type=int) or 1, 1)
+
+    with get_session() as db:
+        # hot + gearchiveerde jobs in één gesorteerde lijst
+        rows = union_all(
+            select(JobPost.id, JobPost.title, JobPost.is_active, JobPost.created_at)
+            .where(JobPost.company_id == company_id),
+            select(ArchivedJobPost.id, ArchivedJobPost.title, ArchivedJobPost.is_active, ArchivedJobPost.created_at)
+            .where(ArchivedJobPost.company_id == company_id),
+        ).subquery()
+        jobs = db.execute(
+            select(rows)
+            .order_by(rows.c.created_at.desc(), rows.c.id.desc())
+            .offset((page - 1) * ADMIN_PAGE_SIZE)
+            .limit(ADMIN_PAGE_SIZE + 1)
+        ).all()
+
+    return render_template(
+        "admin_company_jobs.html",
+        jobs=jobs[:ADMIN_PAGE_SIZE],
+        company_id=company_id,
+        page=page,
+        has_next=len(jobs) > ADMIN_PAGE_SIZE,
     )
 
 
@@ -2212,39 +1766,111 @@ def admin_companies():
 @admin_required
 def admin_collaborations():
     """
-    Admin-overzicht van alle Collaborations.
-    - Optionele zoekterm q op consultantnaam, companynaam of jobtitel.
+    Admin-overzicht van alle Collaborations (ook gearchiveerde).
+    - Eén joined projectie-query met enkel de getoonde kolommen (geen lazy loads).
+    - Filters: zoekterm q (consultant, company, jobtitel), status en periode (started_at).
+    - Keyset-paginatie op (started_at, id), max ADMIN_PAGE_SIZE rijen per pagina.
     """
     q = request.args.get("q", "").lower()
+    status = request.args.get("status") or None
+    date_from = parse_date_arg(request.args.get("date_from"))
+    date_to = parse_date_arg(request.args.get("date_to"))
+
+    # Keyset cursor: laatste (started_at, id) van de vorige pagina
+    before = parse_datetime_arg(request.args.get("before"))
+    before_id = request.args.get("before_id", type=int)
+
+    if status not in CollaborationStatus.__members__:
+        status = None
+
+    def collaboration_rows(model):
+        """Status, periode en cursor per tabel, zodat elke tak zijn indexen gebruikt."""
+        stmt = select(
+            model.id,
+            model.status,
+            model.started_at,
+            model.consultant_id,
+            model.company_id,
+            model.job_post_id,
+        )
+        if status:
+            stmt = stmt.where(model.status == CollaborationStatus[status])
+        if date_from:
+            stmt = stmt.where(model.started_at >= date_from)
+        if date_to:
+            stmt = stmt.where(model.started_at < date_to + timedelta(days=1))
+        if before is not None and before_id is not None:
+            stmt = stmt.where(tuple_(model.started_at, model.id) < tuple_(before, before_id))
+        return stmt
 
     with get_session() as db:
+        # hot + gearchiveerde collaborations in één gesorteerde lijst
+        collabs = union_all(
+            collaboration_rows(Collaboration), collaboration_rows(ArchivedCollaboration)
+        ).subquery()
+        # de job kan zelf ook gearchiveerd zijn
+        job_title = func.coalesce(JobPost.title, ArchivedJobPost.title)
         query = (
-            db.query(Collaboration)
-            .order_by(Collaboration.started_at.desc())
+            select(
+                collabs.c.id,
+                collabs.c.status,
+                collabs.c.started_at,
+                ConsultantProfile.display_name_masked.label("consultant_name"),
+                Company.company_name_masked.label("company_name"),
+                job_title.label("job_title"),
+            )
+            .join(ConsultantProfile, collabs.c.consultant_id == ConsultantProfile.id)
+            .join(Company, collabs.c.company_id == Company.id)
+            .outerjoin(JobPost, collabs.c.job_post_id == JobPost.id)
+            .outerjoin(ArchivedJobPost, collabs.c.job_post_id == ArchivedJobPost.id)
         )
 
         if q:
-            query = (
-                query.join(Collaboration.consultant)
-                     .join(Collaboration.company)
-                     .outerjoin(Collaboration.job_post)
-                     .filter(
-                        or_(
-                            func.lower(ConsultantProfile.display_name_masked).like(f"%{q}%"),
-                            func.lower(Company.company_name_masked).like(f"%{q}%"),
-                            func.lower(JobPost.title).like(f"%{q}%")
-                        )
-                     )
+            query = query.where(
+                or_(
+                    func.lower(ConsultantProfile.display_name_masked).like(f"%{q}%"),
+                    func.lower(Company.company_name_masked).like(f"%{q}%"),
+                    func.lower(job_title).like(f"%{q}%")
+                )
             )
 
-        collaborations = query.all()
+        rows = db.execute(
+            query.order_by(collabs.c.started_at.desc(), collabs.c.id.desc())
+            .limit(ADMIN_PAGE_SIZE + 1)
+        ).all()
 
-        return render_template(
-            "admin_collaborations.html",
-            collaborations=collaborations,
-            q=q
+    collaborations = rows[:ADMIN_PAGE_SIZE]
+
+    filters = {
+        "q": q or None,
+        "status": status,
+        "date_from": request.args.get("date_from") or None,
+        "date_to": request.args.get("date_to") or None,
+    }
+
+    next_url = None
+    if len(rows) > ADMIN_PAGE_SIZE:
+        last = collaborations[-1]
+        next_url = url_for(
+            "main.admin_collaborations",
+            before=last.started_at.isoformat(),
+            before_id=last.id,
+            **filters,
         )
 
+    first_url = url_for("main.admin_collaborations", **filters) if before else None
+
+    return render_template(
+        "admin_collaborations.html",
+        collaborations=collaborations,
+        q=q,
+        status=status,
+        date_from=filters["date_from"] or "",
+        date_to=filters["date_to"] or "",
+        next_url=next_url,
+        first_url=first_url,
+    )
+
 
 # ------------------ ADMIN DASHBOARD ------------------
 
@@ -2253,7 +1879,113 @@ def admin_collaborations():
 @admin_required
 def admin_dashboard():
     """Startpagina voor admin-sectie."""
-    return render_template("admin_dashboard.html")
+    return render_template(
+        "admin_dashboard.html",
+        profile_count=len(get_profiles()),
+        export_tables=list(EXPORT_TABLES),
+    )
+
+
+# ------------------ ADMIN EXPORTS ------------------
+
+@main.route("/admin/export/<table>")
+@login_required
+@admin_required
+def admin_export(table):
+    """
+    Streaming export van een admin-tabel als CSV (default) of NDJSON (?format=ndjson).
+    - Rijen komen via een server-side cursor binnen en worden meteen doorgestuurd.
+    """
+    fmt = request.args.get("format", "csv")
+
+    if table not in EXPORT_TABLES or fmt not in EXPORT_FORMATS:
+        flash("Unknown export.")
+        return redirect(url_for("main.admin_dashboard"))
+
+    filename = f"{table}-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{fmt}"
+
+    return Response(
+        stream_export(table, fmt),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            # nginx/proxies niet laten bufferen, anders geen early first byte
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+# ------------------ ADMIN PROFILER ------------------
+
+@main.route("/admin/profiles")
+@login_required
+@admin_required
+def admin_profiles():
+    """
+    Overzicht van de laatst geprofilede requests (ring buffer).
+    - Profilen: voeg ?_profile=1 toe aan een URL (of header X-Profile: 1).
+    - ?token_for=<username>: kortlevend token waarmee die user zijn eigen
+      requests kan laten profilen (?_profile=<token>).
+    """
+    token_for = request.args.get("token_for", "").strip()
+    token = None
+    if token_for:
+        with get_session() as db:
+            target = db.query(User).filter_by(username=token_for).first()
+        if target:
+            token = profiling_token(target.id)
+        else:
+            flash("User not found.")
+
+    return render_template(
+        "admin_profiles.html",
+        profiles=get_profiles(),
+        token_for=token_for,
+        token=token,
+        token_minutes=PROFILER_TOKEN_MAX_AGE // 60,
+    )
+
+
+@main.route("/admin/profiles/<int:profile_id>")
+@login_required
+@admin_required
+def admin_profile_detail(profile_id):
+    """Breakdown van één profiel: Python / SQL / template + top queries."""
+    profile, guard = get_or_redirect(
+        get_profile(profile_id),
+        ("Profile not found (it may have been rotated out)."),
+        "main.admin_profiles",
+    )
+    if guard:
+        return guard
+
+    return render_template(
+        "admin_profile_detail.html",
+        profile=profile,
+        top_sql=profile.top_sql(),
+        top_stacks=profile.stacks.most_common(15),
+    )
+
+
+@main.route("/admin/profiles/<int:profile_id>/folded")
+@login_required
+@admin_required
+def admin_profile_folded(profile_id):
+    """
+    Download van de stacks in folded formaat,
+    bruikbaar in flamegraph.pl of https://www.speedscope.app.
+    """
+    profile = get_profile(profile_id)
+    if not profile:
+        return Response("Profile not found", status=404, mimetype="text/plain")
+
+    return Response(
+        profile.folded(),
+        mimetype="text/plain",
+        headers={
+            "Content-Disposition": f"attachment; filename=profile-{profile.id}.folded"
+        },
+    )
 
 
 @main.route("/vision")
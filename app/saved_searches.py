@@ -0,0 +1,486 @@
+import logging
+import os
+import time
+from urllib.parse import parse_qsl, urlencode
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, delete, func, insert, select, tuple_, update
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import joinedload, selectinload
+from werkzeug.datastructures import MultiDict
+
+from .supabase_client import get_session
+from .invalidation import on_commit
+from .matching import (
+    consultant_country_reference,
+    consultant_location,
+    consultant_matches,
+    get_unlock_counts,
+    get_unlocked_target_ids,
+    job_matches,
+    parse_consultant_filters,
+    parse_job_filters,
+    pick_required_job,
+    rank_consultants,
+    rank_jobs,
+    search_consultants,
+    search_jobs,
+)
+from .models import (
+    Company,
+    ConsultantProfile,
+    JobPost,
+    SavedSearch,
+    SavedSearchChange,
+    SavedSearchKind,
+    SavedSearchResult,
+    Unlock,
+    UnlockTarget,
+    User,
+    UserRole,
+)
+
+# ------------------ SAVED SEARCHES ------------------
+# Een company (/consultants) of consultant (/jobs) bewaart een filtercombinatie.
+# Het resultaat (ids + score) staat in saved_search_results en wordt
+# incrementeel bijgehouden, zodat openen enkel een lookup is:
+#
+# - bij bewaren (en `flask saved-searches refresh`): volledige run via
+#   search_jobs / search_consultants (zelfde resultaat als de live pagina);
+#   de gekozen job van een consultant-search wordt vastgepind (job_id).
+# - na elke commit met gewijzigde jobs/profielen (invalidation.on_commit,
+#   enkel in het schrijvende process) komen hun ids in saved_search_changes;
+#   het request zelf doet verder niets.
+# - `flask saved-searches apply` (worker, --interval) claimt de wachtrij per
+#   batch: enkel die entiteiten worden in het geheugen getest tegen de
+#   predicates van elke saved search (matching.job_matches /
+#   consultant_matches) en gescoord; rijen worden toegevoegd, bijgewerkt of
+#   verwijderd. De context van de searches (profielen, companies en hun jobs,
+#   unlocks) wordt per batch met één query per soort geladen.
+# - wijzigt het onderwerp van een search zelf (de vastgepinde job, of het
+#   profiel van de consultant die zoekt), dan wordt die search volledig herberekend.
+#
+# matched_at = eerste keer in het resultaat; "N new since last visit" telt
+# de rijen met matched_at > last_viewed_at.
+
+KIND_BY_ROLE = {
+    UserRole.consultant: SavedSearchKind.jobs,
+    UserRole.company: SavedSearchKind.consultants,
+}
+SAVED_SEARCH_LIMIT = 20  # per user
+SAVED_SEARCH_BATCH_SIZE = int(os.getenv("SAVED_SEARCH_BATCH_SIZE", "1000"))  # wijzigingen per transactie
+
+logger = logging.getLogger(__name__)
+
+CHANGE_ENTITIES = ("job_post", "consultant_profile")
+
+
+def saved_search_args(saved):
+    return MultiDict(parse_qsl(saved.query or "", keep_blank_values=True))
+
+
+def saved_search_filters(saved):
+    args = saved_search_args(saved)
+    if saved.kind == SavedSearchKind.jobs:
+        return parse_job_filters(args)
+    return parse_consultant_filters(args)
+
+
+def _plain(breakdown):
+    """score_breakdown als JSON (numpy scalars van de parallelle scoring → Python)."""
+    return {key: value.item() if hasattr(value, "item") else value for key, value in breakdown.items()}
+
+
+def _result_rows(saved, filters, items):
+    """{target_id: rij voor saved_search_results} van de (gerangschikte) items."""
+    relevance = filters["sort_by"] == "relevance"
+    return {
+        item.id: {
+            "saved_search_id": saved.id,
+            "target_id": item.id,
+            "score": item.score if relevance else None,
+            "score_breakdown": _plain(item.score_breakdown) if relevance else None,
+        }
+        for item in items
+    }
+
+
+def _existing_results(db, search_ids, target_ids=None):
+    """{saved_search_id: {target_id}} (enkel target_ids, None = alle), in één query."""
+    stmt = select(SavedSearchResult.saved_search_id, SavedSearchResult.target_id).where(
+        SavedSearchResult.saved_search_id.in_(search_ids)
+    )
+    if target_ids is not None:
+        stmt = stmt.where(SavedSearchResult.target_id.in_(target_ids))
+    existing = {search_id: set() for search_id in search_ids}
+    for search_id, target_id in db.execute(stmt):
+        existing[search_id].add(target_id)
+    return existing
+
+
+def _write_results(db, results):
+    """
+    results: [(saved_search_id, rijen van _result_rows, bestaande target_ids)].
+    Niet meer matchend → weg, nog matchend → score bijwerken, nieuw →
+    invoegen; voor alle searches samen in (ten hoogste) drie statements.
+    """
+    stale, kept, new = [], [], []
+    for search_id, rows, existing in results:
+        stale += [(search_id, target_id) for target_id in existing - rows.keys()]
+        kept += [rows[target_id] for target_id in existing & rows.keys()]
+        new += [row for target_id, row in rows.items() if target_id not in existing]
+
+    if stale:
+        db.execute(
+            delete(SavedSearchResult).where(
+                tuple_(SavedSearchResult.saved_search_id, SavedSearchResult.target_id).in_(stale)
+            )
+        )
+    if kept:
+        db.execute(update(SavedSearchResult), kept)  # bulk UPDATE op primary key
+    if new:
+        db.execute(insert(SavedSearchResult), new)  # matched_at = now()
+
+
+# ------------------ VOLLEDIG HERBEREKENEN ------------------
+
+def refresh_saved_search(db, saved):
+    """Volledige run (zoals de live pagina) en het resultaat opslaan. Commit niet."""
+    user = db.get(User, saved.user_id)
+    filters = saved_search_filters(saved)
+
+    if saved.kind == SavedSearchKind.jobs:
+        items = search_jobs(db, user, filters)["jobs"]
+    else:
+        result = search_consultants(db, user, filters)
+        items = result["consultants"]
+        args = saved_search_args(saved)
+        if not args.get("job_id") and result["selected_job_id"]:
+            # de job waarop gematcht wordt vastpinnen (geen fallback meer later)
+            args["job_id"] = str(result["selected_job_id"])
+            saved.query = urlencode(list(args.items(multi=True)))
+
+    existing = _existing_results(db, [saved.id])[saved.id]
+    _write_results(db, [(saved.id, _result_rows(saved, filters, items), existing)])
+    saved.refreshed_at = func.now()
+
+
+def refresh_all(kind=None):
+    """Alle saved searches (van één kind) volledig herberekenen. Retourneert het aantal."""
+    with get_session() as db:
+        stmt = select(SavedSearch)
+        if kind is not None:
+            stmt = stmt.where(SavedSearch.kind == kind)
+        searches = db.execute(stmt).scalars().all()
+        for saved in searches:
+            refresh_saved_search(db, saved)
+            db.commit()
+    return len(searches)
+
+
+# ------------------ INCREMENTEEL ------------------
+
+def queue_changes(events):
+    """
+    on_commit hook: gewijzigde jobs/profielen in de wachtrij zetten (geen
+    verwerking). Zonder tabel (`flask schema create` niet gedraaid) enkel een waarschuwing.
+    """
+    rows = [
+        {"entity": entity, "entity_id": entity_id}
+        for entity, entity_id, _ in events
+        if entity in CHANGE_ENTITIES and entity_id is not None
+    ]
+    if not rows:
+        return
+    with get_session() as db:
+        try:
+            db.execute(insert(SavedSearchChange), rows)
+            db.commit()
+        except (OperationalError, ProgrammingError):
+            db.rollback()
+            logger.warning("Saved search tables missing, changes not queued")
+
+
+on_commit(queue_changes)
+
+
+def _claim_changes(db, limit):
+    """
+    Oudste wachtende wijzigingen uit de wachtrij halen (DELETE ... RETURNING).
+    Zonder commit (fout) staan ze na de rollback gewoon terug.
+    """
+    oldest = (
+        select(SavedSearchChange.id)
+        .order_by(SavedSearchChange.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)  # Postgres: workers blokkeren elkaar niet
+    )
+    return db.execute(
+        delete(SavedSearchChange)
+        .where(SavedSearchChange.id.in_(oldest))
+        .returning(SavedSearchChange.entity, SavedSearchChange.entity_id)
+    ).all()
+
+
+def _unlocked_by_user(db, user_ids, target_type, target_ids):
+    """{user_id: {target_id}} beperkt tot target_ids, in één query."""
+    unlocked = {}
+    rows = db.execute(
+        select(Unlock.user_id, Unlock.target_id).where(
+            Unlock.user_id.in_(user_ids),
+            Unlock.target_type == target_type,
+            Unlock.target_id.in_(target_ids),
+        )
+    )
+    for user_id, target_id in rows:
+        unlocked.setdefault(user_id, set()).add(target_id)
+    return unlocked
+
+
+def _update_job_searches(db, searches, job_ids, profile_ids):
+    """Gewijzigde jobs testen tegen de job-searches van consultants."""
+    profiles = {}
+    for profile in (
+        db.query(ConsultantProfile)
+        .options(selectinload(ConsultantProfile.skills))
+        .filter(ConsultantProfile.user_id.in_({s.user_id for s in searches}))
+        .order_by(ConsultantProfile.id)
+    ):
+        profiles.setdefault(profile.user_id, profile)
+
+    incremental = []
+    for saved in searches:
+        profile = profiles.get(saved.user_id)
+        if profile is not None and profile.id in profile_ids:
+            # eigen profiel (skills, locatie) gewijzigd → alles herberekenen
+            refresh_saved_search(db, saved)
+        else:
+            incremental.append(saved)
+    if not job_ids or not incremental:
+        return
+
+    jobs = (
+        db.query(JobPost)
+        .options(joinedload(JobPost.company), selectinload(JobPost.skills))
+        .filter(JobPost.id.in_(job_ids))
+        .all()
+    )
+    unlock_counts = get_unlock_counts(db, UnlockTarget.job, list(job_ids))
+    unlocked = _unlocked_by_user(db, {s.user_id for s in incremental}, UnlockTarget.job, job_ids)
+    existing = _existing_results(db, [s.id for s in incremental], job_ids)
+
+    results = []
+    for saved in incremental:
+        filters = saved_search_filters(saved)
+        profile = profiles.get(saved.user_id)
+        lat, lon, country = consultant_location(profile)
+        matching = [job for job in jobs if job_matches(job, filters, country, lat, lon)]
+        ranked = rank_jobs(
+            matching, filters, profile, unlocked.get(saved.user_id, set()), unlock_counts
+        )
+        results.append((saved.id, _result_rows(saved, filters, ranked), existing[saved.id]))
+    _write_results(db, results)
+
+
+def _company_contexts(db, searches):
+    """{user_id: (company, actieve jobs nieuwste eerst)} in twee queries."""
+    companies = {}
+    for company in (
+        db.query(Company)
+        .filter(Company.user_id.in_({s.user_id for s in searches}))
+        .order_by(Company.id)
+    ):
+        companies.setdefault(company.user_id, company)
+
+    jobs_by_company = {company.id: [] for company in companies.values()}
+    if jobs_by_company:
+        jobs = db.execute(
+            select(JobPost)
+            .options(selectinload(JobPost.skills))
+            .where(JobPost.company_id.in_(jobs_by_company), JobPost.is_active == True)
+            .order_by(JobPost.created_at.desc())
+        ).scalars()
+        for job in jobs:
+            jobs_by_company[job.company_id].append(job)
+
+    return {
+        user_id: (company, jobs_by_company[company.id])
+        for user_id, company in companies.items()
+    }
+
+
+def _update_consultant_searches(db, searches, profile_ids, job_ids):
+    """Gewijzigde profielen testen tegen de consultant-searches van companies."""
+    incremental = []
+    for saved in searches:
+        filters = saved_search_filters(saved)
+        if filters["job_id"] in job_ids:
+            # vastgepinde job gewijzigd (skills, locatie, gesloten) → alles herberekenen
+            refresh_saved_search(db, saved)
+        else:
+            incremental.append((saved, filters))
+    if not profile_ids or not incremental:
+        return
+
+    profiles = (
+        db.query(ConsultantProfile)
+        .options(joinedload(ConsultantProfile.user), selectinload(ConsultantProfile.skills))
+        .filter(ConsultantProfile.id.in_(profile_ids))
+        .all()
+    )
+    searches = [saved for saved, _ in incremental]
+    contexts = _company_contexts(db, searches)
+    unlock_counts = get_unlock_counts(db, UnlockTarget.consultant, list(profile_ids))
+    unlocked = _unlocked_by_user(
+        db, {s.user_id for s in searches}, UnlockTarget.consultant, profile_ids
+    )
+    existing = _existing_results(db, [s.id for s in searches], profile_ids)
+
+    results = []
+    for saved, filters in incremental:
+        company_profile, company_jobs = contexts.get(saved.user_id, (None, []))
+        required_job, _ = pick_required_job(company_jobs, filters["job_id"])
+
+        origin_lat = origin_lon = None
+        if filters["max_distance_km"] is not None and required_job:
+            origin_lat, origin_lon = required_job.latitude, required_job.longitude
+            if origin_lat is None or origin_lon is None:
+                # STRICT (zoals search_consultants): geen resultaten
+                results.append((saved.id, {}, existing[saved.id]))
+                continue
+
+        company_country = consultant_country_reference(company_profile, required_job)
+        matching = [
+            profile for profile in profiles
+            if consultant_matches(profile, filters, company_country, origin_lat, origin_lon)
+        ]
+        ranked = rank_consultants(
+            matching, filters, required_job, unlocked.get(saved.user_id, set()), unlock_counts
+        )
+        results.append((saved.id, _result_rows(saved, filters, ranked), existing[saved.id]))
+    _write_results(db, results)
+
+
+def apply_changes(db, job_ids, profile_ids):
+    """Saved searches bijwerken voor de gewijzigde jobs/profielen. Commit niet."""
+    searches = db.execute(select(SavedSearch)).scalars().all()
+    _update_job_searches(
+        db, [s for s in searches if s.kind == SavedSearchKind.jobs], job_ids, profile_ids
+    )
+    _update_consultant_searches(
+        db, [s for s in searches if s.kind == SavedSearchKind.consultants], profile_ids, job_ids
+    )
+
+
+def apply_pending(batch_size=SAVED_SEARCH_BATCH_SIZE):
+    """
+    Wachtrij verwerken, batch per batch in één transactie (claimen + bijwerken).
+    Retourneert het aantal verwerkte wijzigingen.
+    """
+    applied = 0
+    while True:
+        with get_session() as db:
+            changes = _claim_changes(db, batch_size)
+            if not changes:
+                return applied
+            job_ids = {entity_id for entity, entity_id in changes if entity == "job_post"}
+            profile_ids = {entity_id for entity, entity_id in changes if entity == "consultant_profile"}
+            apply_changes(db, job_ids, profile_ids)
+            db.commit()
+        applied += len(changes)
+        if len(changes) < batch_size:
+            return applied
+
+
+def remove_saved_search(db, saved):
+    """Saved search + resultaten verwijderen (ook zonder ON DELETE CASCADE, bv. SQLite). Commit niet."""
+    db.execute(delete(SavedSearchResult).where(SavedSearchResult.saved_search_id == saved.id))
+    db.delete(saved)
+
+
+# ------------------ LEZEN ------------------
+
+def saved_searches_overview(db, user_id):
+    """[(saved_search, aantal nieuw sinds vorig bezoek)] van een user, in één query."""
+    new_results = func.count(
+        case((SavedSearchResult.matched_at > SavedSearch.last_viewed_at, 1))
+    )
+    return db.execute(
+        select(SavedSearch, new_results)
+        .outerjoin(SavedSearchResult, SavedSearchResult.saved_search_id == SavedSearch.id)
+        .where(SavedSearch.user_id == user_id)
+        .group_by(SavedSearch.id)
+        .order_by(SavedSearch.created_at.desc())
+    ).all()
+
+
+def saved_search_items(db, saved):
+    """
+    Voorberekend resultaat in volgorde (score, of titel/naam in manuele modus).
+    Zet score, score_breakdown, is_unlocked_for_me en is_new op de items.
+    """
+    filters = saved_search_filters(saved)
+    rows = db.execute(
+        select(SavedSearchResult).where(SavedSearchResult.saved_search_id == saved.id)
+    ).scalars().all()
+    ids = [row.target_id for row in rows]
+
+    if saved.kind == SavedSearchKind.jobs:
+        target_type = UnlockTarget.job
+        stmt = select(JobPost).options(joinedload(JobPost.company), selectinload(JobPost.skills))
+        stmt = stmt.where(JobPost.id.in_(ids))
+    else:
+        target_type = UnlockTarget.consultant
+        stmt = select(ConsultantProfile).options(
+            joinedload(ConsultantProfile.user), selectinload(ConsultantProfile.skills)
+        )
+        stmt = stmt.where(ConsultantProfile.id.in_(ids))
+    by_id = {item.id: item for item in db.execute(stmt).unique().scalars()} if ids else {}
+    unlocked_ids = get_unlocked_target_ids(db, saved.user_id, target_type)
+
+    items = []
+    for row in rows:
+        item = by_id.get(row.target_id)
+        if item is None:
+            continue
+        item.is_new = saved.last_viewed_at is not None and row.matched_at > saved.last_viewed_at
+        item.is_unlocked_for_me = item.id in unlocked_ids
+        if row.score is not None:
+            item.score = row.score
+            item.score_breakdown = row.score_breakdown
+        items.append(item)
+
+    if filters["sort_by"] == "relevance":
+        items.sort(key=lambda item: getattr(item, "score", 0.0), reverse=True)
+    elif saved.kind == SavedSearchKind.jobs:
+        items.sort(key=lambda j: j.title or "")
+    else:
+        items.sort(key=lambda c: c.display_name_masked if c.display_name_masked else c.user.username)
+    return items
+
+
+saved_searches_cli = AppGroup("saved-searches", help="Saved searches.")
+
+
+@saved_searches_cli.command("apply")
+@click.option("--batch-size", type=int, default=SAVED_SEARCH_BATCH_SIZE, show_default=True)
+@click.option("--interval", type=float, default=0, help="Blijven draaien en elke N seconden de wachtrij verwerken.")
+def apply_command(batch_size, interval):
+    """Gewijzigde jobs/profielen uit de wachtrij verwerken."""
+    while True:
+        applied = apply_pending(batch_size)
+        if not interval:
+            click.echo(f"{applied} changes applied.")
+            return
+        if applied:
+            click.echo(f"{applied} changes applied.")
+        time.sleep(interval)
+
+
+@saved_searches_cli.command("refresh")
+@click.option("--kind", type=click.Choice([k.value for k in SavedSearchKind]), default=None)
+def refresh_command(kind):
+    """Alle saved searches volledig herberekenen (herstelt drift)."""
+    count = refresh_all(SavedSearchKind(kind) if kind else None)
+    click.echo(f"{count} saved searches refreshed.")
@@ -0,0 +1,130 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy import Enum, inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from .supabase_client import engine
+from .models import Base
+
+# ------------------ SCHEMA ------------------
+# Er zijn geen migraties: docs/DDL matching current SQLAlchemy models.pdf
+# beschrijft de oorspronkelijke tabellen. De tabellen die er later bij kwamen
+# (recommendations, uploads, saved searches, rate limits, archief, ...) staan
+# in ADDED_TABLES (nieuwe indexen op bestaande tabellen in ADDED_INDEXES) en
+# worden op een bestaande database aangemaakt met
+#
+#     flask schema create
+#
+# (enkel wat ontbreekt; bestaande tabellen worden niet gewijzigd).
+# docs/schema_additions.sql is de uitvoer van `flask schema sql`.
+
+ADDED_TABLES = (
+    "skill_similarities",
+    "recommendation_runs",
+    "recommendations",
+    "recommendation_changes",
+    "stored_files",
+    "saved_searches",
+    "saved_search_results",
+    "saved_search_changes",
+    "rate_limit_buckets",
+    "job_posts_archive",
+    "job_skills_archive",
+    "collaborations_archive",
+    "unlocks_archive",
+)
+
+# nieuwe indexen op de oorspronkelijke tabellen
+ADDED_INDEXES = (
+    "idx_collaborations_status_started_at",
+    "idx_collaborations_started_at",
+    "idx_collaborations_company_status",
+    "idx_collaborations_consultant_status",
+)
+
+
+def added_tables():
+    return [Base.metadata.tables[name] for name in ADDED_TABLES]
+
+
+def added_indexes():
+    indexes = [
+        index
+        for table in Base.metadata.sorted_tables
+        for index in table.indexes
+        if index.name in ADDED_INDEXES
+    ]
+    return sorted(indexes, key=lambda index: index.name)
+
+
+def added_enums():
+    """Enum types die enkel in de toegevoegde tabellen gebruikt worden."""
+    def enums(tables):
+        return {
+            column.type.name: column.type
+            for table in tables
+            for column in table.columns
+            if isinstance(column.type, Enum)
+        }
+
+    original = [t for t in Base.metadata.sorted_tables if t.name not in ADDED_TABLES]
+    existing = enums(original)
+    return [enum for name, enum in sorted(enums(added_tables()).items()) if name not in existing]
+
+
+def create_missing(bind=engine):
+    """
+    Ontbrekende tabellen (+ hun indexen) en indexen aanmaken.
+    Retourneert de namen van wat aangemaakt werd.
+    """
+    inspector = inspect(bind)
+    existing = set(inspector.get_table_names())
+    missing = [table for table in added_tables() if table.name not in existing]
+    Base.metadata.create_all(bind, tables=missing)
+
+    created = [table.name for table in missing]
+    for index in added_indexes():
+        if index.table.name not in existing:
+            continue
+        names = {i["name"] for i in inspector.get_indexes(index.table.name)}
+        if index.name not in names:
+            index.create(bind)
+            created.append(index.name)
+    return created
+
+
+def postgres_ddl():
+    """CREATE TYPE/TABLE/INDEX statements (Postgres) voor ADDED_TABLES en ADDED_INDEXES."""
+    dialect = postgresql.dialect()
+    ddl = [postgresql.CreateEnumType(enum) for enum in added_enums()]
+    ddl += [CreateIndex(index) for index in added_indexes()]
+    for table in added_tables():
+        ddl.append(CreateTable(table))
+        ddl += [CreateIndex(index) for index in sorted(table.indexes, key=lambda i: i.name)]
+
+    statements = [
+        "\n".join(line.rstrip() for line in str(item.compile(dialect=dialect)).strip().splitlines())
+        for item in ddl
+    ]
+    return ";\n\n".join(statements) + ";\n"
+
+
+# ------------------ CLI ------------------
+schema_cli = AppGroup("schema", help="Tabellen die na de oorspronkelijke DDL toegevoegd zijn.")
+
+
+@schema_cli.command("create")
+def create_command():
+    """Ontbrekende tabellen en indexen aanmaken (bestaande blijven ongewijzigd)."""
+    created = create_missing()
+    if created:
+        click.echo("Created: " + ", ".join(created))
+    else:
+        click.echo("Schema up to date.")
+
+
+@schema_cli.command("sql")
+def sql_command():
+    """Postgres DDL van de toegevoegde tabellen tonen."""
+    click.echo(postgres_ddl(), nl=False)
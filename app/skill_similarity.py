@@ -0,0 +1,220 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, insert, select
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # zonder numpy/scipy: enkel exacte skill-overlap
+    np = None
+    sparse = None
+
+from .supabase_client import get_session
+from .invalidation import publish, subscribe
+from .models import JobSkill, ProfileSkill, SkillSimilarity
+
+# ------------------ SKILL SIMILARITY ------------------
+# Gedeeltelijke krediet voor verwante skills ("PostgreSQL" ↔ "SQL").
+#
+# - Batch (`flask skills similarity`): cosine similarity tussen skills o.b.v.
+#   co-occurrence in profile_skills en job_skills, opgeslagen in
+#   skill_similarities (enkel paren boven SKILL_SIMILARITY_MIN).
+# - Serving: per process een kleine dense matrix (skill id × skill id),
+#   diagonaal = 1, andere paren × SKILL_SIMILARITY_CREDIT zodat een exacte
+#   match altijd zwaarder weegt.
+# - Scoring: per gevraagde skill de hoogste gelijkenis met de skills van de
+#   kandidaat (soft overlap), vectorieel over alle kandidaten tegelijk:
+#   O(kandidaten × gevraagde skills), zonder Python-lus per kandidaat.
+#
+# Zonder batch-resultaat is de matrix de identiteit → exacte overlap zoals vroeger.
+# Na een nieuwe batch herladen alle worker-processen de matrix (invalidation bus);
+# SKILL_SIMILARITY_TTL is enkel een vangnet.
+
+SKILL_SIMILARITY_MIN = float(os.getenv("SKILL_SIMILARITY_MIN", "0.2"))
+SKILL_SIMILARITY_CREDIT = float(os.getenv("SKILL_SIMILARITY_CREDIT", "0.5"))
+SKILL_SIMILARITY_TTL = int(os.getenv("SKILL_SIMILARITY_TTL", "3600"))  # seconden
+
+_matrix = {"values": None, "loaded_at": 0.0}
+_matrix_lock = threading.Lock()
+
+
+# ------------------ BATCH ------------------
+
+def compute_skill_similarities(min_similarity=SKILL_SIMILARITY_MIN):
+    """
+    Herbereken skill_similarities. Retourneert het aantal bewaarde paren.
+
+    Elk profiel en elke job is een "document" met een set skills;
+    similarity(a, b) = co-occurrence(a, b) / sqrt(freq(a) × freq(b)).
+    """
+    with get_session() as db:
+        profile_pairs = db.execute(select(ProfileSkill.profile_id, ProfileSkill.skill_id)).all()
+        job_pairs = db.execute(select(JobSkill.job_id, JobSkill.skill_id)).all()
+
+    # documenten nummeren: profielen eerst, dan jobs
+    documents = {}
+    doc_index = []
+    skill_ids = []
+    for kind, pairs in (("profile", profile_pairs), ("job", job_pairs)):
+        for owner_id, skill_id in pairs:
+            doc_index.append(documents.setdefault((kind, owner_id), len(documents)))
+            skill_ids.append(skill_id)
+
+    rows = []
+    if skill_ids:
+        size = max(skill_ids) + 1
+        occurrences = sparse.csr_matrix(
+            (np.ones(len(skill_ids)), (doc_index, skill_ids)),
+            shape=(len(documents), size),
+        )
+        occurrences.data[:] = 1  # dubbele paren niet dubbel tellen
+
+        cooccurrence = (occurrences.T @ occurrences).tocoo()
+        frequency = np.asarray(occurrences.sum(axis=0)).ravel()
+
+        a, b, counts = cooccurrence.row, cooccurrence.col, cooccurrence.data
+        similarity = counts / np.sqrt(frequency[a] * frequency[b])
+        keep = (a != b) & (similarity >= min_similarity)
+
+        rows = [
+            {"skill_id": skill_a, "similar_skill_id": skill_b, "similarity": value}
+            for skill_a, skill_b, value in zip(
+                a[keep].tolist(), b[keep].tolist(), similarity[keep].tolist()
+            )
+        ]
+
+    with get_session() as db:
+        db.execute(delete(SkillSimilarity))
+        if rows:
+            db.execute(insert(SkillSimilarity), rows)
+        # alle worker-processen herladen hun matrix
+        publish(db, "skill_similarity", None)
+        db.commit()
+
+    return len(rows)
+
+
+skills_cli = AppGroup("skills", help="Skill-catalogus onderhoud.")
+
+
+@skills_cli.command("similarity")
+@click.option("--min-similarity", type=float, default=SKILL_SIMILARITY_MIN, show_default=True)
+def similarity_command(min_similarity):
+    """Herbereken de skill-to-skill similarity matrix (co-occurrence)."""
+    started = datetime.now(timezone.utc)
+    count = compute_skill_similarities(min_similarity)
+    seconds = (datetime.now(timezone.utc) - started).total_seconds()
+    click.echo(f"{count} skill pairs written in {seconds:.1f}s.")
+
+
+# ------------------ MATRIX (SERVING) ------------------
+
+def invalidate_skill_similarity_matrix():
+    with _matrix_lock:
+        _matrix["values"] = None
+
+
+subscribe(
+    "skill_similarity",
+    lambda entity_id, version: invalidate_skill_similarity_matrix(),
+    reset=invalidate_skill_similarity_matrix,
+)
+
+
+def _load_matrix():
+    """Dense (max_skill_id + 1)² matrix; ontbrekende paren = 0, diagonaal = 1."""
+    with get_session() as db:
+        pairs = db.execute(
+            select(
+                SkillSimilarity.skill_id,
+                SkillSimilarity.similar_skill_id,
+                SkillSimilarity.similarity,
+            )
+        ).all()
+
+    size = max((max(a, b) for a, b, _ in pairs), default=-1) + 1
+    values = np.zeros((size, size), dtype=np.float64)
+    if pairs:
+        a, b, similarity = (np.asarray(column) for column in zip(*pairs))
+        values[a, b] = similarity * SKILL_SIMILARITY_CREDIT
+    np.fill_diagonal(values, 1.0)
+    return values
+
+
+def use_skill_similarity_matrix(values):
+    """Matrix rechtstreeks instellen (benchmarks, scripts) i.p.v. uit de database."""
+    with _matrix_lock:
+        _matrix["values"] = values
+        _matrix["loaded_at"] = time.monotonic()
+
+
+def skill_similarity_matrix():
+    """Matrix van dit process, herladen na SKILL_SIMILARITY_TTL seconden."""
+    with _matrix_lock:
+        expired = time.monotonic() - _matrix["loaded_at"] > SKILL_SIMILARITY_TTL
+        if _matrix["values"] is None or expired:
+            _matrix["values"] = _load_matrix()
+            _matrix["loaded_at"] = time.monotonic()
+        return _matrix["values"]
+
+
+def _padded(matrix, size):
+    """Matrix uitbreiden met identiteit voor skills die nieuwer zijn dan de batch."""
+    if size <= matrix.shape[0]:
+        return matrix
+    padded = np.eye(size)
+    padded[:matrix.shape[0], :matrix.shape[0]] = matrix
+    return padded
+
+
+def soft_skill_overlap(required_skill_ids, candidate_skill_lists):
+    """
+    Skill-factor per kandidaat (numpy array):
+        som over gevraagde skills van max_similarity(skill, skills van kandidaat)
+        / max(aantal gevraagde skills, 1)
+
+    Met enkel exacte matches is dit gelijk aan matched / max_skills.
+    """
+    required = np.fromiter(required_skill_ids, dtype=np.int64)
+    n = len(candidate_skill_lists)
+    if n == 0 or len(required) == 0:
+        return np.zeros(n)
+
+    lengths = np.fromiter((len(ids) for ids in candidate_skill_lists), dtype=np.int64, count=n)
+    flat = np.fromiter(
+        (sid for ids in candidate_skill_lists for sid in ids),
+        dtype=np.int64,
+        count=int(lengths.sum()),
+    )
+
+    size = int(max(required.max(), flat.max() if len(flat) else 0)) + 1
+    matrix = _padded(skill_similarity_matrix(), size)
+
+    # (gevraagde skills × alle skills van alle kandidaten), daarna max per kandidaat
+    best = np.zeros((len(required), n))
+    nonempty = lengths > 0
+    if nonempty.any():
+        similarities = matrix[np.ix_(required, flat)]
+        starts = (np.cumsum(lengths) - lengths)[nonempty]
+        best[:, nonempty] = np.maximum.reduceat(similarities, starts, axis=1)
+
+    return best.sum(axis=0) / len(required)
+
+
+def skill_overlap_scores(required_skill_ids, items):
+    """
+    {item.id: skill-factor} voor profielen of jobs (met .skills).
+    None als numpy/scipy ontbreken (→ exacte overlap in compute_*_relevance).
+    """
+    if np is None:
+        return None
+    items = list(items)
+    factors = soft_skill_overlap(
+        required_skill_ids, [[s.id for s in item.skills] for item in items]
+    )
+    return dict(zip((item.id for item in items), factors.tolist()))
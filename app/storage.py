@@ -0,0 +1,590 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import Response, abort, current_app, jsonify, send_from_directory, url_for
+from flask.cli import AppGroup
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import safe_join
+
+from .config import Config
+from .supabase_client import get_session, supabase
+from .models import ConsultantProfile, StoredFile
+
+# ------------------ FILE STORAGE ------------------
+# Uploads (profielfoto's, CV's) via een storage backend:
+#
+# - "supabase" (default): Supabase Storage bucket, public URL in de database.
+# - "local": bestanden op schijf (Config.UPLOAD_FOLDER), geserveerd door
+#   /uploads/<key> met send_file: sendfile via de WSGI file wrapper (of
+#   X-Accel-Redirect als nginx de map zelf serveert), Range requests en
+#   conditional headers (ETag / If-None-Match / If-Modified-Since).
+#   Zo draait alles offline en zonder round trips naar remote storage.
+#
+# Beide backends aanvaarden enkel de toegelaten extensies per map.
+#
+# Uploads zijn content-addressed: tijdens het valideren wordt de SHA-256
+# berekend (in blokken, uit de gespoolde upload) en de key is
+# folder/<sha256>.<ext>. Staat die key al in stored_files, dan wordt er niets
+# verstuurd en het bestaande object hergebruikt. ref_count telt de
+# profielvelden die naar het object verwijzen; `flask storage gc` ruimt
+# objecten zonder referenties op. Objecten veranderen nooit → immutable caching.
+#
+# Direct uploads (zonder de Flask worker als doorgeefluik):
+#   1. de browser berekent de SHA-256 en vraagt /api/v1/uploads/sign
+#      (veld, bestandsnaam, grootte, hash) → extensie en grootte gecontroleerd,
+#      een kortlevend token (DIRECT_UPLOAD_EXPIRY) en een signed upload URL;
+#   2. de browser PUT het bestand rechtstreeks naar storage: Supabase signed
+#      upload URL op een eigen staging key per token (pending/<uuid>.<ext>),
+#      of /uploads/direct/<token> voor de lokale backend (de stand-in storage
+#      server, die hash en grootte zelf controleert vóór het bestand op de
+#      content-addressed key komt);
+#   3. /api/v1/uploads/complete hasht het object server-side en controleert
+#      grootte en type; pas daarna verhuist het (Supabase) naar
+#      folder/<sha256>.<ext>, komt het in stored_files en wordt de URL aan het
+#      profiel gekoppeld. Een content-addressed key bevat zo nooit
+#      ongecontroleerde bytes; bij een fout wordt enkel de staging key van
+#      dit token verwijderd.
+# Staat de key al in stored_files, dan valt stap 2 weg.
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")
+SUPABASE_BUCKET_NAME = os.getenv("SUPABASE_BUCKET_NAME", "iconsult-assets")
+# bv. "/protected-uploads/": nginx serveert de bestanden (internal location)
+STORAGE_ACCEL_REDIRECT = os.getenv("STORAGE_ACCEL_REDIRECT")
+UPLOAD_MAX_AGE = 365 * 24 * 3600  # seconden; content-addressed, verandert nooit
+STORAGE_GC_GRACE_HOURS = 24  # jonge objecten niet opruimen (upload nog niet gekoppeld)
+HASH_CHUNK = 1024 * 1024
+DIRECT_UPLOAD_EXPIRY = int(os.getenv("DIRECT_UPLOAD_EXPIRY", "300"))  # seconden
+STAGING_FOLDER = "pending"  # direct uploads vóór controle (Supabase)
+
+# profielveld -> map in storage
+UPLOAD_FIELDS = {"profile_image": "profile_images", "cv_document": "cv_documents"}
+
+ALLOWED_EXTENSIONS = {
+    "profile_images": Config.ALLOWED_EXTENSIONS,
+    "cv_documents": Config.CV_ALLOWED_EXTENSIONS,
+}
+
+logger = logging.getLogger(__name__)
+
+
+class UploadRejected(Exception):
+    """Bestand niet toegelaten (extensie, grootte); boodschap is voor de gebruiker."""
+
+
+def _extension(filename):
+    return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
+
+def _upload_size(file_obj):
+    """Grootte van de (gespoolde) upload zonder hem in te lezen."""
+    stream = file_obj.stream
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+
+def _validate(filename, size, folder):
+    allowed = ALLOWED_EXTENSIONS.get(folder, set())
+    if _extension(filename) not in allowed:
+        raise UploadRejected(
+            f"File type not allowed. Allowed: {', '.join(sorted(allowed))}."
+        )
+    if size > Config.MAX_UPLOAD_BYTES:
+        raise UploadRejected("File is too large.")
+
+
+def validate_upload(file_obj, folder):
+    """Controleert extensie en grootte (Config.MAX_UPLOAD_BYTES)."""
+    _validate(file_obj.filename, _upload_size(file_obj), folder)
+
+
+def content_digest(file_obj):
+    """SHA-256 van de upload, in blokken gelezen; de stream staat daarna terug op 0."""
+    stream = file_obj.stream
+    stream.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(HASH_CHUNK), b""):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def content_key(folder, digest, filename):
+    """Content-addressed key: folder/<sha256>.<ext>."""
+    return f"{folder}/{digest}.{_extension(filename)}"
+
+
+def content_type_for(filename):
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+class SupabaseStorage:
+    """Supabase Storage bucket; public URLs."""
+
+    def __init__(self, bucket_name=SUPABASE_BUCKET_NAME):
+        self.bucket_name = bucket_name
+
+    def put(self, key, file_obj, content_type):
+        bucket = supabase.storage.from_(self.bucket_name)
+        bucket.upload(key, file_obj.read(), {"content-type": content_type, "upsert": "true"})
+        return bucket.get_public_url(key)
+
+    def public_url(self, key):
+        return supabase.storage.from_(self.bucket_name).get_public_url(key)
+
+    def upload_target(self, key, content_type, token):
+        """Signed upload URL van Supabase; de browser PUT het bestand zelf."""
+        signed = supabase.storage.from_(self.bucket_name).create_signed_upload_url(key)
+        return {
+            "method": "PUT",
+            "url": signed["signed_url"],
+            # geen upsert: een bestaand object wordt nooit overschreven
+            "headers": {"Content-Type": content_type},
+        }
+
+    def staging_key(self, key):
+        """Eigen key per token: de browser schrijft nooit rechtstreeks op een content-addressed key."""
+        return f"{STAGING_FOLDER}/{uuid.uuid4().hex}.{_extension(key)}"
+
+    def stat(self, key):
+        """
+        (grootte, content type, sha256) van een object, of None als het niet
+        bestaat. Supabase controleert de hash niet: het object wordt (server-side)
+        opgehaald en gehasht, anders kan een content-addressed key foute inhoud krijgen.
+        """
+        bucket = supabase.storage.from_(self.bucket_name)
+        try:
+            info = bucket.info(key)
+            content = bucket.download(key)
+        except Exception:
+            return None
+        metadata = info.get("metadata") or {}
+        content_type = info.get("content_type") or metadata.get("mimetype")
+        return len(content), content_type, hashlib.sha256(content).hexdigest()
+
+    def promote(self, staging_key, key):
+        """Gecontroleerd object naar zijn content-addressed key. False als die al bestaat."""
+        try:
+            supabase.storage.from_(self.bucket_name).move(staging_key, key)
+        except Exception:
+            return False
+        return True
+
+    def stale_staging(self, cutoff):
+        """Staging keys van nooit afgewerkte direct uploads, ouder dan cutoff."""
+        items = supabase.storage.from_(self.bucket_name).list(STAGING_FOLDER, {"limit": 1000})
+        return [
+            f"{STAGING_FOLDER}/{item['name']}"
+            for item in items
+            if item.get("created_at")
+            and datetime.fromisoformat(item["created_at"].replace("Z", "+00:00")) < cutoff
+        ]
+
+    def delete(self, keys):
+        if keys:
+            supabase.storage.from_(self.bucket_name).remove(list(keys))
+
+    def serve(self, key):
+        abort(404)  # Supabase serveert zelf (public URL)
+
+    def receive(self, token, stream):
+        abort(404)  # uploads gaan rechtstreeks naar Supabase
+
+
+class LocalStorage:
+    """Bestanden op schijf onder root, URLs onder /uploads/."""
+
+    def __init__(self, root=Config.UPLOAD_FOLDER):
+        # relatief pad t.o.v. de projectmap (niet de cwd)
+        if not os.path.isabs(root):
+            root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), root)
+        self.root = root
+
+    def path(self, key):
+        path = safe_join(self.root, key)
+        if path is None:
+            abort(404)
+        return path
+
+    def put(self, key, file_obj, content_type):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_obj.save(path)  # in blokken, niet volledig in het geheugen
+        return self.public_url(key)
+
+    def public_url(self, key):
+        return f"/uploads/{key}"
+
+    def upload_target(self, key, content_type, token):
+        return {
+            "method": "PUT",
+            "url": url_for("main.direct_upload", token=token),
+            "headers": {"Content-Type": content_type},
+        }
+
+    def staging_key(self, key):
+        """Geen staging nodig: receive controleert de hash vóór het bestand op key komt."""
+        return key
+
+    def stale_staging(self, cutoff):
+        return []  # .part bestanden worden door receive zelf opgeruimd
+
+    def stat(self, key):
+        try:
+            with open(self.path(key), "rb") as handle:
+                digest = hashlib.sha256()
+                for block in iter(lambda: handle.read(HASH_CHUNK), b""):
+                    digest.update(block)
+                size = handle.tell()
+        except OSError:
+            return None
+        return size, content_type_for(key), digest.hexdigest()
+
+    def receive(self, token, stream):
+        """
+        Stand-in storage server voor direct uploads: de body wordt in blokken
+        naar een tijdelijk bestand geschreven; enkel als grootte en SHA-256
+        kloppen met het token komt het op de content-addressed key terecht.
+        """
+        try:
+            ticket = load_upload_ticket(token)
+        except UploadRejected as rejected:
+            return jsonify({"error": str(rejected)}), 403
+
+        path = self.path(ticket["upload_key"])
+        if os.path.isfile(path):
+            return "", 204  # identiek object bestaat al
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # uniek per upload (ook tussen threads), in dezelfde map: os.replace is atomair
+        fd, partial = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                for block in iter(lambda: stream.read(HASH_CHUNK), b""):
+                    size += len(block)
+                    if size > ticket["size"]:
+                        return jsonify({"error": "Upload larger than announced."}), 413
+                    digest.update(block)
+                    handle.write(block)
+
+            if size != ticket["size"] or digest.hexdigest() != ticket["sha256"]:
+                return jsonify({"error": "Upload does not match the announced file."}), 400
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.unlink(partial)
+        return "", 201
+
+    def delete(self, keys):
+        for key in keys:
+            try:
+                os.unlink(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def serve(self, key):
+        folder = key.split("/", 1)[0]
+        if _extension(key) not in ALLOWED_EXTENSIONS.get(folder, set()):
+            abort(404)
+
+        if STORAGE_ACCEL_REDIRECT:
+            if not os.path.isfile(self.path(key)):
+                abort(404)
+            response = Response(mimetype=content_type_for(key))
+            response.headers["X-Accel-Redirect"] = STORAGE_ACCEL_REDIRECT.rstrip("/") + "/" + key
+            return response
+
+        # conditional=True: ETag, Last-Modified, 304 en Range (206)
+        return send_from_directory(
+            self.root,
+            key,
+            mimetype=content_type_for(key),
+            conditional=True,
+            max_age=UPLOAD_MAX_AGE,
+        )
+
+
+_BACKENDS = {"supabase": SupabaseStorage, "local": LocalStorage}
+_storage = {"backend": None}
+
+
+def get_storage():
+    if _storage["backend"] is None:
+        if STORAGE_BACKEND not in _BACKENDS:
+            raise RuntimeError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+        _storage["backend"] = _BACKENDS[STORAGE_BACKEND]()
+    return _storage["backend"]
+
+
+def _reuse_stored(db, key):
+    """
+    URL van een bestaand object, of None. De rij wordt meteen aangeraakt
+    (last_referenced_at) en blijft zo tot de commit vergrendeld: gc kan ze
+    niet claimen tussen deze lookup en replace_reference.
+    """
+    return db.execute(
+        update(StoredFile)
+        .where(StoredFile.key == key)
+        .values(last_referenced_at=datetime.now(timezone.utc))
+        .returning(StoredFile.url)
+    ).scalar_one_or_none()
+
+
+def save_upload(db, file_obj, folder):
+    """
+    Valideert en bewaart een upload (content-addressed). Retourneert de URL,
+    of None bij een storage-fout. Raises UploadRejected bij een niet-toegelaten
+    bestand. Een identiek bestand dat al bewaard is, wordt niet opnieuw verstuurd.
+    Koppel de URL daarna met replace_reference (zelfde transactie).
+    """
+    validate_upload(file_obj, folder)
+    digest = content_digest(file_obj)
+    key = content_key(folder, digest, file_obj.filename)
+
+    existing = _reuse_stored(db, key)
+    if existing is not None:
+        return existing
+
+    content_type = content_type_for(file_obj.filename)
+    try:
+        url = get_storage().put(key, file_obj, content_type)
+    except Exception:
+        logger.exception("Upload to %s storage failed", STORAGE_BACKEND)
+        return None
+
+    try:
+        # savepoint: een gelijktijdige identieke upload mag de transactie niet breken
+        with db.begin_nested():
+            db.execute(
+                insert(StoredFile).values(
+                    key=key,
+                    url=url,
+                    sha256=digest,
+                    size=_upload_size(file_obj),
+                    content_type=content_type,
+                )
+            )
+    except IntegrityError:
+        pass
+    return url
+
+
+# ------------------ DIRECT UPLOADS ------------------
+
+def _ticket_serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt="direct-upload")
+
+
+def load_upload_ticket(token):
+    """Payload van een upload-token. Raises UploadRejected als het ongeldig of verlopen is."""
+    try:
+        return _ticket_serializer().loads(token, max_age=DIRECT_UPLOAD_EXPIRY)
+    except SignatureExpired:
+        raise UploadRejected("Upload link expired, please try again.")
+    except BadSignature:
+        raise UploadRejected("Invalid upload token.")
+
+
+def sign_direct_upload(db, user_id, field, filename, size, sha256):
+    """
+    Stap 1: valideert de aangekondigde upload en retourneert
+    {"token": ..., "upload": {"method", "url", "headers"} of None}.
+    upload is None als een identiek bestand al bewaard is.
+    Raises UploadRejected.
+    """
+    folder = UPLOAD_FIELDS.get(field)
+    if folder is None:
+        raise UploadRejected("Unknown upload field.")
+    if not isinstance(size, int) or size <= 0:
+        raise UploadRejected("Invalid file size.")
+    _validate(filename or "", size, folder)
+    sha256 = (sha256 or "").lower()
+    if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+        raise UploadRejected("Invalid file hash.")
+
+    key = content_key(folder, sha256, filename)
+    content_type = content_type_for(filename)
+    storage = get_storage()
+    upload_key = storage.staging_key(key)
+    token = _ticket_serializer().dumps({
+        "user_id": user_id,
+        "field": field,
+        "key": key,
+        "upload_key": upload_key,
+        "size": size,
+        "sha256": sha256,
+        "content_type": content_type,
+    })
+
+    stored = db.execute(select(StoredFile.key).where(StoredFile.key == key)).scalar_one_or_none()
+    if stored is not None:
+        return {"token": token, "upload": None}
+    return {"token": token, "upload": storage.upload_target(upload_key, content_type, token)}
+
+
+def complete_direct_upload(db, user_id, token):
+    """
+    Stap 3: controleert het geüploade object (grootte, hash, type), zet het
+    op zijn content-addressed key en registreert het in stored_files.
+    Retourneert (veld, url); koppelen aan het profiel met replace_reference
+    (zelfde transactie).
+    Raises UploadRejected.
+    """
+    ticket = load_upload_ticket(token)
+    if ticket["user_id"] != user_id:
+        raise UploadRejected("Invalid upload token.")
+
+    key, upload_key = ticket["key"], ticket["upload_key"]
+    storage = get_storage()
+    # enkel de staging key van dit token mag weg, nooit een content-addressed key
+    discard = [upload_key] if upload_key != key else []
+
+    existing = _reuse_stored(db, key)  # rijen in stored_files zijn gecontroleerd
+    if existing is not None:
+        storage.delete(discard)
+        return ticket["field"], existing
+
+    stat = storage.stat(upload_key)
+    if stat is None:
+        raise UploadRejected("Upload not found, please try again.")
+    if not _matches_ticket(stat, ticket):
+        storage.delete(discard)
+        raise UploadRejected("Uploaded file does not match the announced file.")
+
+    if discard and not storage.promote(upload_key, key):
+        # key bestaat al (gelijktijdige upload, of een wees-object): enkel
+        # registreren als ook die inhoud klopt
+        storage.delete(discard)
+        stat = storage.stat(key)
+        if stat is None or not _matches_ticket(stat, ticket):
+            raise UploadRejected("Upload could not be stored, please try again.")
+
+    url = storage.public_url(key)
+    try:
+        with db.begin_nested():
+            db.execute(
+                insert(StoredFile).values(
+                    key=key,
+                    url=url,
+                    sha256=ticket["sha256"],
+                    size=ticket["size"],
+                    content_type=ticket["content_type"],
+                )
+            )
+    except IntegrityError:
+        pass
+    return ticket["field"], url
+
+
+def _matches_ticket(stat, ticket):
+    size, content_type, digest = stat
+    return (
+        size == ticket["size"]
+        and digest == ticket["sha256"]
+        and (not content_type or content_type == ticket["content_type"])
+    )
+
+
+def replace_reference(db, old_url, new_url):
+    """ref_count van het nieuwe object +1, van het vorige -1 (set-based, geen lookups)."""
+    if old_url == new_url:
+        return
+    now = datetime.now(timezone.utc)
+    if new_url:
+        db.execute(
+            update(StoredFile)
+            .where(StoredFile.url == new_url)
+            .values(ref_count=StoredFile.ref_count + 1, last_referenced_at=now)
+        )
+    if old_url:
+        db.execute(
+            update(StoredFile)
+            .where(StoredFile.url == old_url, StoredFile.ref_count > 0)
+            .values(ref_count=StoredFile.ref_count - 1)
+        )
+
+
+# ------------------ GARBAGE COLLECTION ------------------
+
+def recount_references(db):
+    """ref_count opnieuw berekenen uit de profielvelden (herstelt drift)."""
+    urls = {}
+    for column in (ConsultantProfile.profile_image, ConsultantProfile.cv_document):
+        for url in db.execute(select(column).where(column.is_not(None))).scalars():
+            urls[url] = urls.get(url, 0) + 1
+
+    db.execute(update(StoredFile).values(ref_count=0))
+    for url, count in urls.items():
+        db.execute(update(StoredFile).where(StoredFile.url == url).values(ref_count=count))
+
+
+def collect_garbage(grace_hours=STORAGE_GC_GRACE_HOURS, dry_run=False, recount=False):
+    """
+    Verwijdert objecten zonder referenties die ouder zijn dan grace_hours
+    (sinds de upload of het laatste hergebruik). Retourneert de verwijderde keys.
+
+    Eerst worden de rijen geclaimd (DELETE ... RETURNING, gecommit), pas
+    daarna de objecten. Een upload die het object intussen hergebruikt, heeft
+    de rij vergrendeld (_reuse_stored) en wordt dus niet geclaimd; na de
+    claim vindt hergebruik de rij niet meer en wordt opnieuw geüpload (enkel
+    een identieke upload in de milliseconden tussen claim en delete kan zijn
+    object nog verliezen; `--recount` + een nieuwe upload herstelt dat).
+    Mislukt het verwijderen in storage, dan blijft enkel een wees-object over,
+    nooit een profiel dat naar een verwijderd object wijst. Staging keys van
+    nooit afgewerkte direct uploads ouder dan grace_hours gaan ook weg.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+    unreferenced = (
+        StoredFile.ref_count <= 0,
+        func.coalesce(StoredFile.last_referenced_at, StoredFile.created_at) < cutoff,
+    )
+    with get_session() as db:
+        if recount:
+            recount_references(db)
+
+        if dry_run:
+            keys = db.execute(select(StoredFile.key).where(*unreferenced)).scalars().all()
+            db.rollback()
+            return keys
+
+        keys = db.execute(
+            delete(StoredFile).where(*unreferenced).returning(StoredFile.key)
+        ).scalars().all()
+        db.commit()
+
+    storage = get_storage()
+    if keys:
+        storage.delete(keys)
+    # direct uploads die nooit afgewerkt werden (staging, nooit in stored_files)
+    staging = storage.stale_staging(cutoff)
+    if staging:
+        storage.delete(staging)
+    return keys + staging
+
+
+storage_cli = AppGroup("storage", help="Opslag van uploads.")
+
+
+@storage_cli.command("gc")
+@click.option("--grace-hours", type=int, default=STORAGE_GC_GRACE_HOURS, show_default=True)
+@click.option("--dry-run", is_flag=True, help="Enkel tonen wat verwijderd zou worden.")
+@click.option("--recount", is_flag=True, help="ref_count eerst herberekenen uit de profielen.")
+def gc_command(grace_hours, dry_run, recount):
+    """Verwijder uploads waar geen profiel meer naar verwijst."""
+    keys = collect_garbage(grace_hours, dry_run=dry_run, recount=recount)
+    for key in keys:
+        click.echo(key)
+    verb = "would be removed" if dry_run else "removed"
+    click.echo(f"{len(keys)} unreferenced files {verb}.")
@@ -10,7 +10,10 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set.")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
+# Supabase is enkel nodig voor storage; met STORAGE_BACKEND=local draait alles offline
+SUPABASE_REQUIRED = os.getenv("STORAGE_BACKEND", "supabase") == "supabase"
+
+if SUPABASE_REQUIRED and (not SUPABASE_URL or not SUPABASE_KEY):
     raise RuntimeError("SUPABASE_URL or SUPABASE_KEY is not set in .env")
 
 # 1. SQLAlchemy Engine (for Database)
@@ -21,4 +24,6 @@ def get_session():
     return SessionLocal()
 
 # 2. Supabase Client (for Storage/Auth/Realtime)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
\ No newline at end of file
+supabase: Client = (
+    create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+)
@@ -0,0 +1,64 @@
+import os
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache
+
+# ------------------ TEMPLATE BYTECODE CACHE ------------------
+# Jinja compileert elke template naar Python-code en daarna naar bytecode.
+# Zonder cache gebeurt dat per worker-process bij het eerste gebruik (en
+# opnieuw na elke worker-recycle). Met een FileSystemBytecodeCache wordt de
+# bytecode één keer weggeschreven en door alle workers hergebruikt.
+#
+# `flask templates compile` vult de cache tijdens de build, zodat ook de
+# eerste request na een deploy geen compile-tijd meer heeft. De cache is
+# gekoppeld aan de Python-versie en het absolute pad van de templates:
+# compileer in dezelfde image/map als waar de app draait.
+
+JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR")
+
+
+def init_templates(app):
+    """Bytecode cache instellen (vóór de Jinja environment aangemaakt wordt)."""
+    directory = JINJA_CACHE_DIR or os.path.join(app.instance_path, "jinja_cache")
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_options = {
+        **app.jinja_options,
+        "bytecode_cache": FileSystemBytecodeCache(directory),
+    }
+    app.config["JINJA_CACHE_DIR"] = directory
+
+    # TEMPLATES_AUTO_RELOAD=0/1 overschrijft de standaard (enkel in debug)
+    auto_reload = os.getenv("TEMPLATES_AUTO_RELOAD")
+    if auto_reload is not None:
+        app.config["TEMPLATES_AUTO_RELOAD"] = auto_reload == "1"
+
+
+def compile_all_templates(app):
+    """Alle templates laden; nieuwe bytecode komt in de cache. Retourneert het aantal."""
+    env = app.jinja_env
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+templates_cli = AppGroup("templates", help="Jinja templates.")
+
+
+@templates_cli.command("compile")
+@click.option("--clear", is_flag=True, help="Bestaande bytecode eerst verwijderen.")
+def compile_command(clear):
+    """Precompileer alle templates naar de bytecode cache (build-stap)."""
+    app = current_app._get_current_object()
+    if clear:
+        app.jinja_env.bytecode_cache.clear()
+
+    started = time.perf_counter()
+    count = compile_all_templates(app)
+    click.echo(
+        f"{count} templates compiled into {app.config['JINJA_CACHE_DIR']} "
+        f"in {time.perf_counter() - started:.2f}s."
+    )
@@ -0,0 +1,327 @@
+import re
+import threading
+from collections import Counter
+from itertools import chain
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # zonder numpy/scipy blijft de semantische score 0
+    np = None
+    sparse = None
+
+from sqlalchemy import select
+
+from .supabase_client import get_session
+from .invalidation import subscribe
+from .models import ConsultantProfile, JobPost
+
+# ------------------ TF-IDF SIMILARITY ------------------
+# Semantische gelijkenis tussen jobs (titel + beschrijving) en consultants
+# (headline), als extra component in de relevance scoring.
+#
+# - Eén gedeelde vocabulaire + IDF over beide soorten documenten, zodat
+#   job- en consultantvectoren vergelijkbaar zijn.
+# - Ruwe term counts zitten in een CSR-matrix (één rij per document).
+#   Wijzigingen worden incrementeel verwerkt: de oude rij wordt als dood
+#   gemarkeerd, de nieuwe rij achteraan toegevoegd; bij te veel dode rijen
+#   wordt de matrix gecompacteerd.
+# - Na een commit (in eender welk worker-process, zie invalidation.py) worden
+#   gewijzigde jobs/profielen als "dirty" gemarkeerd en bij de volgende
+#   opvraging opnieuw ingelezen (één query).
+# - Kunnen events gemist zijn (reconnect, of een index die vóór de fork in de
+#   gunicorn master gebouwd is), dan wordt de index gesynchroniseerd: alle
+#   teksten opnieuw lezen en enkel de gewijzigde documenten vervangen.
+# - Per request: één sparse matrix-vector product over de kandidaten.
+
+JOB_DOCUMENT = "job"
+CONSULTANT_DOCUMENT = "consultant"
+
+COMPACT_DEAD_RATIO = 0.25  # compacteren vanaf 25% dode rijen
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it of on or our that the
+this to we with you your will
+de het een en van in op met voor te is zijn wij we je jij u die dat er
+als bij naar ook of om aan
+""".split())
+
+
+def tokenize(text):
+    """Lowercase woorden (incl. c++, c#), zonder stopwoorden en losse letters."""
+    return Counter(
+        token
+        for token in TOKEN_RE.findall((text or "").lower())
+        if len(token) > 1 and token not in STOPWORDS
+    )
+
+
+def _document_statement(kind, ids=None):
+    if kind == JOB_DOCUMENT:
+        stmt = select(JobPost.id, JobPost.title, JobPost.description)
+        id_column = JobPost.id
+    else:
+        stmt = select(ConsultantProfile.id, ConsultantProfile.headline)
+        id_column = ConsultantProfile.id
+
+    if ids is not None:
+        stmt = stmt.where(id_column.in_(ids))
+    return stmt
+
+
+def _load_documents(db, kind, ids=None):
+    """{(kind, id): tekst} voor alle (of de gegeven) documenten."""
+    rows = db.execute(_document_statement(kind, ids)).all()
+    return {
+        (kind, row[0]): " ".join(filter(None, row[1:]))
+        for row in rows
+    }
+
+
+class TfidfIndex:
+    """
+    Incrementeel bijgehouden TF-IDF index over jobs en consultants.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._built = False
+        self._dirty = set()
+        self._resync = False
+
+        self.vocabulary = {}  # term -> kolom
+        self._df = []  # kolom -> aantal levende documenten met die term
+        self._rows = {}  # (kind, id) -> rij in de matrix
+        self._doc_columns = {}  # (kind, id) -> kolommen van dat document
+        self._hashes = {}  # (kind, id) -> hash van de tekst (voor resync)
+
+        self._counts = None  # CSR met ruwe term counts
+        self._pending = []  # nieuwe rijen: (kolommen, counts)
+        self._dead = set()  # rijen van verwijderde/gewijzigde documenten
+        self._row_count = 0
+        self._weighted = None  # CSR met genormaliseerde tf-idf (cache)
+
+    # --- onderhoud ---
+
+    def reset(self):
+        """Volledig opnieuw opbouwen bij de volgende opvraging."""
+        with self._lock:
+            self._clear()
+
+    def resync(self):
+        """
+        Events kunnen gemist zijn: bij de volgende opvraging alle teksten
+        vergelijken en enkel gewijzigde/nieuwe/verwijderde documenten verwerken.
+        """
+        with self._lock:
+            self._resync = self._built
+
+    def mark_dirty(self, keys):
+        with self._lock:
+            self._dirty.update(keys)
+
+    def _add_document(self, key, text):
+        self._hashes[key] = hash(text)
+        counts = tokenize(text)
+        if not counts:
+            return
+
+        columns = []
+        for term in counts:
+            column = self.vocabulary.get(term)
+            if column is None:
+                column = len(self._df)
+                self.vocabulary[term] = column
+                self._df.append(0)
+            self._df[column] += 1
+            columns.append(column)
+
+        self._pending.append((columns, [counts[term] for term in counts]))
+        self._rows[key] = self._row_count
+        self._doc_columns[key] = columns
+        self._row_count += 1
+        self._weighted = None
+
+    def _remove_document(self, key):
+        self._hashes.pop(key, None)
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        for column in self._doc_columns.pop(key):
+            self._df[column] -= 1
+        self._dead.add(row)
+        self._weighted = None
+
+    def _refresh(self):
+        """Eerste opbouw, resync of dirty documenten opnieuw inlezen (lock vastgehouden)."""
+        if self._built and not self._dirty and not self._resync:
+            return
+
+        with get_session() as db:
+            if not self._built or self._resync:
+                documents = {}
+                documents.update(_load_documents(db, JOB_DOCUMENT))
+                documents.update(_load_documents(db, CONSULTANT_DOCUMENT))
+
+            if not self._built:
+                for key, text in documents.items():
+                    self._add_document(key, text)
+                self._built = True
+                self._dirty.clear()
+                return
+
+            dirty = self._dirty
+            self._dirty = set()
+            if self._resync:
+                dirty |= {key for key, text in documents.items() if self._hashes.get(key) != hash(text)}
+                dirty |= self._hashes.keys() - documents.keys()
+                self._resync = False
+            else:
+                documents = {}
+                for kind in (JOB_DOCUMENT, CONSULTANT_DOCUMENT):
+                    ids = [doc_id for doc_kind, doc_id in dirty if doc_kind == kind]
+                    if ids:
+                        documents.update(_load_documents(db, kind, ids))
+
+        for key in dirty:
+            self._remove_document(key)
+            # verwijderde rijen staan niet meer in de database
+            if key in documents:
+                self._add_document(key, documents[key])
+
+        if len(self._dead) > COMPACT_DEAD_RATIO * max(self._row_count, 1):
+            self._compact()
+
+    def _count_matrix(self):
+        """Ruwe counts als CSR, incl. pending rijen (kolommen = vocabulaire)."""
+        shape = (self._row_count, len(self._df))
+
+        if self._pending:
+            indptr = np.cumsum([0] + [len(columns) for columns, _ in self._pending])
+            indices = np.fromiter(
+                chain.from_iterable(columns for columns, _ in self._pending), dtype=np.int32
+            )
+            data = np.fromiter(
+                chain.from_iterable(values for _, values in self._pending), dtype=np.float64
+            )
+            new_rows = sparse.csr_matrix(
+                (data, indices, indptr), shape=(len(self._pending), shape[1])
+            )
+            if self._counts is None:
+                self._counts = new_rows
+            else:
+                old = self._counts
+                old.resize((old.shape[0], shape[1]))
+                self._counts = sparse.vstack([old, new_rows], format="csr")
+            self._pending = []
+        elif self._counts is None:
+            self._counts = sparse.csr_matrix(shape)
+
+        if self._counts.shape != shape:
+            self._counts.resize(shape)
+        return self._counts
+
+    def _compact(self):
+        """Dode rijen verwijderen en levende rijen hernummeren."""
+        counts = self._count_matrix()
+        keys = sorted(self._rows, key=self._rows.get)
+        alive = [self._rows[key] for key in keys]
+
+        self._counts = counts[alive]
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._row_count = len(keys)
+        self._dead = set()
+        self._weighted = None
+
+    def _weighted_matrix(self):
+        """
+        Sublineaire tf (1 + log tf) × smooth idf, L2-genormaliseerd per rij.
+        Dode rijen worden nooit opgevraagd en hoeven niet op nul gezet te worden.
+        """
+        if self._weighted is not None:
+            return self._weighted
+
+        counts = self._count_matrix()
+        live_documents = len(self._rows)
+        df = np.asarray(self._df, dtype=np.float64)
+        idf = np.log((1 + live_documents) / (1 + df)) + 1
+
+        weighted = counts.copy()
+        weighted.data = 1 + np.log(weighted.data)
+        weighted = weighted.multiply(idf).tocsr()
+
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        self._weighted = (sparse.diags(1 / norms) @ weighted).tocsr()
+        return self._weighted
+
+    def warm(self):
+        """Index en gewogen matrix meteen opbouwen (bv. in de gunicorn master)."""
+        if np is None:
+            return
+        with self._lock:
+            self._refresh()
+            self._weighted_matrix()
+
+    # --- opvragen ---
+
+    def similarities(self, source_key, target_kind, target_ids):
+        """
+        Cosine similarity van één document t.o.v. een lijst documenten.
+        Retourneert {target_id: similarity} (enkel > 0).
+        """
+        if np is None or not target_ids:
+            return {}
+
+        with self._lock:
+            self._refresh()
+
+            source_row = self._rows.get(source_key)
+            if source_row is None:
+                return {}
+
+            target_ids = [
+                target_id for target_id in target_ids
+                if (target_kind, target_id) in self._rows
+            ]
+            if not target_ids:
+                return {}
+
+            matrix = self._weighted_matrix()
+            rows = [self._rows[(target_kind, target_id)] for target_id in target_ids]
+            scores = matrix[rows] @ matrix[source_row].T
+
+        scores = scores.toarray().ravel()
+        return {
+            target_id: score
+            for target_id, score in zip(target_ids, scores.tolist())
+            if score > 0
+        }
+
+
+tfidf_index = TfidfIndex()
+
+
+def semantic_scores(source_kind, source_id, target_kind, target_ids):
+    """{target_id: cosine similarity} tussen een job en consultants (of omgekeerd)."""
+    if source_id is None:
+        return {}
+    return tfidf_index.similarities((source_kind, source_id), target_kind, list(target_ids))
+
+
+# ------------------ CHANGE TRACKING ------------------
+# Gewijzigde jobs/profielen (na een geslaagde commit, ook in andere worker-
+# processen) komen via de invalidation bus binnen en worden als dirty gemarkeerd.
+
+def _mark_dirty(kind):
+    def evict(document_id, version):
+        tfidf_index.mark_dirty({(kind, document_id)})
+    return evict
+
+
+subscribe("job_post", _mark_dirty(JOB_DOCUMENT), reset=tfidf_index.resync)
+subscribe("consultant_profile", _mark_dirty(CONSULTANT_DOCUMENT), reset=tfidf_index.resync)
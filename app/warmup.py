@@ -0,0 +1,93 @@
+import logging
+import time
+
+from sqlalchemy.orm import configure_mappers
+
+from .supabase_client import engine, get_session
+from .templating import compile_all_templates
+from .models import Skill
+
+# ------------------ WARM-UP ------------------
+# Werk dat anders bij de eerste requests van elke worker gebeurt, vooraf in
+# de gunicorn master (preload_app), vóór de fork. Met gc.freeze() daarna
+# (zie wsgi.py) blijven deze objecten copy-on-write gedeeld tussen workers.
+#
+# Events tussen de warm-up en de fork mist de worker; reset_after_fork
+# (post_fork) synchroniseert de caches na de eerste busverbinding.
+#
+# Elke stap is optioneel: als de database (nog) niet bereikbaar is, start de
+# app toch en gebeurt het werk lazy zoals vroeger.
+
+logger = logging.getLogger(__name__)
+
+
+def _compile_templates(app):
+    """Alle Jinja templates laden (uit de bytecode cache indien voorgecompileerd)."""
+    return compile_all_templates(app)
+
+
+def _warm_skills_catalog(app):
+    """Skills-catalogus query één keer uitvoeren (vult de SQL compile cache)."""
+    with get_session() as db:
+        return len(db.query(Skill).order_by(Skill.name).all())
+
+
+def _warm_text_index(app):
+    from .text_similarity import tfidf_index
+
+    tfidf_index.warm()
+    return len(tfidf_index.vocabulary)
+
+
+def _warm_skill_matrix(app):
+    from .skill_similarity import np, skill_similarity_matrix
+
+    if np is None:
+        return 0
+    return skill_similarity_matrix().shape[0]
+
+
+WARM_UP_STEPS = [
+    ("templates", _compile_templates),
+    ("skills catalog", _warm_skills_catalog),
+    ("tf-idf index", _warm_text_index),
+    ("skill similarity matrix", _warm_skill_matrix),
+]
+
+
+def warm_up(app):
+    """
+    Voert alle warm-up stappen uit en sluit daarna de DB-verbindingen van de
+    master, zodat geen enkele worker een geërfde socket gebruikt.
+    Retourneert {stap: (resultaat of None, seconden)}.
+    """
+    configure_mappers()
+
+    results = {}
+    for name, step in WARM_UP_STEPS:
+        started = time.perf_counter()
+        try:
+            result = step(app)
+        except Exception:
+            logger.warning("Warm-up step '%s' failed, continuing lazily", name, exc_info=True)
+            result = None
+        results[name] = (result, time.perf_counter() - started)
+        logger.info("Warm-up %s: %s (%.2fs)", name, result, results[name][1])
+
+    engine.dispose()
+    return results
+
+
+def reset_after_fork():
+    """
+    In elke worker na de fork (ook bij vervangen workers, max_requests):
+    - de pool van de master niet hergebruiken (close=False: de sockets van
+      de master niet sluiten vanuit het kind),
+    - meteen naar de invalidation bus luisteren en de opgewarmde caches na
+      de eerste verbinding synchroniseren: wijzigingen tussen de warm-up en
+      de fork zijn nooit als event bij deze worker aangekomen.
+    """
+    engine.dispose(close=False)
+
+    from .invalidation import ensure_listener
+    ensure_listener(resync=True)
@@ -0,0 +1,163 @@
+"""
+Benchmark: bytes-on-wire en CPU-kost van response compression voor de
+lijstpagina's (job_list.html, consultant_list.html).
+
+Rendert de echte templates met synthetische jobs/consultants (geen database
+nodig) en comprimeert ze met dezelfde functies als app/compression.py.
+
+    python benchmarks/bench_compression.py
+    python benchmarks/bench_compression.py --cards 100 1000 5000 --repeat 20
+
+Per pagina en aantal kaarten: grootte en ms per response voor elke encoding
+en elk niveau; "*" markeert het niveau uit COMPRESSION_LEVELS.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()  # zelfde .env als de app; er worden geen queries uitgevoerd
+
+from flask import render_template  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.compression import COMPRESSION_LEVELS, brotli, compress_body  # noqa: E402
+from app.models import UserRole  # noqa: E402
+
+SKILL_NAMES = [
+    "Python", "SQL", "PostgreSQL", "Java", "Spring", "React", "TypeScript",
+    "Docker", "Kubernetes", "AWS", "Azure", "Terraform", "Power BI", "SAP",
+    "Scrum", "Data Engineering", "Machine Learning", "Go", "C#", ".NET",
+]
+CITIES = ["Gent", "Antwerpen", "Brussel", "Leuven", "Brugge", "Hasselt"]
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 5, 11)}
+
+
+def _breakdown(rng):
+    factors = {
+        "skill_factor": rng.random(),
+        "text_factor": rng.choice([0, 1]),
+        "semantic_factor": rng.random() * 0.4,
+        "recency_factor": rng.random(),
+        "popularity_factor": rng.random(),
+    }
+    return factors, sum(factors.values()) / len(factors)
+
+
+def make_consultants(count, skills, seed=1):
+    rng = random.Random(seed)
+    consultants = []
+    for i in range(1, count + 1):
+        breakdown, score = _breakdown(rng)
+        consultants.append(
+            SimpleNamespace(
+                id=i,
+                display_name_masked=f"Consultant {i}",
+                initials=f"C{i % 26}",
+                headline=rng.choice(["Senior Python developer", "Data engineer", "Java architect"]),
+                location_city=rng.choice(CITIES),
+                country="Belgium",
+                years_experience=rng.randint(0, 25),
+                skills=rng.sample(skills, rng.randint(2, 10)),
+                is_unlocked_for_me=rng.random() < 0.2,
+                user=SimpleNamespace(username=f"consultant{i}"),
+                score=score,
+                score_breakdown=breakdown,
+            )
+        )
+    return consultants
+
+
+def make_jobs(count, skills, seed=1):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    jobs = []
+    for i in range(1, count + 1):
+        breakdown, score = _breakdown(rng)
+        jobs.append(
+            SimpleNamespace(
+                id=i,
+                title=rng.choice(["Backend developer", "Data engineer", "Cloud architect"]) + f" #{i}",
+                company=SimpleNamespace(company_name_masked=f"Company {i % 50}", initials="CO"),
+                contract_type=rng.choice(["Freelance", "Full-time", "Project-based"]),
+                location_city=rng.choice(CITIES),
+                country="Belgium",
+                is_active=True,
+                hired_consultant=None,
+                is_unlocked_for_me=rng.random() < 0.2,
+                created_at=now - timedelta(days=rng.randint(0, 60)),
+                skills=rng.sample(skills, rng.randint(2, 8)),
+                score=score,
+                score_breakdown=breakdown,
+            )
+        )
+    return jobs
+
+
+def render_pages(app, cards):
+    skills = [SimpleNamespace(id=i, name=name) for i, name in enumerate(SKILL_NAMES, 1)]
+    user = SimpleNamespace(id=1, username="bench", role=UserRole.company)
+    with app.test_request_context("/"):
+        return {
+            "consultant_list.html": render_template(
+                "consultant_list.html",
+                consultants=make_consultants(cards, skills),
+                skills=skills,
+                user=user,
+                sort_by="relevance",
+                company_jobs=[],
+                selected_job_id=None,
+                UserRole=UserRole,
+            ).encode(),
+            "job_list.html": render_template(
+                "job_list.html",
+                jobs=make_jobs(cards, skills),
+                skills=skills,
+                user=user,
+                sort_by="relevance",
+                possible_contract_types=[],
+                current_contract_type=None,
+                UserRole=UserRole,
+            ).encode(),
+        }
+
+
+def measure(data, encoding, level, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        compressed = compress_body(data, encoding, level)
+    return len(compressed), (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    app = create_app()
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    default_levels = COMPRESSION_LEVELS["text/html"]
+
+    print(f"{'page':<22} {'cards':>6} {'encoding':<10} {'bytes':>10} {'ratio':>7} {'ms':>8}")
+    for cards in args.cards:
+        for page, data in render_pages(app, cards).items():
+            print(f"{page:<22} {cards:>6} {'identity':<10} {len(data):>10} {1:>7.1%} {0:>8.2f}")
+            for encoding in encodings:
+                for level in LEVELS[encoding]:
+                    size, ms = measure(data, encoding, level, args.repeat)
+                    mark = "*" if default_levels[encoding] == level else " "
+                    label = f"{encoding}-{level}{mark}"
+                    print(f"{page:<22} {cards:>6} {label:<10} {size:>10} {size / len(data):>7.1%} {ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark: sequentiële vs parallelle relevance scoring voor /consultants.
+
+Gebruikt synthetische profielen (geen database nodig) en controleert dat
+beide paden dezelfde volgorde en scores geven.
+
+    python benchmarks/bench_parallel_scoring.py
+    python benchmarks/bench_parallel_scoring.py --sizes 5000 20000 100000 --workers 8 --repeat 11
+
+Per grootte: mediaan (en min–max) van --repeat runs na één opwarmrun, voor
+  - sequential: compute_consultant_relevance per profiel
+  - vectorized: score_consultants_parallel met één worker (enkel NumPy)
+  - parallel:   score_consultants_parallel met --workers threads
+"vector" = sequential / vectorized, "threads" = vectorized / parallel.
+
+Het omslagpunt is de kleinste grootte vanaf waar parallel (mediaan) minstens
+MIN_SPEEDUP sneller is dan sequential, ook voor alle grotere groottes; een goede waarde voor
+PARALLEL_SCORING_THRESHOLD op die machine. Een deel van elke partitie
+(attributen uit Python-objecten halen, score_breakdown zetten) draait onder
+de GIL, dus "threads" blijft vaak rond 1x: de winst komt dan enkel van de
+vectorisatie.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()  # zelfde .env als de app; er worden geen queries uitgevoerd
+
+import numpy as np  # noqa: E402
+
+from app.matching import apply_relevance_scoring, compute_consultant_relevance  # noqa: E402
+from app.parallel_scoring import score_consultants_parallel  # noqa: E402
+from app.skill_similarity import skill_overlap_scores, use_skill_similarity_matrix  # noqa: E402
+
+SKILL_COUNT = 200
+MIN_SPEEDUP = 1.1  # kleinere verschillen tussen medianen zijn ruis
+
+
+def make_profiles(count, seed=1):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    skills = [SimpleNamespace(id=i) for i in range(1, SKILL_COUNT + 1)]
+    return [
+        SimpleNamespace(
+            id=i,
+            display_name_masked=f"Consultant {i}",
+            headline=rng.choice(["Python developer", "Data engineer", "Java architect"]),
+            location_city="Gent",
+            country="Belgium",
+            created_at=now - timedelta(days=rng.randint(0, 90), seconds=rng.randint(0, 86399)),
+            skills=rng.sample(skills, rng.randint(1, 12)),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def make_skill_matrix(seed=1):
+    """Synthetische skill similarity: elke skill heeft een paar verwante skills."""
+    rng = np.random.default_rng(seed)
+    values = np.eye(SKILL_COUNT + 1)
+    for skill_id in range(1, SKILL_COUNT + 1):
+        related = rng.integers(1, SKILL_COUNT + 1, size=3)
+        values[skill_id, related] = np.maximum(values[skill_id, related], rng.uniform(0.1, 0.5, size=3))
+    return values
+
+
+def sequential(profiles, job, text_query, unlock_counts, now):
+    required = {s.id for s in job.skills}
+    skill_factors = skill_overlap_scores(required, profiles)
+    return apply_relevance_scoring(
+        profiles,
+        lambda p: compute_consultant_relevance(
+            p, job, required, text_query, unlock_counts, now, skill_factors=skill_factors
+        ),
+    )
+
+
+def measure(repeat, fn):
+    """Eén opwarmrun, daarna repeat runs. Retourneert (mediaan, min, max, resultaat)."""
+    result = fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), min(timings), max(timings), result
+
+
+def crossover_size(rows, margin=MIN_SPEEDUP):
+    """Kleinste grootte vanaf waar parallel (mediaan) duidelijk sneller blijft dan sequential."""
+    crossover = None
+    for size, seq_time, par_time in reversed(rows):
+        if seq_time / par_time < margin:
+            break
+        crossover = size
+    return crossover
+
+
+def timing(median, low, high):
+    return f"{median * 1000:>9.1f}ms ({low * 1000:.1f}–{high * 1000:.1f})"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 20000, 50000, 100000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--q", default=None, help="optionele zoekterm")
+    args = parser.parse_args()
+
+    use_skill_similarity_matrix(make_skill_matrix())
+    job = SimpleNamespace(skills=[SimpleNamespace(id=i) for i in (1, 2, 3)])
+    now = datetime.now(timezone.utc)
+
+    print(f"workers={args.workers} repeat={args.repeat} q={args.q!r}")
+    print(
+        f"{'candidates':>10} {'sequential':>26} {'vectorized':>26} {'parallel':>26}"
+        f" {'vector':>7} {'threads':>7} {'total':>7}"
+    )
+    rows = []
+    thread_speedups = []
+    for size in args.sizes:
+        profiles = make_profiles(size)
+        unlock_counts = {p.id: p.id % 60 for p in profiles[::7]}
+
+        def parallel(workers):
+            return lambda: score_consultants_parallel(
+                profiles, job, args.q, unlock_counts, now, workers=workers
+            )
+
+        seq = measure(args.repeat, lambda: sequential(profiles, job, args.q, unlock_counts, now))
+        vec = measure(args.repeat, parallel(1))
+        par = measure(args.repeat, parallel(args.workers))
+
+        expected = [(p.id, p.score) for p in seq[3]]
+        for result in (vec[3], par[3]):
+            assert [(p.id, p.score) for p in result] == expected, \
+                "parallelle scoring wijkt af van de sequentiële"
+
+        rows.append((size, seq[0], par[0]))
+        thread_speedups.append(vec[0] / par[0])
+        print(
+            f"{size:>10} {timing(*seq[:3]):>26} {timing(*vec[:3]):>26} {timing(*par[:3]):>26}"
+            f" {seq[0] / vec[0]:>6.2f}x {vec[0] / par[0]:>6.2f}x {seq[0] / par[0]:>6.2f}x"
+        )
+
+    crossover = crossover_size(rows)
+    print(f"crossover (mediaan): {crossover if crossover else 'niet bereikt'}")
+    if args.workers > 1 and max(thread_speedups) < MIN_SPEEDUP:
+        print(
+            f"threads: geen winst met {args.workers} workers (max {max(thread_speedups):.2f}x, "
+            f"{os.cpu_count()} CPU's)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+-- Tabellen en indexen toegevoegd na docs/DDL matching current SQLAlchemy models.pdf.
+-- Gegenereerd met: flask --app run schema sql (of toepassen met: flask --app run schema create)
+
+CREATE TYPE recommendation_subject AS ENUM ('consultant', 'job');
+
+CREATE TYPE saved_search_kind AS ENUM ('jobs', 'consultants');
+
+CREATE INDEX idx_collaborations_company_status ON collaborations (company_id, status);
+
+CREATE INDEX idx_collaborations_consultant_status ON collaborations (consultant_id, status);
+
+CREATE INDEX idx_collaborations_started_at ON collaborations (started_at);
+
+CREATE INDEX idx_collaborations_status_started_at ON collaborations (status, started_at);
+
+CREATE TABLE skill_similarities (
+	skill_id INTEGER NOT NULL,
+	similar_skill_id INTEGER NOT NULL,
+	similarity FLOAT NOT NULL,
+	computed_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+	PRIMARY KEY (skill_id, similar_skill_id),
+	FOREIGN KEY(skill_id) REFERENCES skills (id) ON DELETE CASCADE,
+	FOREIGN KEY(similar_skill_id) REFERENCES skills (id) ON DELETE CASCADE
+);
+
+CREATE TABLE recommendation_runs (
+	generation SERIAL NOT NULL,
+	started_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+	finished_at TIMESTAMP WITHOUT TIME ZONE,
+	PRIMARY KEY (generation)
+);
+
+CREATE TABLE recommendations (
+	id SERIAL NOT NULL,
+	generation INTEGER NOT NULL,
+	subject_type recommendation_subject NOT NULL,
+	subject_id INTEGER NOT NULL,
+	target_id INTEGER NOT NULL,
+	rank INTEGER NOT NULL,
+	score FLOAT NOT NULL,
+	skill_factor FLOAT NOT NULL,
+	semantic_factor FLOAT NOT NULL,
+	recency_factor FLOAT NOT NULL,
+	popularity_factor FLOAT NOT NULL,
+	unlock_count INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(generation) REFERENCES recommendation_runs (generation) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_recommendations_subject ON recommendations (generation, subject_type, subject_id, rank);
+
+CREATE TABLE recommendation_changes (
+	id SERIAL NOT NULL,
+	entity VARCHAR(40) NOT NULL,
+	entity_id INTEGER NOT NULL,
+	changed_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+	PRIMARY KEY (id)
+);
+
+CREATE INDEX idx_recommendation_changes_changed_at ON recommendation_changes (changed_at);
+
+CREATE TABLE stored_files (
+	key VARCHAR(255) NOT NULL,
+	url TEXT NOT NULL,
+	sha256 VARCHAR(64) NOT NULL,
+	size INTEGER NOT NULL,
+	content_type VARCHAR(120) NOT NULL,
+	ref_count INTEGER DEFAULT '0' NOT NULL,
+	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+	last_referenced_at TIMESTAMP WITHOUT TIME ZONE,
+	PRIMARY KEY (key),
+	UNIQUE (url)
+);
+
+CREATE INDEX idx_stored_files_ref_count ON stored_files (ref_count);
+
+CREATE TABLE saved_searches (
+	id SERIAL NOT NULL,
+	user_id INTEGER NOT NULL,
+	kind saved_search_kind NOT NULL,
+	name VARCHAR(120) NOT NULL,
+	query TEXT NOT NULL,
+	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+	last_viewed_at TIMESTAMP WITHOUT TIME ZONE,
+	refreshed_at TIMESTAMP WITHOUT TIME ZONE,
+	PRIMARY KEY (id),
+	FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_saved_searches_kind ON saved_searches (kind);
+
+CREATE INDEX idx_saved_searches_user ON saved_searches (user_id);
+
+CREATE TABLE saved_search_results (
+	saved_search_id INTEGER NOT NULL,
+	target_id INTEGER NOT NULL,
+	score FLOAT,
+	score_breakdown JSON,
+	matched_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+	PRIMARY KEY (saved_search_id, target_id),
+	FOREIGN KEY(saved_search_id) REFERENCES saved_searches (id) ON DELETE CASCADE
+);
+
+CREATE TABLE saved_search_changes (
+	id SERIAL NOT NULL,
+	entity VARCHAR(40) NOT NULL,
+	entity_id INTEGER NOT NULL,
+	changed_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE rate_limit_buckets (
+	key VARCHAR(255) NOT NULL,
+	tokens FLOAT NOT NULL,
+	updated_at FLOAT NOT NULL,
+	allowed BOOLEAN NOT NULL,
+	PRIMARY KEY (key)
+);
+
+CREATE INDEX idx_rate_limit_buckets_updated_at ON rate_limit_buckets (updated_at);
+
+CREATE TABLE job_posts_archive (
+	id INTEGER NOT NULL,
+	company_id INTEGER NOT NULL,
+	title VARCHAR(200) NOT NULL,
+	description TEXT,
+	location_city VARCHAR(120),
+	country VARCHAR(120),
+	contract_type VARCHAR(80),
+	created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	is_active BOOLEAN DEFAULT '0' NOT NULL,
+	hired_consultant_id INTEGER,
+	latitude FLOAT,
+	longitude FLOAT,
+	archived_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(company_id) REFERENCES companies (id) ON DELETE CASCADE,
+	FOREIGN KEY(hired_consultant_id) REFERENCES consultant_profiles (id) ON DELETE SET NULL
+);
+
+CREATE INDEX idx_job_posts_archive_company_id ON job_posts_archive (company_id);
+
+CREATE TABLE job_skills_archive (
+	job_id INTEGER NOT NULL,
+	skill_id INTEGER NOT NULL,
+	created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	PRIMARY KEY (job_id, skill_id),
+	FOREIGN KEY(job_id) REFERENCES job_posts_archive (id) ON DELETE CASCADE,
+	FOREIGN KEY(skill_id) REFERENCES skills (id) ON DELETE RESTRICT
+);
+
+CREATE TABLE collaborations_archive (
+	id INTEGER NOT NULL,
+	company_id INTEGER NOT NULL,
+	consultant_id INTEGER NOT NULL,
+	job_post_id INTEGER,
+	status collaboration_status NOT NULL,
+	started_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	ended_at TIMESTAMP WITHOUT TIME ZONE,
+	archived_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(company_id) REFERENCES companies (id) ON DELETE CASCADE,
+	FOREIGN KEY(consultant_id) REFERENCES consultant_profiles (id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_collaborations_archive_company_consultant ON collaborations_archive (company_id, consultant_id);
+
+CREATE TABLE unlocks_archive (
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	target_type unlocktarget NOT NULL,
+	target_id INTEGER NOT NULL,
+	created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	archived_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+);
@@ -0,0 +1,24 @@
+import multiprocessing
+import os
+
+# gunicorn -c gunicorn.conf.py
+# App + warm-up in de master (wsgi.py), daarna forken.
+
+wsgi_app = "wsgi:app"
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+preload_app = True
+
+# workers periodiek vervangen; met preload is een nieuwe worker een goedkope fork
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+
+def post_fork(server, worker):
+    # DB-pool van de master niet delen met de worker
+    from app.warmup import reset_after_fork
+
+    reset_after_fork()
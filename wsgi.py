@@ -0,0 +1,17 @@
+import gc
+
+from app import create_app
+from app.warmup import warm_up
+
+# Productie-entrypoint (gunicorn -c gunicorn.conf.py).
+# Met preload_app wordt deze module één keer in de master geladen:
+# app bouwen, opwarmen, en daarna gc.freeze() zodat de opgewarmde objecten
+# niet door de garbage collector aangeraakt worden (copy-on-write blijft
+# gedeeld tussen de workers). run.py blijft de development server.
+
+app = create_app()
+app.config["TEMPLATES_AUTO_RELOAD"] = False  # templates veranderen niet na de deploy
+warm_up(app)
+
+gc.collect()
+gc.freeze()